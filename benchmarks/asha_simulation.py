@@ -0,0 +1,95 @@
+""" Simulated sweep: compute saved by early-stopping schedulers
+
+Synthetic learning curves `q * (1 - exp(-step / tau)) + noise` are run on a
+fixed number of slots. Each step costs one unit of compute; runs stopped by
+the scheduler free their slot for the next waiting config.
+
+Run with: python -m benchmarks.asha_simulation [--configs 200] [--slots 8]
+"""
+
+import argparse
+import heapq
+import json
+import math
+import random
+
+from bnb.track.schedulers import ASHA, Decision, MedianStopping
+
+
+def _curve(rng, max_step):
+    q   = rng.random()
+    tau = rng.uniform(5, max_step / 3)
+
+    return q, [q * (1 - math.exp(-s / tau)) + rng.gauss(0, 0.01) for s in range(1, max_step + 1)]
+
+
+def simulate(scheduler, configs, slots):
+    waiting = list(range(len(configs)))
+    running = []  # (time, ID, step)
+    now     = 0
+    compute = 0
+    done    = {}
+
+    def _start(t):
+        if waiting:
+            ID = waiting.pop(0)
+            heapq.heappush(running, (t + 1, ID, 1))
+
+    for _ in range(slots):
+        _start(0)
+
+    while running:
+        now, ID, step = heapq.heappop(running)
+        compute += 1
+
+        q, curve = configs[ID]
+        decision = Decision.CONTINUE
+
+        if scheduler is not None:
+            decision = scheduler.on_result(ID, step, curve[step - 1])
+
+        if (decision == Decision.STOP) or (step == len(curve)):
+            done[ID] = curve[step - 1] if step == len(curve) else None
+
+            if scheduler is not None:
+                scheduler.on_finished(ID)
+
+            _start(now)
+        else:
+            heapq.heappush(running, (now + 1, ID, step + 1))
+
+    finished = {ID: v for ID, v in done.items() if v is not None}
+    best     = max(finished, key=finished.get)
+
+    return dict(compute=compute, wall_clock=now, completed=len(finished),
+                best_quality=configs[best][0])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--configs', type=int, default=200)
+    parser.add_argument('--slots', type=int, default=8)
+    parser.add_argument('--steps', type=int, default=81)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng     = random.Random(args.seed)
+    configs = [_curve(rng, args.steps) for _ in range(args.configs)]
+
+    results = {
+        'baseline': simulate(None, configs, args.slots),
+        'asha':     simulate(ASHA('acc', min_step=1, max_step=args.steps), configs, args.slots),
+        'median':   simulate(MedianStopping('acc', grace_steps=args.steps // 9), configs, args.slots),
+    }
+
+    base = results['baseline']['compute']
+    for r in results.values():
+        r['compute_saved'] = 1 - r['compute'] / base
+
+    results['oracle_quality'] = max(q for q, _ in configs)
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
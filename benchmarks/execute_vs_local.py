@@ -0,0 +1,96 @@
+""" Local sweep overhead: EXECUTE mode process pool vs the LocalWorker path
+
+Runs the same batch of fixed-duration tasks through `Experiment.executed()`
+and through `Experiment.queued()` + `ExecutionManager` + `LocalWorker`s, and
+reports wall-clock time and per-task overhead for both.
+
+Run with: python -m benchmarks.execute_vs_local [--tasks 16] [--workers 4] [--duration 1.0]
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from bnb import ExecutionManager, Experiment, WorkerManager, get_current_context
+from bnb.defaults import DB_LOCK, goc_db
+from bnb.track.utils import States
+
+_DONE = {States.OK, States.FAIL, States.DEAD, States.TIMEOUT, States.CANCELLED}
+
+
+def task(i, duration):
+    time.sleep(duration)
+    get_current_context().log_scalar('i', i, 0)
+
+    return i
+
+
+def _wait(name, n):
+    while True:
+        with DB_LOCK:
+            docs = goc_db(name=name).all()
+
+        if sum(d['status'] in _DONE for d in docs) >= n:
+            return
+
+        time.sleep(0.05)
+
+
+def run_execute(n, workers, duration):
+    ex = Experiment('bench-execute', dirty_ok=True)
+    f  = ex.watch(task)
+
+    t0 = time.time()
+
+    with ex.executed(n_procs=workers):
+        futures = [f(i, duration) for i in range(n)]
+        _       = [fut.result() for fut in futures]
+
+    return time.time() - t0
+
+
+def run_local_workers(n, workers, duration, port):
+    ex = Experiment('bench-local', dirty_ok=True)
+    f  = ex.watch(task)
+
+    wm = WorkerManager(n_local=workers, local_port=port)
+    em = ExecutionManager(dispatcher=wm, name='bench-local')
+
+    t0 = time.time()
+
+    with ex.queued('bench-local'):
+        for i in range(n):
+            f(i, duration)
+
+    _wait('bench-local', n)
+    elapsed = time.time() - t0
+
+    em.stop()
+
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tasks', type=int, default=16)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=1.0)
+    parser.add_argument('--port', type=int, default=18900)
+    args = parser.parse_args()
+
+    os.environ['HOME'] = tempfile.mkdtemp(prefix='bnb-bench-')
+
+    ideal   = args.duration * args.tasks / args.workers
+    results = {
+        'execute':      run_execute(args.tasks, args.workers, args.duration),
+        'local_worker': run_local_workers(args.tasks, args.workers, args.duration, args.port),
+    }
+
+    print(json.dumps({k: dict(seconds=v, overhead_per_task=(v - ideal) * args.workers / args.tasks)
+                      for k, v in results.items()}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+""" Import-time budget for the tracking API used inside training scripts
+
+Run with: python -m benchmarks.import_time [--budget SECONDS] [--repeat N]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+HEAVY_MODULES = (
+    'pandas', 'git', 'rpyc', 'paramiko', 'plumbum',
+    'dill', 'tinydb', 'persistqueue',
+)
+
+_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import {module}
+t1 = time.perf_counter()
+print(json.dumps({{'seconds': t1 - t0, 'modules': sorted(sys.modules)}}))
+"""
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure(module='bnb.track', repeat=5):
+    timings = []
+    loaded  = set()
+
+    for _ in range(repeat):
+        out = subprocess.check_output([sys.executable, '-c', _PROBE.format(module=module)],
+                                      cwd=ROOT)
+        out = json.loads(out.decode())
+
+        timings.append(out['seconds'])
+        loaded |= {m.split('.')[0] for m in out['modules']}
+
+    heavy = sorted(set(HEAVY_MODULES) & loaded)
+
+    return dict(module=module, median=statistics.median(timings),
+                best=min(timings), heavy_modules=heavy)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--module', default='bnb.track')
+    parser.add_argument('--budget', type=float, default=0.1)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    result = measure(args.module, args.repeat)
+    print(json.dumps(result, indent=2))
+
+    assert not result['heavy_modules'], \
+        f'import {args.module} pulled in: {result["heavy_modules"]}'
+    assert result['median'] < args.budget, \
+        f'import {args.module} took {result["median"]:.3f}s (budget: {args.budget:.3f}s)'
+
+
+if __name__ == '__main__':
+    main()
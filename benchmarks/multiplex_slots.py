@@ -0,0 +1,91 @@
+""" Manager-side threads and memory for many remote task slots
+
+Compares one rpyc connection (+ serving thread) per slot against a single
+multiplexed connection carrying every slot. A `WorkerService` server runs
+in a separate process, so only the manager side is measured.
+
+Run with: python -m benchmarks.multiplex_slots [--slots 100]
+"""
+
+import argparse
+import json
+import multiprocessing
+import threading
+import time
+import tracemalloc
+
+import dill
+import rpyc
+from rpyc.utils.server import ThreadedServer
+
+from bnb.dispatch.service import WorkerService
+
+
+def _serve(port):
+    ThreadedServer(service=WorkerService, port=port).start()
+
+
+def _noop():
+    return None
+
+
+def _entry(i):
+    return {'ID': f'{i:032x}', 'rich_id': {'name': 'bench-multiplex'}}
+
+
+def _run(n_slots, port, multiplexed):
+    threads0 = threading.active_count()
+    tracemalloc.start()
+
+    n_conns = 1 if multiplexed else n_slots
+    conns   = [rpyc.connect('localhost', port, service=rpyc.VoidService) for _ in range(n_conns)]
+    bgsrvs  = [rpyc.BgServingThread(c) for c in conns]
+
+    done = threading.Semaphore(0)
+    task = dill.dumps((_noop, (), {}))
+
+    for slot in range(n_slots):
+        conn = conns[0] if multiplexed else conns[slot]
+        conn.root.exposed_dispatch(callback=lambda ret: done.release(),
+                                   upstream_update=lambda *a, **kw: None,
+                                   db_entry=dill.dumps(_entry(slot)), task=task,
+                                   slot=slot)
+
+    for _ in range(n_slots):
+        done.acquire()
+
+    threads = threading.active_count() - threads0
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    for b, c in zip(bgsrvs, conns):
+        b.stop()
+        c.close()
+
+    return dict(connections=n_conns, threads=threads,
+                memory_kb=current / 1024, peak_memory_kb=peak / 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--slots', type=int, default=100)
+    parser.add_argument('--port', type=int, default=18861)
+    args = parser.parse_args()
+
+    server = multiprocessing.Process(target=_serve, args=(args.port, ), daemon=True)
+    server.start()
+    time.sleep(1)
+
+    try:
+        result = {
+            'per_slot':    _run(args.slots, args.port, multiplexed=False),
+            'multiplexed': _run(args.slots, args.port, multiplexed=True),
+        }
+    finally:
+        server.terminate()
+
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+""" Latency of (re)deploying a worker server on a remote host
+
+Measures a cold start (new SSH session, new server), a warm start (pooled
+session, reattach to the running server) and a reconnect after the SSH
+transport was dropped.
+
+Run with: python -m benchmarks.reconnect_latency HOST --user USER --keyfile KEY
+"""
+
+import argparse
+import json
+import statistics
+
+from bnb.remote import deploy
+
+
+def _latency(host, user, keyfile, reattach=True):
+    server = deploy.DeployedServer(host, user, keyfile, reattach=reattach)
+    conn   = server.connect()
+    conn.ping()
+    conn.close()
+
+    return server
+
+
+def measure(host, user, keyfile, repeat=3):
+    cold, warm, blip = [], [], []
+
+    for _ in range(repeat):
+        deploy.close_machines()
+        server = _latency(host, user, keyfile, reattach=False)
+        cold.append(server.latency['total'])
+        server.close()
+
+        server = _latency(host, user, keyfile)
+        warm.append(server.latency['total'])
+
+        server.remote_machine._client.get_transport().close()
+        server.close()
+
+        server = _latency(host, user, keyfile)
+        blip.append(server.latency['total'])
+        server.shutdown()
+
+    return {k: dict(median=statistics.median(v), best=min(v))
+            for k, v in (('cold', cold), ('warm', warm), ('reconnect', blip))}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('host')
+    parser.add_argument('--user', required=True)
+    parser.add_argument('--keyfile', required=True)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(json.dumps(measure(args.host, args.user, args.keyfile, args.repeat), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+""" Results query chains on a large synthetic frame: lazy plan vs step-by-step materialization
+
+Builds a frame shaped like `Results._extract_df()` output and runs the
+same chain of filters through `Results` and through the equivalent eager
+pandas operations, copying the frame after every step as `Results` used to.
+Reports time and peak traced memory of both.
+
+Run with: python -m benchmarks.results_query [--runs 100000] [--repeat 3]
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from bnb.vis.core import Results
+
+_TAGS = (['a'], ['a', 'b'], ['b'], [])
+
+
+def synthetic(n, n_config=8, n_results=4, seed=0):
+    rng  = np.random.default_rng(seed)
+    data = {
+        ('details', 'ID'):     [f'{i:032x}' for i in range(n)],
+        ('details', 'status'): rng.choice(['OK', 'FAIL', 'TIMEOUT'], size=n, p=[.8, .15, .05]),
+        ('details', 'total'):  rng.random(n) * 60,
+        ('rich_id', 'tags'):   [_TAGS[i % len(_TAGS)] for i in range(n)],
+        ('rich_id', 'version'): rng.integers(0, 10, size=n),
+    }
+
+    for c in range(n_config):
+        data[('config', f'c{c}')] = rng.integers(0, 1 if c == 0 else 5, size=n)
+
+    for r in range(n_results):
+        data[('results', f'r{r}')] = rng.random(n)
+
+    df = pd.DataFrame(data)
+    df.columns = pd.MultiIndex.from_tuples(df.columns)
+
+    return df
+
+
+def lazy_chain(df):
+    r = Results(db=None, df=df)
+
+    return r.only_ok().has_any('a').compare().no_details().top_k(['r0'], k=100).df
+
+
+def eager_chain(df):
+    df = df.copy()
+
+    df = df[df.details.status == 'OK'].copy()
+    df = df[df.apply(lambda row: len(set(row.rich_id.tags) & {'a'}) > 0, axis=1)].copy()
+
+    different = df['config'].nunique() > 1
+    df = df.drop([('config', c) for c in different[different == False].index.values], axis=1).copy()
+
+    df = df[['results', 'config']].copy()
+    df = df.sort_values(by=[('results', 'r0')], ascending=False).iloc[:100, :].copy()
+
+    return df
+
+
+def measure(fn, base, repeat):
+    timings = []
+
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(base)
+        timings.append(time.perf_counter() - t0)
+
+    tracemalloc.start()
+    out = fn(base)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return out, dict(seconds=min(timings), peak_mb=peak / 2 ** 20)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    base = synthetic(args.runs)
+
+    eager, eager_stats = measure(eager_chain, base, args.repeat)
+    lazy, lazy_stats   = measure(lazy_chain, base, args.repeat)
+
+    pd.testing.assert_frame_equal(eager, lazy)
+
+    print(json.dumps(dict(runs=args.runs, eager=eager_stats, lazy=lazy_stats), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,265 @@
+""" Offline benchmarks for the tracking, dispatch and analysis hot paths
+
+Cases:
+    log_scalar   per-call cost of `ExecutionContext.log_scalar` (local backup + upstream)
+    enqueue      `Experiment.queued()` submissions per second
+    dispatch     no-op tasks per second through `ExecutionManager` + N `LocalWorker`s
+    db_update    `write_update` latency vs number of runs in the store
+    results      `Results` load time vs number of runs in the store
+
+Everything runs against a throwaway HOME. Results are printed (and written
+with --out) as JSON; with --baseline, every metric is compared against a
+previous output and the run fails if one regressed by more than --tolerance.
+
+Run with: python -m benchmarks.suite [--only log_scalar results] [--out now.json]
+                                     [--baseline base.json] [--tolerance 0.25]
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import uuid
+
+CASES = {}
+
+
+def case(fn):
+    CASES[fn.__name__] = fn
+    return fn
+
+
+def metric(value, unit, better='lower'):
+    return dict(value=value, unit=unit, better=better)
+
+
+def _timeit(fn, n):
+    t0 = time.perf_counter()
+    for i in range(n):
+        fn(i)
+
+    return (time.perf_counter() - t0) / n
+
+
+def _entry(name, i=0, n_logs=0):
+    from bnb.track.execution import initial_entry
+
+    ID    = uuid.uuid4().hex
+    entry = initial_entry(ID, dict(name=name, version=0), dict(i=i))
+
+    entry['status']  = 'OK'
+    entry['timing']  = dict(start=time.time(), stop=time.time() + 1)
+    entry['results'] = dict(acc=i / 100)
+    entry['logs']    = dict(loss=[(s, 1 / (s + 1)) for s in range(n_logs)])
+
+    return entry
+
+
+def _fill(name, n, n_logs=10):
+    from bnb.defaults import goc_db, prepare
+
+    entries = [_entry(name, i, n_logs) for i in range(n)]
+    for e in entries:
+        prepare(e['ID'], name)
+
+    goc_db(name=name).insert_multiple(entries)
+
+    return entries
+
+
+@case
+def log_scalar(args):
+    from bnb.track.execution import ExecutionContext
+
+    def upstream(ID, *path, value, mode):
+        pass
+
+    out = {}
+    for label, update in [('local', None), ('upstream', upstream)]:
+        ctx = ExecutionContext(db_entry=_entry('bench-log'), upstream_update=update)
+        out[f'{label}.per_call'] = metric(_timeit(lambda i: ctx.log_scalar('loss', 0.5, i),
+                                                  args.calls), 's')
+
+    return out
+
+
+@case
+def enqueue(args):
+    from bnb import Experiment
+
+    ex = Experiment('bench-enqueue', dirty_ok=True)
+
+    @ex.watch
+    def noop(i):
+        return i
+
+    with ex.queued('bench-enqueue'):
+        per_call = _timeit(noop, args.calls // 10)
+
+    return {'per_second': metric(1 / per_call, 'runs/s', 'higher')}
+
+
+@case
+def dispatch(args):
+    from bnb import ExecutionManager, Experiment, WorkerManager
+    from bnb.defaults import DB_LOCK, goc_db
+    from bnb.track.utils import States
+
+    name = 'bench-dispatch'
+    ex   = Experiment(name, dirty_ok=True)
+
+    @ex.watch
+    def noop(i):
+        return i
+
+    # The queue is filled first, so the manager never blocks on an empty queue
+    with ex.queued(name):
+        for i in range(args.tasks):
+            noop(i)
+
+    wm = WorkerManager(n_local=args.workers, local_port=args.port)
+
+    try:
+        t0 = time.perf_counter()
+        em = ExecutionManager(dispatcher=wm, name=name)
+
+        while True:
+            with DB_LOCK:
+                done = sum(d['status'] == States.OK for d in goc_db(name=name).all())
+
+            if done >= args.tasks:
+                break
+
+            time.sleep(0.01)
+
+        elapsed = time.perf_counter() - t0
+        em.stop()
+
+    finally:
+        # the local worker servers would otherwise outlive the case
+        wm.stop()
+
+    return {f'{args.workers}_workers.per_second': metric(args.tasks / elapsed, 'runs/s', 'higher')}
+
+
+@case
+def db_update(args):
+    from bnb.track.execution import write_update
+
+    out = {}
+    for n in args.sizes:
+        entries = _fill(f'bench-db-{n}', n)
+        IDs     = [e['ID'] for e in entries[-10:]]
+
+        per_call = _timeit(lambda i: write_update(IDs[i % len(IDs)], 'logs', 'loss',
+                                                  value=(i, 0.5), mode='append'), 20)
+        out[f'{n}_runs.latency'] = metric(per_call, 's')
+
+    return out
+
+
+@case
+def results(args):
+    from bnb.defaults import goc_db
+    from bnb.vis.core import Results
+
+    out = {}
+    for n in args.sizes:
+        name = f'bench-results-{n}'
+        _fill(name, n)
+
+        timings = []
+        for _ in range(3):
+            t0 = time.perf_counter()
+            Results(goc_db(name=name))
+            timings.append(time.perf_counter() - t0)
+
+        out[f'{n}_runs.load'] = metric(min(timings), 's')
+
+    return out
+
+
+def run(names, args):
+    out = {}
+
+    for name in names:
+        t0 = time.perf_counter()
+        for k, v in CASES[name](args).items():
+            out[f'{name}.{k}'] = v
+
+        print(f'{name}: done in {time.perf_counter() - t0:.1f}s', file=sys.stderr)
+
+    return dict(meta=dict(python=platform.python_version(), platform=platform.platform(),
+                          time=time.time(), args=vars(args)),
+                results=out)
+
+
+def compare(current, baseline, tolerance=0.25):
+    """ Relative change of every metric present in both outputs.
+
+    A metric regressed if it got worse (in its own direction) by more than `tolerance`.
+    """
+
+    rows = []
+
+    for k, cur in current['results'].items():
+        base = baseline['results'].get(k)
+        if (base is None) or (base['value'] == 0):
+            continue
+
+        change = (cur['value'] - base['value']) / base['value']
+        worse  = change if cur['better'] == 'lower' else -change
+
+        rows.append(dict(metric=k, baseline=base['value'], current=cur['value'],
+                         unit=cur['unit'], change=change, regressed=worse > tolerance))
+
+    return rows
+
+
+def _print_comparison(rows):
+    for r in rows:
+        flag = 'REGRESSED' if r['regressed'] else 'ok'
+        print(f'{r["metric"]:<40} {r["baseline"]:>12.6g} -> {r["current"]:>12.6g} {r["unit"]:<7}'
+              f' {100 * r["change"]:+7.1f}%  {flag}', file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--only', nargs='+', choices=sorted(CASES), default=list(CASES))
+    parser.add_argument('--out')
+    parser.add_argument('--baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    parser.add_argument('--calls', type=int, default=2000)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 5000])
+    parser.add_argument('--tasks', type=int, default=50)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--port', type=int, default=18950)
+    args = parser.parse_args()
+
+    # Never touch the user's ~/.experiments
+    os.environ['HOME'] = tempfile.mkdtemp(prefix='bnb-bench-')
+
+    out = run(args.only, args)
+    print(json.dumps(out, indent=2))
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(out, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            rows = compare(out, json.load(f), args.tolerance)
+
+        _print_comparison(rows)
+
+        regressed = [r['metric'] for r in rows if r['regressed']]
+        if regressed:
+            # not an assert: the gate must hold under python -O too
+            sys.exit(f'Regressions beyond {args.tolerance:.0%}: {regressed}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,22 @@
-from .track import (Experiment, ExecutionManager, 
-                    set_current_context, get_current_context)
-from .dispatch import WorkerManager
-from . import vis
+from .track import set_current_context, get_current_context
+from .utils.lazy import lazy_getattr
 
 __all__ = [
     'set_current_context', 'get_current_context',
-    'Experiment', 'ExecutionManager',
+    'Experiment', 'ExecutionManager', 'WorkerManager',
     # modules
     'defaults', 'dispatch', 'remote', 'track', 'utils', 'vis'
 ]
+
+# `track`, `dispatch` and `vis` pull in pandas, GitPython, rpyc, paramiko, ...
+# Training code usually only needs `get_current_context`, so the rest is
+# imported on first attribute access.
+__getattr__ = lazy_getattr(__name__, attrs={
+    'Experiment':       ('.track', 'Experiment'),
+    'ExecutionManager': ('.track', 'ExecutionManager'),
+    'WorkerManager':    ('.dispatch', 'WorkerManager'),
+}, modules=('defaults', 'dispatch', 'remote', 'track', 'utils', 'vis'))
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -1,12 +1,20 @@
 import os
 import shutil
-
-from persistqueue import FIFOSQLiteQueue
-from tinydb import TinyDB
+import threading
+from contextlib import contextmanager
 
 _DBS_CACHE = {}
 _ID_2_NAME = {}
 
+# TinyDB is not thread-safe: writers sharing a process should hold this
+DB_LOCK = threading.RLock()
+
+# Task processes are forked from threaded servers: take the lock around every
+# fork, so that no other thread holds it in the child's copy of the process
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(before=DB_LOCK.acquire,
+                        after_in_parent=DB_LOCK.release, after_in_child=DB_LOCK.release)
+
 
 _ROOT      = '~/.experiments'
 _DB_NAME   = 'db.json'
@@ -15,6 +23,8 @@ _RUNS_TAB  = 'runs'
 _STORAGE   = 'storage'
 _QUEUE     = 'queue.pq'
 _ENTRY     = 'entry.json'
+_SERVER    = 'server.json'
+_SNAPSHOT  = 'results.arrow'
 
 
 class Tables:
@@ -22,8 +32,15 @@ class Tables:
     META = _META_TAB
 
 
-def get_root():
-    return os.path.expanduser(_ROOT)
+def get_root(home=None):
+    if home is None:
+        return os.path.expanduser(_ROOT)
+
+    return _ROOT.replace('~', home, 1)
+
+
+def server_state_path(home=None):
+    return os.path.join(get_root(home), _SERVER)
 
 
 # TODO(elan): implicit shit goin on here...
@@ -36,11 +53,13 @@ def prepare(ID, name):
     _ = goc_queue()
 
 
-def goc_queue(name='default'):
+def goc_queue(name='default', multithreading=False):
+    from persistqueue import FIFOSQLiteQueue
+
     qname = os.path.expanduser(os.path.join(_ROOT, f'{name}-{_QUEUE}'))
     os.makedirs(os.path.dirname(qname), mode=0o775, exist_ok=True)
 
-    return FIFOSQLiteQueue(path=qname)
+    return FIFOSQLiteQueue(path=qname, multithreading=multithreading)
 
 
 def backup_entry_path(ID):
@@ -69,18 +88,56 @@ def goc_storage_path(ID, name=None):
     return retval
 
 
+def db_path(name):
+    return os.path.expanduser(os.path.join(_ROOT, name, _DB_NAME))
+
+
+def snapshot_path(name):
+    return os.path.expanduser(os.path.join(_ROOT, name, _SNAPSHOT))
+
+
+@contextmanager
+def db_lock(ID=None, name=None):
+    """ Exclusive access to an experiment's store, across threads and processes.
+
+    TinyDB rewrites the whole file on every write, so writers in different
+    processes (managers, `compact`) must not interleave their read-modify-write.
+    """
+
+    path = db_path(_check_name(ID, name)) + '.lock'
+    os.makedirs(os.path.dirname(path), mode=0o775, exist_ok=True)
+
+    try:
+        import fcntl
+    except ImportError:
+        fcntl = None
+
+    with DB_LOCK, open(path, 'a') as f:
+        if fcntl is None:
+            yield
+            return
+
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
 def goc_db(ID=None, name=None, table=Tables.RUNS):
     name = _check_name(ID, name)
     db   = _DBS_CACHE.get(name)
 
     if db is None:
 
-        db_path = os.path.expanduser(os.path.join(_ROOT, name, _DB_NAME))
-        dirname = os.path.dirname(db_path) 
+        path    = db_path(name)
+        dirname = os.path.dirname(path) 
         
         os.makedirs(dirname, mode=0o775, exist_ok=True)
 
-        db = TinyDB(db_path)
+        from tinydb import TinyDB
+
+        db = TinyDB(path)
         _DBS_CACHE[name] = db
 
     tab = db.table(table)
@@ -0,0 +1,255 @@
+""" Retention and compaction of an experiment's run store.
+
+Policies look at the finished runs of an experiment and mark some for
+deletion or for log archiving; runs that any policy keeps are never
+deleted. `compact` then applies the decisions:
+
+  * archived runs have their `logs` moved to a gzip file in their storage,
+    leaving `log_summary` (and so exact summaries) in the entry,
+  * deleted runs are removed from the store along with their directory,
+  * artifact store objects no remaining run refers to are removed.
+
+The store is locked (`db_lock`, which managers take for every write, in any
+process) only for short batches of updates, with all file work done in
+between, so managers dispatching to the same experiment keep going.
+Runs that have not finished are never touched, and runs that changed since
+they were planned for deletion (e.g. re-dispatched) are kept.
+"""
+
+import gzip
+import json
+import logging
+import os
+import shutil
+import time
+from collections import namedtuple
+
+from . import _ROOT, db_lock, db_path, goc_db
+from ..track.utils import States
+
+_ARCHIVE = 'logs.json.gz'
+_DAY     = 24 * 60 * 60
+
+_ACTIVE  = {States.RUNNING, States.PRE_DISPATCH, States.UNK}
+_FAILED  = (States.FAIL, States.DEAD, States.TIMEOUT, States.SIGINT, States.CANCELLED)
+
+_logger  = logging.getLogger('Retention')
+
+Report = namedtuple('Report', ('deleted', 'archived', 'kept', 'bytes_before', 'bytes_after'))
+
+
+def _finished_at(entry):
+    """ When the run last changed, `None` if unknown.
+
+    DEAD runs and runs cancelled before dispatch have no timing: their last
+    update, or else the mtime of their storage, stands in for it.
+    """
+
+    stop = (entry.get('timing') or {}).get('stop')
+    if stop:
+        return stop
+
+    if entry.get('_last_update'):
+        return entry['_last_update']
+
+    try:
+        return os.path.getmtime((entry.get('storage') or {})['root'])
+    except (KeyError, TypeError, OSError):
+        return None
+
+
+def _older_than(entry, days, now):
+    t = _finished_at(entry)
+    return (t is not None) and (now - t > days * _DAY)
+
+
+class RetentionPolicy:
+    """ `keep` protects runs from deletion, `delete` and `archive` propose runs for either action """
+
+    def keep(self, entries, now):
+        return set()
+
+    def delete(self, entries, now):
+        return set()
+
+    def archive(self, entries, now):
+        return set()
+
+
+class KeepTopK(RetentionPolicy):
+    """ Protects the `k` best runs by `results[metric]`, separately for each value of `by` (e.g. 'version') """
+
+    def __init__(self, metric, k=5, ascending=False, by=None):
+        self.metric    = metric
+        self.k         = k
+        self.ascending = ascending
+        self.by        = by
+
+    def keep(self, entries, now):
+        groups = {}
+
+        for e in entries:
+            value = (e.get('results') or {}).get(self.metric)
+            if not isinstance(value, (int, float)):
+                continue
+
+            key = (e.get('rich_id') or {}).get(self.by) if self.by else None
+            groups.setdefault(key, []).append((value, e['ID']))
+
+        keep = set()
+        for ranked in groups.values():
+            ranked.sort(key=lambda item: item[0], reverse=not self.ascending)
+            keep.update(ID for _, ID in ranked[:self.k])
+
+        return keep
+
+
+class DropFailed(RetentionPolicy):
+    """ Deletes runs that ended in one of `statuses` more than `days` ago """
+
+    def __init__(self, days=7, statuses=_FAILED):
+        self.days     = days
+        self.statuses = set(statuses)
+
+    def delete(self, entries, now):
+        return {e['ID'] for e in entries
+                if e['status'] in self.statuses and _older_than(e, self.days, now)}
+
+
+class ArchiveLogs(RetentionPolicy):
+    """ Moves the logged series of runs finished more than `days` ago out of the store """
+
+    def __init__(self, days=30):
+        self.days = days
+
+    def archive(self, entries, now):
+        return {e['ID'] for e in entries if e.get('logs') and _older_than(e, self.days, now)}
+
+
+def run_path(name, ID):
+    return os.path.expanduser(os.path.join(_ROOT, name, ID))
+
+
+def archive_path(name, ID):
+    return os.path.join(run_path(name, ID), 'storage', _ARCHIVE)
+
+
+def load_archived_logs(path):
+    with gzip.open(path, 'rt') as f:
+        return json.load(f)
+
+
+def _write_archive(path, logs):
+    os.makedirs(os.path.dirname(path), mode=0o775, exist_ok=True)
+
+    tmp = f'{path}.tmp'
+    with gzip.open(tmp, 'wt') as f:
+        json.dump(logs, f)
+
+    os.replace(tmp, path)
+
+
+def _batches(items, size):
+    items = list(items)
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _set_archived(paths):
+    def transform(doc):
+        # a run re-dispatched since the entries were read keeps its logs
+        if doc['status'] not in _ACTIVE:
+            doc['logs'] = {}
+            doc.setdefault('storage', {})['logs_archive'] = paths[doc['ID']]
+
+    return transform
+
+
+def _unchanged(planned):
+    """ Condition on docs still as they were when planned (same status and restarts) """
+
+    def test(doc):
+        before = planned.get(doc['ID'])
+        return (before is not None) and (doc['status'] == before['status']) \
+            and (doc.get('restarts', 0) == before.get('restarts', 0))
+
+    return test
+
+
+def plan(entries, policies, now=None):
+    """ (to delete, to archive, kept) run IDs """
+
+    now      = time.time() if now is None else now
+    finished = [e for e in entries if e['status'] not in _ACTIVE]
+
+    kept, delete, archive = set(), set(), set()
+    for p in policies:
+        kept    |= p.keep(finished, now)
+        delete  |= p.delete(finished, now)
+        archive |= p.archive(finished, now)
+
+    delete  -= kept
+    archive -= delete
+
+    return delete, archive, kept
+
+
+def compact(name, policies, dry_run=False, batch=100, now=None, grace=3600) -> Report:
+    """ Applies the retention `policies` to experiment `name`
+
+    Artifact objects added in the last `grace` seconds are never collected:
+    a run may be ingesting them before its manifest is written.
+    """
+
+    from ..track.artifacts import ArtifactStore, referenced_digests
+
+    db = goc_db(name=name)
+
+    with db_lock(name=name):
+        entries = db.all()
+
+    size = os.path.getsize(db_path(name)) if os.path.exists(db_path(name)) else 0
+
+    delete, archive, kept = plan(entries, policies, now=now)
+    by_ID = {e['ID']: e for e in entries}
+
+    if dry_run:
+        return Report(sorted(delete), sorted(archive), sorted(kept), size, size)
+
+    for IDs in _batches(sorted(archive), batch):
+        paths = {}
+
+        for ID in IDs:
+            path = archive_path(name, ID)
+
+            try:
+                _write_archive(path, by_ID[ID]['logs'])
+                paths[ID] = path
+            except OSError as e:
+                _logger.warning(f'Could not archive the logs of {ID}: {e}')
+
+        # one rewrite of the store per batch
+        with db_lock(name=name):
+            db.update(_set_archived(paths), doc_ids=[by_ID[ID].doc_id for ID in paths])
+
+    deleted = []
+
+    for IDs in _batches(sorted(delete), batch):
+        with db_lock(name=name):
+            removed = db.remove(_unchanged({ID: by_ID[ID] for ID in IDs}))
+            gone    = [ID for ID in IDs if by_ID[ID].doc_id in set(removed)]
+
+        for ID in gone:
+            shutil.rmtree(run_path(name, ID), ignore_errors=True)
+
+        deleted += gone
+
+    if deleted:
+        ArtifactStore().collect_garbage(referenced_digests(), grace=grace)
+
+    after = os.path.getsize(db_path(name)) if os.path.exists(db_path(name)) else 0
+
+    _logger.info(f'{name}: deleted {len(deleted)} runs, archived the logs of {len(archive)}, '
+                 f'store {size} -> {after} bytes')
+
+    return Report(deleted, sorted(archive), sorted(kept), size, after)
@@ -1,15 +1,25 @@
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
 from functools import partial
 from queue import Queue
 
-from bnb.dispatch.s3 import get_s3_info, safe_s3_sync
+from bnb.dispatch.s3 import fetch_artifacts, get_s3_info, safe_s3_sync
 from bnb.dispatch.workers import LocalWorker, SSHWorker
+from bnb.track.tracing import span
+from bnb.utils.metrics import REGISTRY
+
+_WORKERS     = REGISTRY.gauge('bnb_workers', 'Worker slots by state (idle or total)')
+_WORKER_WAIT = REGISTRY.histogram('bnb_worker_wait_seconds', 'Time a run waited for an idle worker',
+                                  buckets=(.001, .01, .1, 1., 10., 60., 300., 1800.))
+_FINALIZE    = REGISTRY.histogram('bnb_finalize_seconds', 'Post-processing (S3 sync) time of a finished run')
 
 
 class WorkerManager:
 
     def __init__(self, n_local=1, local_port=11111,
-                 remote_hosts=None, user=None, keyfile=None):
+                 remote_hosts=None, user=None, keyfile=None,
+                 slots_per_host=1, n_post=4):
 
         self.n_local      = n_local
         self.local_port   = local_port
@@ -17,9 +27,14 @@ class WorkerManager:
         self.remote_hosts = remote_hosts or []
         self.user         = user
         self.keyfile      = keyfile
+        self.slots_per_host = slots_per_host
+
+        self._workers   = set()
+        self._avail     = Queue()
+        self._cancelled = set()
 
-        self._workers = set()
-        self._avail   = Queue()
+        # S3 sync and DB finalization run here, off the rpyc serving threads
+        self._post    = ThreadPoolExecutor(max_workers=n_post)
 
         self._logger = logging.getLogger(
             f'{self.__class__.__name__}-{str(id(self))[:4]}')
@@ -27,12 +42,19 @@ class WorkerManager:
 
         self._create_with = {}
 
+        # per manager, and without referring to it: the registry must not keep it alive
+        workers, self._manager_label = self._workers, f'{id(self):x}'
+
+        _WORKERS.set_function(self._avail.qsize, state='idle', manager=self._manager_label)
+        _WORKERS.set_function(lambda: len(workers), state='total', manager=self._manager_label)
+
         self.start()
 
     def __del__(self):
         self._logger.debug('Destroying...')
 
-        self.stop()
+        # detached servers outlive a collected manager, for the next one to reattach
+        self.stop(shutdown=False)
 
     @staticmethod
     def get_or_create():
@@ -53,47 +75,101 @@ class WorkerManager:
             self._add_worker(LocalWorker, port=port)
 
         for i, h in enumerate(self.remote_hosts):
-            self._logger.debug(f'Starting worker no. {i} at {self.user}@{h}')
+            for slot in range(self.slots_per_host):
+                self._logger.debug(f'Starting worker no. {i} (slot={slot}) at {self.user}@{h}')
 
-            self._add_worker(SSHWorker, host=h, user=self.user, keyfile=self.keyfile)
+                self._add_worker(SSHWorker, host=h, user=self.user, keyfile=self.keyfile,
+                                 slot=slot)
 
         return self
 
     def _put(self, retval,
-             worker, db_entry, on_finished):
+             worker, db_entry, on_finished, record_span):
 
         self._logger.info(f'ID {db_entry["ID"]} returned: {retval}')
 
-        s3_info = get_s3_info(db_entry=db_entry)
+        # the slot has nothing in flight any more: a later connection loss must not report this run
+        with worker._tlock:
+            worker._forget()
 
-        (local_path,
-         s3_path) = s3_info
+        self._avail.put(worker)
+        self._post.submit(self._finalize, retval, db_entry, on_finished, record_span)
 
-        safe_s3_sync(s3_path, local_path)
+        return True
 
-        on_finished()
+    def _finalize(self, retval, db_entry, on_finished, record_span):
 
-        self._avail.put(worker)
+        t0 = time.time()
+
+        try:
+            with span('finalize', record_span):
+                s3_info = get_s3_info(db_entry=db_entry)
+
+                (local_path,
+                 s3_path) = s3_info
+
+                safe_s3_sync(s3_path, local_path)
+                fetch_artifacts(db_entry)
+
+        finally:
+            _FINALIZE.observe(time.time() - t0)
+            on_finished(retval)
 
     def dispatch(self, db_entry, task,
-                 upstream_update, on_finished):
+                 upstream_update, on_finished, record_span=None):
         self._logger.debug(f'Dispatch called for (task={id(task)})')
 
-        w = self._avail.get()  # type: SSHWorker
+        record_span = record_span or (lambda s: None)
+
+        t0 = time.time()
+
+        with span('wait_worker', record_span):
+            w = self._avail.get()  # type: SSHWorker
+
+        _WORKER_WAIT.observe(time.time() - t0)
+
+        if db_entry['ID'] in self._cancelled:
+            self._logger.info(f'ID {db_entry["ID"]} was cancelled before dispatch')
+
+            self._cancelled.discard(db_entry['ID'])
+            self._avail.put(w)
+            on_finished(None)
+
+            return
 
         _put = partial(self._put,
-                       worker=w, db_entry=db_entry, on_finished=on_finished)
+                       worker=w, db_entry=db_entry, on_finished=on_finished,
+                       record_span=record_span)
 
         self._logger.debug(f'Fetched available worker {w}')
 
         w.dispatch(callback=_put,
                    upstream_update=upstream_update, db_entry=db_entry,
-                   task=task)
+                   task=task, record_span=record_span)
 
         self._logger.debug('Dispatch done')
 
-    def stop(self):
+    def cancel(self, ID, state):
+        for w in list(self._workers):
+            if w.cancel(ID, state):
+                return True
+
+        return False
+
+    def cancel_pending(self, ID):
+        self._cancelled.add(ID)
+
+    def stop(self, shutdown=True):
+        """ Stops the workers and, unless `shutdown` is False (another manager
+        uses the same hosts), the servers deployed on remote hosts. Returns once
+        the runs that already completed are finalized """
+
         for w in self._workers:
             self._logger.debug(f'Stopping worker {w}')
 
-            w.stop()
+            w.stop(shutdown=shutdown)
+
+        for state in ('idle', 'total'):
+            _WORKERS.remove(state=state, manager=self._manager_label)
+
+        self._post.shutdown(wait=True)
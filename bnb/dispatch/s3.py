@@ -4,6 +4,7 @@ import subprocess
 import os
 
 from ..defaults import goc_storage_path
+from ..track.artifacts import ArtifactStore, pending, read_manifest
 
 
 def get_s3_info(db_entry):
@@ -21,7 +22,18 @@ def get_s3_info(db_entry):
     return src, dest
 
 
-def safe_s3_sync(src, dest, exclude=None):
+def _patterns(flag, patterns):
+    if patterns is None:
+        return []
+
+    if isinstance(patterns, str):
+        patterns = [patterns]
+
+    return [arg for p in patterns for arg in (flag, p)]
+
+
+def safe_s3_sync(src, dest, exclude=None, include=None):
+    """ `aws s3 sync`; `exclude` / `include` are a pattern or a list of them, applied in that order """
 
     me = subprocess.check_output(['whoami']).decode()
     logger = logging.getLogger(f'S3-Syncer @ {me}')
@@ -33,13 +45,12 @@ def safe_s3_sync(src, dest, exclude=None):
     try:
 
         py  = os.path.expanduser('~/anaconda3/bin/python')
-        cmd = f'{py} -m awscli s3 sync {src} {dest}'
-        if exclude is not None:
-            cmd += f' --exclude {exclude}'
+        cmd = [py, '-m', 'awscli', 's3', 'sync', src, dest]
+        cmd += _patterns('--exclude', exclude) + _patterns('--include', include)
 
-        logger.debug(f'Executing: {cmd}')
+        logger.debug(f'Executing: {" ".join(cmd)}')
 
-        proc = subprocess.Popen(cmd.split(), stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
 
         stdout, stderr = proc.communicate()
         stdout, stderr = stdout.decode(), stderr.decode()
@@ -59,4 +70,54 @@ def safe_s3_sync(src, dest, exclude=None):
         logger.error(f'Error inside safe_s3_sync: {str(e)}')
 
     except Exception as e:
-        logger.error(f'Unhandled exception inside safe_s3_sync: {str(e)}')
\ No newline at end of file
+        logger.error(f'Unhandled exception inside safe_s3_sync: {str(e)}')
+
+
+def artifacts_s3_path(bucket):
+    return f's3://{bucket}/artifacts'
+
+
+def _object_keys(digests):
+    return [f'{d[:2]}/{d}' for d in sorted(set(digests))]
+
+
+def storage_excludes(src):
+    """ The run's registered files: they are uploaded as store objects, so that the storage sync skips them """
+
+    if src is None:
+        return []
+
+    return sorted(set(read_manifest(src)) | set(pending(src)))
+
+
+def upload_artifacts(db_entry):
+    """ Uploads the store objects the run refers to. Objects never change, so each one is uploaded once """
+
+    src, _ = get_s3_info(db_entry)
+    if src is None:
+        return
+
+    digests = read_manifest(src).values()
+    if not digests:
+        return
+
+    store = ArtifactStore()
+    safe_s3_sync(store.root, artifacts_s3_path(db_entry['rich_id']['bucket']),
+                 exclude='*', include=_object_keys(digests))
+
+
+def fetch_artifacts(db_entry):
+    """ Restores the run's ingested files in the local storage, downloading the objects not stored locally """
+
+    local, _ = get_s3_info(db_entry)
+    if local is None:
+        return
+
+    store    = ArtifactStore()
+    manifest = read_manifest(local)
+    missing  = store.materialize(local, manifest)
+
+    if missing:
+        safe_s3_sync(artifacts_s3_path(db_entry['rich_id']['bucket']), store.root,
+                     exclude='*', include=_object_keys(missing))
+        store.materialize(local, manifest)
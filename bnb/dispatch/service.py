@@ -5,6 +5,8 @@ import sys
 import threading
 import time
 
+from collections import defaultdict
+
 import dill
 import rpyc
 from rpyc import AsyncResultTimeout
@@ -12,7 +14,9 @@ from multiprocessing import Process
 
 from bnb.defaults import prepare
 from . import s3
-from ..track import execution
+from .task import ServiceDead, TaskProcess
+from ..track.tracing import make_span, span
+from ..track.utils import States
 from ..utils import root_logger
 
 
@@ -25,24 +29,28 @@ class WorkerService(rpyc.VoidService):
         _ = root_logger.get_root_logger()
 
         self._name = f'{self.__class__.__name__}-{str(id(self))[:7]}'
-        self._stop = threading.Event()
-        self._run  = None
+
+        # A single connection multiplexes many task slots, each with
+        # its own runner thread, stop flag and background jobs
+        self._stop  = defaultdict(threading.Event)
+        self._runs  = {}
+        self._tasks = {}
 
         self._ping_thread = None
-        self._background  = []
+        self._background  = defaultdict(list)
 
         self._logger  = logging.getLogger(self._name)
         self._logger.debug(f'WorkerService {id(self)} started')
 
     def __del__(self):
 
-        self._stop.set()
-        for r in self._background:
-            r.join()
+        for slot in list(self._background):
+            self._stop_background(slot)
 
         self._logger.debug('Service destroyed')
 
-    def on_connect(self):
+    def on_connect(self, conn):
+        self._conn = conn
         self._ping_thread = threading.Thread(target=self._start_ping,
                                              args=(self._conn, ),
                                              daemon=True)
@@ -50,6 +58,16 @@ class WorkerService(rpyc.VoidService):
 
         self._logger.debug(f'New connection: {self._conn}')
 
+    def on_disconnect(self, conn):
+        """ The manager is gone (and has reported the runs DEAD): stop them, a reconnecting manager re-dispatches """
+
+        for slot, task in list(self._tasks.items()):
+            self._logger.warning(f'Connection closed, cancelling ID {task.ID} in slot {slot}')
+            task.cancel(state=States.DEAD, reason='Manager disconnected')
+
+        for slot in list(self._background):
+            self._stop_background(slot)
+
     def _start_ping(self, conn):
         self._logger.debug('Ping thread started')
 
@@ -86,45 +104,96 @@ class WorkerService(rpyc.VoidService):
 
         return db_entry, task
 
+    def _stop_background(self, slot):
+        self._stop[slot].set()
+        for t in self._background.pop(slot, []):
+            t.join()
+
     def _dispatch(self, callback, upstream_update,
-                  db_entry, f, args, kwargs):
+                  db_entry, f, args, kwargs, slot, spans):
 
         self._logger.debug(f'Service dispatching: {(f, args, kwargs)}')
 
-        ctx = execution.ExecutionContext(db_entry=db_entry, upstream_update=upstream_update)
-        ret = 'NA'
+        task = TaskProcess(db_entry=db_entry, f=f, args=args, kwargs=kwargs,
+                           upstream_update=rpyc.async_(upstream_update),
+                           **db_entry.get('limits', {}))
+        ret  = 'NA'
+
+        self._tasks[slot] = task
 
         try:
             # pid = os.getpid()
             # os.system(f'sudo renice -n -19 -p {pid}')
-            ret = ctx.run(f, args, kwargs)
+            with span('task_process', spans.append, slot=slot):
+                ret = task.run()
 
         except Exception as e:
             ret = e
-            self._logger.error(f'Uncaught exception from ExecutionContext.run(...): {e}')
+            self._logger.error(f'Uncaught exception from TaskProcess.run(): {e}')
 
         finally:
-            self._logger.debug('Stopping running background jobs')
+            self._logger.debug(f'Stopping running background jobs (slot={slot})')
+
+            self._stop_background(slot)
+
+            self._logger.debug('Service dispatch is now done, send completion')
 
-            self._stop.set()
-            for t in self._background:
-                t.join()
+            self._tasks.pop(slot, None)
+            self._runs.pop(slot, None)
+
+            self._send_trace(upstream_update, db_entry['ID'], spans)
+            self._complete(callback, ret, slot)
+
+    def _send_trace(self, upstream_update, ID, spans):
+        # One message for all worker-side spans of the run, sent ahead of the completion without waiting
+        try:
+            rpyc.async_(upstream_update)(ID, 'trace', value=dill.dumps(spans), mode='extend')
+        except EOFError:
+            self._logger.warning('Connection closed before the trace was sent')
 
-            self._logger.debug('Service dispatch is now done, invoke callback')
+    def exposed_cancel(self, ID, state=States.CANCELLED):
+        for slot, task in list(self._tasks.items()):
+            if task.ID == ID:
+                self._logger.info(f'Cancelling ID {ID} in slot {slot} ({state})')
+                return task.cancel(state=state, reason=f'Stopped by manager ({state})')
 
-            self._run = None
-            callback(ret)
+        return False
+
+    def _complete(self, callback, ret, slot):
+        """ Sends the result without waiting for the manager to post-process it.
+
+        The manager replies with an acknowledgement as soon as it has
+        queued the result, which is only logged here.
+        """
+
+        def _ack(res):
+            if res.error:
+                self._logger.error(f'Completion of slot {slot} was not acknowledged')
+            else:
+                self._logger.debug(f'Completion of slot {slot} acknowledged: {res.value}')
+
+        if isinstance(ret, ServiceDead):
+            ret = ServiceDead.MARKER
+
+        try:
+            res = rpyc.async_(callback)(ret)
+            res.add_callback(_ack)
+
+        except EOFError:
+            self._logger.warning(f'Connection closed before completion of slot {slot} was sent')
 
     def exposed_dispatch(self, callback, upstream_update,
                          db_entry, task,
-                         start_s3=False):
+                         start_s3=False, slot=0):
 
-        assert self._run is None, "Dispatch called multiple times"
+        assert slot not in self._runs, f"Dispatch called multiple times for slot {slot}"
 
         self._logger.debug(f'Service workdir: {os.getcwd()}')
-        self._stop.clear()
+        self._stop[slot].clear()
 
+        t0             = time.time()
         db_entry, task = self._unpickle(db_entry, task)
+        spans          = [make_span('unpickle', t0)]
 
         (ID,
          name) = (db_entry['ID'],
@@ -137,15 +206,15 @@ class WorkerService(rpyc.VoidService):
         prepare(ID=ID, name=name)
 
         if start_s3:
-            self.exposed_start_sync_worker(db_entry=db_entry)
+            self.exposed_start_sync_worker(db_entry=db_entry, slot=slot)
 
-        self._run = threading.Thread(target=self._dispatch,
-                                     args=(callback, upstream_update,
-                                           db_entry, f, args, kwargs),
-                                     daemon=True)
-        self._run.start()
+        self._runs[slot] = threading.Thread(target=self._dispatch,
+                                            args=(callback, upstream_update,
+                                                  db_entry, f, args, kwargs, slot, spans),
+                                            daemon=True)
+        self._runs[slot].start()
 
-    def exposed_start_sync_worker(self, db_entry, interval=30, exclude=None):
+    def exposed_start_sync_worker(self, db_entry, interval=30, exclude=None, slot=0):
         self._logger.debug(f's3 sync start requested. Starting for entry: {id(db_entry)}')
 
         (src,
@@ -155,17 +224,23 @@ class WorkerService(rpyc.VoidService):
             self._logger.debug('src or dst was None, not syncing to s3')
             return
 
+        stop = self._stop[slot]
+
         def _work(self):
 
             while True:
-                s3.safe_s3_sync(src, dst, exclude=exclude)
-                if self._stop.is_set():
+                excludes = ([exclude] if exclude is not None else []) + s3.storage_excludes(src)
+
+                s3.safe_s3_sync(src, dst, exclude=excludes)
+                s3.upload_artifacts(db_entry)
+
+                if stop.is_set():
                     self._logger.debug('Im done sycing, break')
                     break
 
-                time.sleep(interval)
+                stop.wait(interval)
 
         t = threading.Thread(target=_work, args=(self, ), daemon=True)
 
-        self._background.append(t)
+        self._background[slot].append(t)
         t.start()
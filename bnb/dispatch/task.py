@@ -0,0 +1,201 @@
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+
+import dill
+
+from ..track import execution
+from ..track.utils import States
+
+
+class ServiceDead:
+    """ Returned for runs whose service or task process died without a result """
+
+    # crosses rpyc as a plain string; instances would arrive as netrefs
+    MARKER = '<bnb: service dead>'
+
+    @classmethod
+    def from_wire(cls, ret):
+        return cls() if isinstance(ret, str) and ret == cls.MARKER else ret
+
+
+def _run_child(q, db_entry, f, args, kwargs):
+    ctx = execution.ExecutionContext(db_entry=db_entry, upstream_update=execution.QueueUpdate(q))
+    ret = 'NA'
+
+    try:
+        ret = ctx.run(f, args, kwargs)
+
+    except Exception as e:
+        ret = e
+
+    finally:
+        try:
+            ret = dill.dumps(ret)
+        except Exception:
+            ret = dill.dumps(repr(ret))
+
+        q.put(('done', ret))
+
+
+class TaskProcess:
+    """ Runs a single task in a forked process, so that it can be terminated.
+
+    Progress updates sent by the task's `ExecutionContext` are relayed to the
+    manager from the parent, which also enforces the wall-clock (`timeout`)
+    and idle (`idle_timeout`, no `log_scalar` for that many seconds) limits.
+    """
+
+    # fork rather than spawn / forkserver: those re-import the caller's `__main__`,
+    # which runs unguarded experiment scripts again in every child. Forking from
+    # the threaded server is safe for what the child uses: logging re-creates its
+    # locks after a fork, `DB_LOCK` cannot be held by another thread across one
+    # (see `bnb.defaults`), and the child only talks to the parent through its own
+    # queue, never through the rpyc connection of the serving threads.
+    _mp = multiprocessing.get_context('fork')
+
+    def __init__(self, db_entry, f, args, kwargs, upstream_update,
+                 timeout=None, idle_timeout=None, poll=1.0):
+
+        self.ID = db_entry['ID']
+
+        self._upstream_update = upstream_update
+        self._timeout         = timeout
+        self._idle_timeout    = idle_timeout
+        self._poll            = poll
+
+        self._q    = self._mp.Queue()
+        self._proc = self._mp.Process(target=_run_child,
+                                      args=(self._q, db_entry, f, args, kwargs),
+                                      daemon=True)
+
+        self._stopped_with = None
+        self._stop_lock    = threading.Lock()
+
+        self._logger = logging.getLogger(f'{self.__class__.__name__}@{self.ID[:5]}')
+
+    def _relay(self, msg):
+        _, ID, path, value, mode = msg
+
+        try:
+            self._upstream_update(ID, *path, value=value, mode=mode)
+        except EOFError:
+            self._logger.warning('Upstream closed, dropping update')
+
+    def _stopped(self):
+        with self._stop_lock:
+            return self._stopped_with
+
+    def _check_limits(self, t0, last_log):
+        now = time.time()
+
+        if (self._timeout is not None) and (now - t0 > self._timeout):
+            self.cancel(States.TIMEOUT, f'Exceeded timeout of {self._timeout}s')
+
+        elif (self._idle_timeout is not None) and (now - last_log > self._idle_timeout):
+            self.cancel(States.TIMEOUT, f'No log_scalar for {self._idle_timeout}s')
+
+    def _handle(self, msg):
+        """ Relays an update of the child. Returns whether it was activity (a `log_scalar`) """
+
+        if msg[0] == 'heartbeat':
+            return True
+
+        self._relay(msg)
+
+        return msg[2][0] == 'logs'
+
+    def _drain(self):
+        """ Messages the child sent right before exiting, still in the pipe after it is gone """
+
+        while True:
+            try:
+                yield self._q.get_nowait()
+            except queue.Empty:
+                return
+
+    def run(self):
+        t0 = last_log = time.time()
+        done = None
+
+        self._proc.start()
+        self._logger.debug(f'Task process started (pid={self._proc.pid})')
+
+        while done is None:
+            try:
+                msg = self._q.get(timeout=self._poll)
+
+            except queue.Empty:
+                if not self._proc.is_alive():
+                    break
+
+            else:
+                if msg[0] == 'done':
+                    done = msg
+                elif self._handle(msg):
+                    last_log = time.time()
+
+            if self._stopped() is None:
+                self._check_limits(t0, last_log)
+
+        self._proc.join()
+
+        for msg in self._drain():
+            if msg[0] == 'done':
+                done = msg
+            else:
+                self._handle(msg)
+
+        # a result that made it out wins over a stop requested while it was sent
+        if done is not None:
+            return dill.loads(done[1])
+
+        if self._stopped() is not None:
+            return self._report_stopped(t0)
+
+        return self._report_dead(t0)
+
+    def _report_stopped(self, t0):
+        state, reason = self._stopped()
+        self._logger.warning(f'Task stopped with {state}: {reason}')
+
+        for path, value in [(('misc', 'error'), reason),
+                            (('timing', ), {'start': t0, 'stop': time.time()}),
+                            (('status', ), state)]:
+            self._relay(('update', self.ID, path, dill.dumps(value), 'replace'))
+
+        return state
+
+    def _report_dead(self, t0):
+        """ The child exited without a result (segfault, OOM kill, `os._exit`) """
+
+        reason = f'Task process exited with code {self._proc.exitcode} before finishing'
+        self._logger.error(reason)
+
+        args, kwargs = execution.ExecutionManager.critical_upadte()
+
+        for path, value in [(('misc', 'error'), reason),
+                            (('timing', ), {'start': t0, 'stop': time.time()}),
+                            (args, kwargs['value'])]:
+            self._relay(('update', self.ID, path, dill.dumps(value), 'replace'))
+
+        return ServiceDead()
+
+    def cancel(self, state=States.CANCELLED, reason='Cancelled'):
+        """ Terminates the child. Called from the monitoring loop (limits) and from rpyc threads """
+
+        with self._stop_lock:
+            if (self._stopped_with is not None) or (not self._proc.is_alive()):
+                return False
+
+            self._stopped_with = (state, reason)
+
+        self._proc.terminate()
+        self._proc.join(5)
+
+        if self._proc.is_alive():
+            self._proc.kill()
+
+        return True
@@ -10,20 +10,19 @@ import rpyc
 from rpyc.utils.server import ThreadedServer
 
 from .service import WorkerService
+from .task import ServiceDead
 from ..remote.deploy import DeployedServer
-
-
-class ServiceDead:
-    pass
+from ..track.tracing import span
 
 
 class Worker:
 
     ConnType = namedtuple('ConnType', ('conn', 'bgsrv'))
 
-    def __init__(self, use_s3):
+    def __init__(self, use_s3, slot=0, watch=True):
 
         self.main     = None  # type: self.ConnType
+        self.slot     = slot
         self._logger  = None  # type: logging.Logger
         self._use_s3  = use_s3
 
@@ -33,10 +32,13 @@ class Worker:
         self._last_callback = None
 
         self._should_stop = threading.Event()
-        self._tlock       = threading.Lock()
+        self._tlock       = threading.RLock()
+
+        self._watcher = None
 
-        self._watcher = threading.Thread(target=self._perhaps_restart, daemon=True)
-        self._watcher.start()
+        if watch:
+            self._watcher = threading.Thread(target=self._perhaps_restart, daemon=True)
+            self._watcher.start()
 
     def __del__(self):
         self.stop()
@@ -53,24 +55,29 @@ class Worker:
             with self._tlock:
                 if (self.main is not None) and (self.main.conn._closed):
 
-                    self._logger.error('Closed connection detected!')
-
-                    from bnb import ExecutionManager
-                    args, kwargs = ExecutionManager.critical_upadte()
-
-                    if self._last_update is not None:
-                        self._last_update(self._last_ID, *args, **kwargs)
-                        self._last_callback(ServiceDead())
+                    self._report_dead()
 
                     self.stop()
                     self.start()
 
             time.sleep(10)
 
+    def _report_dead(self):
+        self._logger.error('Closed connection detected!')
+
+        from bnb import ExecutionManager
+        args, kwargs = ExecutionManager.critical_upadte()
+
+        if self._last_update is not None:
+            self._last_update(self._last_ID, *args, **kwargs)
+            self._last_callback(ServiceDead())
+
+        self._forget()
+
     def start(self):
         self._should_stop.clear()
 
-    def stop_main(self):
+    def stop_main(self, shutdown=False):
 
         if self.main is not None:
 
@@ -85,7 +92,7 @@ class Worker:
     def root(self):
         return self.main.conn.root
 
-    def dispatch(self, callback, upstream_update, db_entry, task):
+    def dispatch(self, callback, upstream_update, db_entry, task, record_span=None):
         """ Dispatches a received task to a (possibly remote) service
 
         Parameters
@@ -99,8 +106,12 @@ class Worker:
             database entry associated with this run
         task : bytes
             serialized object to execute
+        record_span : Callable, optional
+            receives the tracing spans of the dispatch itself
         """
 
+        record_span = record_span or (lambda s: None)
+
         with self._tlock:
 
             self._last_ID       = db_entry['ID']
@@ -110,23 +121,45 @@ class Worker:
 
             self._logger.debug(f'Dispatching task: {id(task)}')
 
-            (db_entry,
-             task) = (dill.dumps(db_entry),
-                      dill.dumps(task))
+            with span('serialize', record_span):
+                (db_entry,
+                 task) = (dill.dumps(db_entry),
+                          dill.dumps(task))
 
-            self.root.exposed_dispatch(callback=callback, upstream_update=upstream_update,
-                                       db_entry=db_entry, task=task, start_s3=self._use_s3)
+            def _callback(ret):
+                return callback(ServiceDead.from_wire(ret))
+
+            with span('rpc_dispatch', record_span, slot=self.slot):
+                self.root.exposed_dispatch(callback=_callback, upstream_update=upstream_update,
+                                           db_entry=db_entry, task=task, start_s3=self._use_s3,
+                                           slot=self.slot)
 
             self._logger.debug('Worker dispatch done')
 
-    def stop(self):
+    def cancel(self, ID, state):
+        """ Terminates the task `ID` if it is running on this worker
+
+        Returns
+        -------
+        bool
+            whether the task was found and stopped
+        """
+
+        with self._tlock:
+            if (self._last_ID != ID) or (self.main is None):
+                return False
+
+        return self.root.exposed_cancel(ID, state=state)
+
+    def stop(self, shutdown=False):
+        """ Closes the connection, and with `shutdown` also stops the server behind it """
 
         self._logger.debug('Stopping')
 
         self._should_stop.set()
         self._forget()
 
-        self.stop_main()
+        self.stop_main(shutdown=shutdown)
 
 
 class LocalWorker(Worker):
@@ -153,8 +186,8 @@ class LocalWorker(Worker):
 
         return self
 
-    def stop(self):
-        super().stop()
+    def stop(self, shutdown=False):
+        super().stop(shutdown=shutdown)
 
         if self._server is not None:
             self._server.terminate()
@@ -203,41 +236,157 @@ class LocalWorker(Worker):
         raise ConnectionRefusedError
 
 
-class SSHWorker(Worker):
+class HostConnection:
+    """ A single deployed server and rpyc channel to a remote host.
 
-    def __init__(self, host, user, keyfile):
-        super().__init__(True)
+    Every `SSHWorker` slot on the host dispatches over this connection, so
+    the SSH tunnel, serving thread, ping thread and liveness watcher exist
+    once per host instead of once per slot.
+    """
 
-        self._logger = logging.getLogger(f'{self.__class__.__name__}-{host}')
-        self._logger.debug(f'Starting aws worker for {user}@{host}')
+    _hosts = {}
+    _lock  = threading.Lock()
+
+    def __init__(self, host, user, keyfile):
 
         self.host = host
         self.user = user
         self.key  = keyfile
 
-        self._server = None  # type: DeployedServer
+        self.main     = None  # type: Worker.ConnType
+        self._server  = None  # type: DeployedServer
+        self._workers = set()
+
+        self._should_stop = threading.Event()
+        self._watcher     = None
+
+        self._logger = logging.getLogger(f'{self.__class__.__name__}-{host}')
+
+    @classmethod
+    def acquire(cls, worker, host, user, keyfile):
+        with cls._lock:
+            key  = (host, user, keyfile)
+            conn = cls._hosts.get(key)
+
+            if conn is None:
+                conn = cls._hosts[key] = cls(host, user, keyfile).start()
+
+            conn._workers.add(worker)
+
+        return conn
+
+    def release(self, worker, shutdown=False):
+        with self._lock:
+            self._workers.discard(worker)
+
+            if len(self._workers) > 0:
+                return
+
+            self._hosts.pop((self.host, self.user, self.key), None)
+
+        self.stop(shutdown=shutdown)
 
     def start(self):
-        super().start()
+        self._should_stop.clear()
 
         self._server = DeployedServer(self.host, self.user, self.key)
         self._logger.debug(f'Server deployed for {self.user}@{self.host}')
 
         self.main = self._connect(self._server)
 
-        self._logger.info(f'SSH worker {self} should be available')
+        if self._watcher is None:
+            self._watcher = threading.Thread(target=self._perhaps_restart, daemon=True)
+            self._watcher.start()
 
         return self
 
-    def stop(self):
-        super().stop()
-
-        self._server.close()
-
     def _connect(self, server):
         conn  = server.connect(service=rpyc.VoidService)
         bgsrv = rpyc.BgServingThread(conn)
 
         conn.ping(timeout=15)
 
-        return self.ConnType(conn, bgsrv)
+        return Worker.ConnType(conn, bgsrv)
+
+    def _perhaps_restart(self):
+        while not self._should_stop.is_set():
+
+            if (self.main is not None) and (self.main.conn._closed):
+                busy = [w for w in list(self._workers) if w._last_ID is not None]
+                self._logger.error(f'Connection lost, {len(busy)} of {len(self._workers)} slots had a run')
+
+                for w in busy:
+                    with w._tlock:
+                        # the run may have completed while waiting for the lock
+                        if w._last_ID is not None:
+                            w._report_dead()
+
+                self.stop_main()
+
+                try:
+                    self.start()
+                except Exception as e:
+                    self._logger.error(f'Reconnect failed: {e}')
+
+            self._should_stop.wait(10)
+
+    def stop_main(self, shutdown=False):
+
+        if self.main is not None:
+
+            try:
+                self.main.conn.close()
+                self.main.bgsrv.stop()
+
+            except Exception as e:
+                self._logger.error(f"Exception while stopping: {e}")
+
+        if self._server is not None:
+            if shutdown:
+                self._server.shutdown()
+            else:
+                self._server.close()
+
+    def stop(self, shutdown=False):
+        self._logger.debug('Stopping')
+
+        self._should_stop.set()
+        self.stop_main(shutdown=shutdown)
+
+
+class SSHWorker(Worker):
+
+    def __init__(self, host, user, keyfile, slot=0):
+        super().__init__(True, slot=slot, watch=False)
+
+        self._logger = logging.getLogger(f'{self.__class__.__name__}-{host}-{slot}')
+        self._logger.debug(f'Starting aws worker for {user}@{host} (slot={slot})')
+
+        self.host = host
+        self.user = user
+        self.key  = keyfile
+
+        self._host = None  # type: HostConnection
+
+    def start(self):
+        super().start()
+
+        self._host = HostConnection.acquire(self, self.host, self.user, self.key)
+
+        self._logger.info(f'SSH worker {self} should be available')
+
+        return self
+
+    @property
+    def main(self):
+        return None if (self._host is None) else self._host.main
+
+    @main.setter
+    def main(self, value):
+        pass
+
+    def stop_main(self, shutdown=False):
+
+        if self._host is not None:
+            self._host.release(self, shutdown=shutdown)
+            self._host = None
@@ -1,57 +1,248 @@
+import functools
+import hashlib
+import json
 import logging
+import os
+import threading
+import time
+from collections import defaultdict
 
-import rpyc
-from paramiko.client import AutoAddPolicy
-from plumbum import ProcessExecutionError
-from plumbum.machines.paramiko_machine import ParamikoMachine
-from rpyc.core.service import VoidService
-from rpyc.core.stream import SocketStream
-from rpyc.lib.compat import BYTES_LITERAL
+from ..defaults import server_state_path
 
-import signal
+logger = logging.getLogger(__name__)
 
+# (host, user, keyfile) -> ParamikoMachine, shared by every DeployedServer
+# talking to the same host, so that restarts reuse the SSH session
+_MACHINES       = {}
+_MACHINES_LOCK  = threading.Lock()
+_MACHINE_LOCKS  = defaultdict(threading.Lock)
 
-def timeout(signum, frame):
-    raise TimeoutError()
 
+def _call_with_timeout(f, timeout, *args, cleanup=None, **kwargs):
+    """ Runs `f` in a helper thread and gives up after `timeout` seconds.
 
-signal.signal(signal.SIGALRM, timeout)
-logger = logging.getLogger(__name__)
+    Unlike `signal.alarm` this works from any thread. A call that timed out is
+    left running in a daemon thread and will be stopped by paramiko's own timeouts;
+    if it returns after all, `cleanup` is called with what nobody is waiting for.
+    """
+
+    result = {}
+    lock   = threading.Lock()
+
+    def _target():
+        try:
+            value = f(*args, **kwargs)
+        except BaseException as e:
+            result['error'] = e
+            return
+
+        with lock:
+            abandoned = result.get('abandoned', False)
+            if not abandoned:
+                result['value'] = value
+
+        if abandoned and (cleanup is not None):
+            cleanup(value)
+
+    t = threading.Thread(target=_target, daemon=True)
+    t.start()
+    t.join(timeout)
+
+    with lock:
+        if 'value' not in result and 'error' not in result:
+            result['abandoned'] = True
+
+    if result.get('abandoned'):
+        raise TimeoutError(f'{f} did not return in {timeout}s')
+
+    if 'error' in result:
+        raise result['error']
 
+    return result['value']
+
+
+@functools.lru_cache(maxsize=None)
+def code_version():
+    """ Digest of the installed bnb sources, recorded by detached servers so that
+    managers do not reattach to a server still running code from before an upgrade """
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    h    = hashlib.sha256()
+
+    for d, dirs, names in sorted(os.walk(root)):
+        dirs.sort()
+
+        for name in sorted(names):
+            if not name.endswith('.py'):
+                continue
+
+            path = os.path.join(d, name)
+            h.update(os.path.relpath(path, root).encode())
+
+            with open(path, 'rb') as f:
+                h.update(f.read())
+
+    return h.hexdigest()[:16]
+
+
+def _is_alive(machine, timeout=5):
+    """ One SFTP round trip (the channel reads of `machine.path` use anyway) """
 
-def _get_machine(host, user, keyfile):
     try:
-        for i in range(10):
-            logger.debug(f'Connection attempt no: {i}')
+        _call_with_timeout(machine.sftp.stat, timeout, '.')
+        return True
+
+    except Exception:
+        return False
 
-            try:
-                signal.alarm(15)
-                ret = ParamikoMachine(host=host, user=user, keyfile=keyfile,
-                                      connect_timeout=15, keep_alive=30, missing_host_policy=AutoAddPolicy())
-                signal.alarm(0)
 
-            except TimeoutError:
-                pass
+def _get_machine(host, user, keyfile, timeout=15, attempts=10):
+    from paramiko.client import AutoAddPolicy
+    from plumbum.machines.paramiko_machine import ParamikoMachine
 
-            else:
-                return ret
+    for i in range(attempts):
+        logger.debug(f'Connection attempt no: {i}')
 
-        else:
-            raise RuntimeError('Connection could not be established')
-    finally:
-        signal.alarm(0)
+        try:
+            return _call_with_timeout(ParamikoMachine, timeout,
+                                      host=host, user=user, keyfile=keyfile,
+                                      connect_timeout=timeout, keep_alive=30,
+                                      missing_host_policy=AutoAddPolicy(),
+                                      cleanup=_safe_close)
+
+        except TimeoutError:
+            pass
+
+    raise RuntimeError('Connection could not be established')
+
+
+def get_machine(host, user, keyfile):
+    """ Returns a cached, alive `ParamikoMachine` for (host, user, keyfile),
+    reconnecting only if the previous session went down. """
+
+    key = (host, user, keyfile)
+
+    with _MACHINES_LOCK:
+        lock = _MACHINE_LOCKS[key]
+
+    with lock:
+        machine = _MACHINES.get(key)
+
+        if (machine is not None) and _is_alive(machine):
+            logger.debug(f'Reusing connection to {user}@{host}')
+            return machine
+
+        if machine is not None:
+            logger.info(f'Connection to {user}@{host} went down, reconnecting')
+            _safe_close(machine)
+
+        machine = _get_machine(host, user, keyfile)
+        _MACHINES[key] = machine
+
+        return machine
+
+
+def drop_machine(host, user, keyfile):
+    with _MACHINES_LOCK:
+        machine = _MACHINES.pop((host, user, keyfile), None)
+
+    if machine is not None:
+        _safe_close(machine)
+
+
+def close_machines():
+    with _MACHINES_LOCK:
+        keys = list(_MACHINES)
+
+    for key in keys:
+        drop_machine(*key)
+
+
+def _safe_close(machine):
+    try:
+        machine.close()
+
+    except Exception as e:
+        logger.debug(f'Exception while closing machine: {e}')
 
 
 class DeployedServer:
     def __init__(self, host, user, keyfile,
-                 python_executable='~/anaconda3/bin/python'):
+                 python_executable='~/anaconda3/bin/python',
+                 reattach=True):
+
+        t0 = time.time()
+
+        self.host = host
+        self.user = user
+        self.key  = keyfile
+
+        self.remote_machine = get_machine(host, user, keyfile)
+        t1 = time.time()
+
+        self.py          = self.remote_machine[python_executable]
+        self.proc        = None
+        self.remote_pid  = None
+        self.remote_port = None
+        self.local_port  = None
+
+        if reattach:
+            self._reattach()
+
+        if self.remote_port is None:
+            self._launch()
+
+        t2 = time.time()
+
+        self.latency = dict(connect=t1 - t0, deploy=t2 - t1, total=t2 - t0)
+        logger.info(f'Server at {user}@{host}:{self.remote_port} ready, latency: {self.latency}')
+
+    def __del__(self):
+        self.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, t, v, tb):
+        self.close()
+
+    @property
+    def _state_path(self):
+        return server_state_path(home=self.remote_machine.env['HOME'])
+
+    def _reattach(self):
+        """ Picks up a server started by a previous `DeployedServer`, if it still runs """
+
+        try:
+            state = self.remote_machine.path(self._state_path)
+            if not state.exists():
+                return
+
+            state   = json.loads(state.read())
+            cmdline = self.remote_machine.path(f'/proc/{state["pid"]}/cmdline')
+
+            if not (cmdline.exists() and ('bnb.remote.server' in cmdline.read())):
+                return
 
-        self.remote_machine = _get_machine(host, user, keyfile)
-        self._kill_py()
-        self.py = self.remote_machine[python_executable]
+            # it may still serve a manager on that code: it is left to its owner to stop
+            if state.get('version') != code_version():
+                logger.info(f'Server (pid={state["pid"]}) runs other bnb code '
+                            f'({state.get("version")} != {code_version()}), launching a new one')
+                return
 
-        self.proc = self.py.popen(['-m', 'bnb.remote.server'], new_session=True)
-        self.local_port = None
+            self.remote_pid  = state['pid']
+            self.remote_port = state['port']
+
+            logger.debug(f'Reattached to server (pid={self.remote_pid}, port={self.remote_port})')
+
+        except Exception as e:
+            logger.debug(f'Could not reattach: {e}')
+
+    def _launch(self):
+        from plumbum import ProcessExecutionError
+        from rpyc.lib.compat import BYTES_LITERAL
+
+        self.proc = self.py.popen(['-m', 'bnb.remote.server', '--detach'], new_session=True)
 
         line = ""
         try:
@@ -60,6 +251,9 @@ class DeployedServer:
             line = self.proc.stdout.readline()
             self.remote_port = int(line.strip())
 
+            line = self.proc.stdout.readline()
+            self.remote_pid = int(line.strip())
+
         except Exception:
             stdout, stderr = self.proc.communicate()
             self.close()
@@ -67,32 +261,36 @@ class DeployedServer:
             raise ProcessExecutionError(
                 self.proc.argv, self.proc.returncode, BYTES_LITERAL(line) + stdout, stderr)
 
-    def __del__(self):
-        self.close()
+    def close(self):
+        """ Releases this handle. The remote server and the SSH session are kept for reuse. """
 
-    def __enter__(self):
-        return self
+        self.remote_machine = None
 
-    def __exit__(self, t, v, tb):
-        self.close()
+    def shutdown(self):
+        """ Stops the remote server this handle launched or reattached to and closes the session """
+
+        if self.remote_machine is None:
+            return
 
-    def _kill_py(self):
         try:
-            killall = self.remote_machine['/usr/bin/killall']
-            killall.run(['python'])
-            killall.run(['python'])
+            if self.remote_pid is not None:
+                self.remote_machine['kill'].run([str(self.remote_pid)], retcode=None)
 
         except Exception as e:
-            logger.debug(f'Exception while killing py: {e}')
+            logger.debug(f'Exception while stopping server: {e}')
 
-    def close(self):
-        self._kill_py()
-        self.remote_machine.close()
+        drop_machine(self.host, self.user, self.key)
+        self.close()
 
-    def connect(self, service=VoidService, config=None):
+    def connect(self, service=None, config=None):
         """Same as :func:`connect <rpyc.utils.factory.connect>`, but with the ``host`` and ``port``
         parameters fixed"""
-        config = config or {}
+        import rpyc
+        from rpyc.core.service import VoidService
+        from rpyc.core.stream import SocketStream
+
+        service = service or VoidService
+        config  = config or {}
 
         stream = SocketStream(self.remote_machine.connect_sock(self.remote_port))
         return rpyc.connect_stream(stream, service=service, config=config)
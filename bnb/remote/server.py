@@ -1,3 +1,5 @@
+import argparse
+import json
 import signal
 import sys
 import os
@@ -5,18 +7,49 @@ from threading import Thread
 
 from rpyc.utils.server import ThreadedServer
 
+from bnb.defaults import server_state_path
 from bnb.dispatch.service import WorkerService
-
+from bnb.remote.deploy import code_version
 
 
 def timeout(signum, frame):
     raise TimeoutError()
-    
 
-signal.signal(signal.SIGALRM, timeout)
+
+def _write_state(port):
+    path = server_state_path()
+    os.makedirs(os.path.dirname(path), mode=0o775, exist_ok=True)
+
+    with open(path, 'w') as f:
+        json.dump({'pid': os.getpid(), 'port': port, 'version': code_version()}, f)
+
+
+def _remove_state():
+    path = server_state_path()
+
+    try:
+        with open(path) as f:
+            if json.load(f)['pid'] != os.getpid():
+                return
+
+        os.remove(path)
+
+    except (OSError, ValueError, KeyError):
+        pass
 
 
 def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--detach', action='store_true',
+                        help='keep serving after stdin is closed, so that managers can reattach')
+    args = parser.parse_args()
+
+    signal.signal(signal.SIGALRM, timeout)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+    if args.detach:
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+
     os.chdir('/tmp/')
 
     t   = ThreadedServer(WorkerService, hostname="localhost", port=0, reuse_addr=True)
@@ -24,12 +57,21 @@ def main():
     thd.daemon = True
     thd.start()
 
-    sys.stdout.write("%s\n" % (t.port,))
+    if args.detach:
+        _write_state(t.port)
+
+    sys.stdout.write("%s\n%s\n" % (t.port, os.getpid()))
     sys.stdout.flush()
 
     try:
-        sys.stdin.read()
+        if args.detach:
+            thd.join()
+        else:
+            sys.stdin.read()
     finally:
+        if args.detach:
+            _remove_state()
+
         t.close()
         thd.join()
 
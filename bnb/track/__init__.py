@@ -1,9 +1,19 @@
-from .context import set_current_context, get_current_context
-from .experiment import Experiment
-from .execution import ExecutionManager
+from .context import set_current_context, get_current_context, reset_current_context
+from .schedulers import ASHA, MedianStopping
+from ..utils.lazy import lazy_getattr
 
 __all__ = [
-    'set_current_context', 'get_current_context',
+    'set_current_context', 'get_current_context', 'reset_current_context',
     'Experiment',
-    'ExecutionManager'
-]
\ No newline at end of file
+    'ExecutionManager',
+    'ASHA', 'MedianStopping'
+]
+
+__getattr__ = lazy_getattr(__name__, attrs={
+    'Experiment':       ('.experiment', 'Experiment'),
+    'ExecutionManager': ('.execution', 'ExecutionManager'),
+})
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,52 @@
+import asyncio
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+
+
+class BackgroundFlusher:
+    """ Applies tracking calls on a helper thread, in submission order.
+
+    `submit` never blocks, so coroutines can record progress without
+    waiting on the entry backup or the connection to the manager.
+    """
+
+    def __init__(self):
+        self._queue  = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._work, daemon=True)
+        self._thread.start()
+
+        self._logger = logging.getLogger(self.__class__.__name__)
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+
+            if item is None:
+                break
+
+            fn, args, kwargs = item
+
+            try:
+                fn(*args, **kwargs)
+            except Exception as e:
+                self._logger.error(f'{getattr(fn, "__name__", fn)} failed: {e}')
+
+    def submit(self, fn, *args, **kwargs):
+        self._queue.put((fn, args, kwargs))
+
+    def flush(self):
+        """ Returns a future resolved once everything submitted so far was applied """
+
+        done = Future()
+        self._queue.put((done.set_result, (None, ), {}))
+
+        return done
+
+    async def aflush(self):
+        await asyncio.wrap_future(self.flush())
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
@@ -0,0 +1,170 @@
+""" Histogram and array logs, stored next to the run instead of in its entry.
+
+Every tag has two append-only files in the run's storage:
+
+    <tag>.bin    zlib-compressed records, back to back
+    <tag>.index  one JSON line per record: step, byte range in `.bin`,
+                 dtype and shape of each array, and small per-record stats
+
+Readers parse the index only and decompress a record when it is accessed.
+numpy is imported on first use, so that contexts which never log arrays do
+not need it.
+"""
+
+import json
+import os
+import time
+import zlib
+from urllib.parse import quote, unquote
+
+_LEVEL = 3
+
+
+def _data_file(directory, tag):
+    return os.path.join(directory, f'{quote(tag, safe="")}.bin')
+
+
+def _index_file(directory, tag):
+    return os.path.join(directory, f'{quote(tag, safe="")}.index')
+
+
+def histogram(values, bins=64, range=None):
+    """ Counts and bin edges of `values`, plus exact stats of the (finite) values """
+
+    import numpy as np
+
+    values = np.asarray(values, dtype=float).ravel()
+    values = values[np.isfinite(values)]
+
+    counts, edges = np.histogram(values, bins=bins, range=range)
+
+    stats = dict(count=int(values.size),
+                 min=float(values.min()) if values.size else None,
+                 max=float(values.max()) if values.size else None,
+                 sum=float(values.sum()),
+                 sum_sq=float(np.dot(values, values)))
+
+    return dict(counts=counts, edges=edges), stats
+
+
+class ArrayWriter:
+    """ Appends records (a few named arrays each) to the per-tag files under `directory` """
+
+    def __init__(self, directory, level=_LEVEL):
+        self.directory = directory
+        self.level     = level
+
+        self._files = {}
+
+        os.makedirs(directory, mode=0o775, exist_ok=True)
+
+    def _open(self, tag):
+        if tag not in self._files:
+            data  = open(_data_file(self.directory, tag), 'ab')
+            index = open(_index_file(self.directory, tag), 'a')
+
+            self._files[tag] = (data, index)
+
+        return self._files[tag]
+
+    def add(self, tag, step, kind, arrays, stats=None):
+        import numpy as np
+
+        data, index = self._open(tag)
+
+        arrays  = {k: np.ascontiguousarray(v) for k, v in arrays.items()}
+        payload = zlib.compress(b''.join(a.tobytes() for a in arrays.values()), self.level)
+        offset  = data.tell()
+
+        data.write(payload)
+
+        record = dict(step=step, time=time.time(), kind=kind, offset=offset, length=len(payload),
+                      arrays=[[k, a.dtype.str, list(a.shape)] for k, a in arrays.items()])
+        if stats:
+            record['stats'] = stats
+
+        index.write(json.dumps(record) + '\n')
+
+    def flush(self):
+        for data, index in self._files.values():
+            data.flush()
+            index.flush()
+
+    def close(self):
+        for data, index in self._files.values():
+            data.close()
+            index.close()
+
+        self._files.clear()
+
+
+class ArrayLog:
+    """ The records of one tag. Only the index is read up front; records are decompressed on access """
+
+    def __init__(self, directory, tag):
+        self.directory = directory
+        self.tag       = tag
+
+        with open(_index_file(directory, tag)) as f:
+            # a record whose line was cut short by a crash is ignored
+            self.index = [json.loads(line) for line in f if line.endswith('\n')]
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}(tag={self.tag}, records={len(self)})'
+
+    def __len__(self):
+        return len(self.index)
+
+    @property
+    def steps(self):
+        import numpy as np
+
+        return np.array([r['step'] for r in self.index])
+
+    @property
+    def stats(self):
+        """ Per-record stats of histograms (count, min, max, sum, sum_sq) """
+        return [r.get('stats') for r in self.index]
+
+    def __getitem__(self, i):
+        """ The `i`-th record as a dict of arrays (a single array for `log_array` records) """
+
+        import numpy as np
+
+        record = self.index[i]
+
+        with open(_data_file(self.directory, self.tag), 'rb') as f:
+            f.seek(record['offset'])
+            raw = zlib.decompress(f.read(record['length']))
+
+        arrays, offset = {}, 0
+        for name, dtype, shape in record['arrays']:
+            dtype  = np.dtype(dtype)
+            size   = dtype.itemsize * int(np.prod(shape, dtype=int))
+            arrays[name] = np.frombuffer(raw, dtype=dtype, count=size // dtype.itemsize,
+                                         offset=offset).reshape(shape)
+            offset += size
+
+        return arrays['value'] if record['kind'] == 'array' else arrays
+
+    def at(self, step):
+        """ The last record logged at `step` """
+
+        for i in reversed(range(len(self.index))):
+            if self.index[i]['step'] == step:
+                return self[i]
+
+        raise KeyError(step)
+
+    def stack(self):
+        """ (steps, values): all `log_array` records stacked along a new first axis (they must share a shape) """
+        import numpy as np
+
+        return self.steps, np.stack([self[i] for i in range(len(self))])
+
+
+def tags(directory):
+    if not directory or not os.path.isdir(directory):
+        return []
+
+    return sorted(unquote(name[:-len('.index')]) for name in os.listdir(directory) if name.endswith('.index'))
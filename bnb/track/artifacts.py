@@ -0,0 +1,274 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+
+from ..defaults import get_root
+
+_ARTIFACTS = 'artifacts'
+_MANIFEST  = 'artifacts.json'
+_PENDING   = 'artifacts.pending'
+_CHUNK     = 2 ** 20
+
+# ioctl(2) request cloning a whole file on Btrfs / XFS (linux/fs.h)
+_FICLONE   = 0x40049409
+
+
+def file_digest(path):
+    h = hashlib.sha256()
+
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_CHUNK), b''):
+            h.update(chunk)
+
+    return h.hexdigest()
+
+
+def _reflink(src, dst):
+    """ Copy-on-write clone of `src`, False where the platform or file system cannot do it """
+
+    try:
+        import fcntl
+    except ImportError:
+        return False
+
+    try:
+        with open(src, 'rb') as s, open(dst, 'wb') as d:
+            fcntl.ioctl(d.fileno(), _FICLONE, s.fileno())
+        return True
+
+    except OSError:
+        if os.path.exists(dst):
+            os.remove(dst)
+        return False
+
+
+def _copy(src, dst):
+    """ A copy sharing no inode with `src`, on copy-on-write extents where possible """
+
+    if not _reflink(src, dst):
+        shutil.copyfile(src, dst)
+
+
+def read_manifest(storage):
+    """ `{path relative to storage: digest}` of the run's ingested files """
+
+    try:
+        with open(os.path.join(storage, _MANIFEST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_manifest(storage, manifest):
+    path = os.path.join(storage, _MANIFEST)
+    tmp  = f'{path}.{uuid.uuid4().hex}.tmp'
+
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+
+    os.replace(tmp, path)
+
+
+def register(storage, path):
+    """ Notes a registered file (or directory) of the run, to be ingested when it finishes.
+
+    Until then it is listed in the storage's pending file, so that the periodic
+    storage sync does not upload a copy of what will be uploaded as an object.
+    """
+
+    storage, path = os.path.realpath(storage), os.path.realpath(path)
+    if os.path.commonpath([storage, path]) != storage:
+        return
+
+    rel = os.path.relpath(path, storage)
+    with open(os.path.join(storage, _PENDING), 'a') as f:
+        f.write((rel + '/*' if os.path.isdir(path) else rel) + '\n')
+
+
+def pending(storage):
+    """ Sync exclude patterns of the files registered so far """
+
+    try:
+        with open(os.path.join(storage, _PENDING)) as f:
+            return sorted({line.rstrip('\n') for line in f if line.strip()})
+    except OSError:
+        return []
+
+
+def unshare(path):
+    """ Gives `path` its own inode when it is linked to a store object (as stores did), so writing to it cannot alter the object """
+
+    try:
+        if os.stat(path).st_nlink < 2:
+            return
+    except OSError:
+        return
+
+    tmp = f'{path}.{uuid.uuid4().hex}.tmp'
+    if not _reflink(path, tmp):
+        shutil.copy2(path, tmp)
+
+    os.replace(tmp, path)
+
+
+class ArtifactStore:
+    """ Content-addressed store of files registered by runs, shared by all experiments.
+
+    An object is a file named by the sha256 of its content, so each content
+    is uploaded only once. Objects and runs' files never share an inode: a
+    run's file may later be rewritten in place by code that does not go
+    through `ExecutionContext.open` (`torch.save`, `np.save`). Objects are
+    reflinks of the run's file where the file system supports them (Btrfs,
+    XFS), and the identical files of later runs are replaced by reflinks to
+    the object, so that each content is also stored once; elsewhere objects
+    are copies, which doubles the disk space the registered files take.
+    """
+
+    def __init__(self, root=None):
+        self.root    = root or os.path.join(get_root(), _ARTIFACTS)
+        self._logger = logging.getLogger(self.__class__.__name__)
+
+    def path(self, digest):
+        return os.path.join(self.root, digest[:2], digest)
+
+    def __contains__(self, digest):
+        return os.path.exists(self.path(digest))
+
+    def _add(self, path, digest):
+        obj = self.path(digest)
+        os.makedirs(os.path.dirname(obj), mode=0o775, exist_ok=True)
+
+        tmp = f'{obj}.{uuid.uuid4().hex}.tmp'
+        _copy(path, tmp)
+
+        # the link publishes the complete object, and keeps one added concurrently
+        try:
+            os.link(tmp, obj)
+        except FileExistsError:
+            pass
+        finally:
+            os.remove(tmp)
+
+    def _share(self, path, digest):
+        """ Makes `path` a reflink of the object, where the file system supports it """
+
+        tmp = f'{path}.{uuid.uuid4().hex}.tmp'
+
+        if _reflink(self.path(digest), tmp):
+            os.replace(tmp, path)
+
+    def put(self, path):
+        """ Adds the file at `path`, returns its digest """
+
+        digest = file_digest(path)
+
+        try:
+            # keeps the object from `collect_garbage` until the run's manifest refers to it
+            os.utime(self.path(digest))
+        except FileNotFoundError:
+            self._add(path, digest)
+        else:
+            self._share(path, digest)
+
+        return digest
+
+    def ingest(self, storage, paths):
+        """ Adds the files under `paths` (files or directories inside `storage`), returns the run's manifest """
+
+        storage  = os.path.realpath(storage)
+        manifest = read_manifest(storage)
+
+        for path in paths:
+            path = os.path.realpath(path)
+
+            if os.path.commonpath([storage, path]) != storage:
+                self._logger.debug(f'Not ingesting {path}: outside of the run storage')
+                continue
+
+            if os.path.isdir(path):
+                files = [os.path.join(d, name) for d, _, names in os.walk(path) for name in names]
+            elif os.path.isfile(path):
+                files = [path]
+            else:
+                files = []
+
+            for file in files:
+                rel = os.path.relpath(file, storage)
+                if rel in (_MANIFEST, _PENDING) or os.path.islink(file):
+                    continue
+
+                try:
+                    manifest[rel] = self.put(file)
+                except OSError as e:
+                    self._logger.warning(f'Could not ingest {file}: {e}')
+
+        write_manifest(storage, manifest)
+
+        return manifest
+
+    def materialize(self, storage, manifest):
+        """ Copies the objects of `manifest` into `storage` where they are missing. Returns the missing objects """
+
+        missing = []
+
+        for rel, digest in manifest.items():
+            dest = os.path.join(storage, rel)
+            if os.path.exists(dest):
+                continue
+
+            if digest not in self:
+                missing.append(digest)
+                continue
+
+            os.makedirs(os.path.dirname(dest), mode=0o775, exist_ok=True)
+            _copy(self.path(digest), dest)
+
+        return missing
+
+    def collect_garbage(self, referenced, grace=3600):
+        """ Removes the objects whose digest is not in `referenced`. Returns the number of bytes freed
+
+        Objects added or reused in the last `grace` seconds are kept: a run puts
+        an object before it writes the manifest that refers to it. Both set the
+        object's mtime, which is what is checked (along with the ctime).
+        """
+
+        freed  = 0
+        cutoff = time.time() - grace
+
+        for dirpath, _, names in os.walk(self.root):
+            for name in names:
+                if name in referenced or name.endswith('.tmp'):
+                    continue
+
+                path = os.path.join(dirpath, name)
+                st   = os.stat(path)
+
+                if max(st.st_mtime, st.st_ctime) > cutoff:
+                    continue
+
+                freed += st.st_size
+                os.remove(path)
+
+        return freed
+
+
+def referenced_digests(root=None):
+    """ Digests in the manifests of every run of every experiment under `root` """
+
+    root    = root or get_root()
+    digests = set()
+
+    for experiment in os.listdir(root) if os.path.isdir(root) else []:
+        directory = os.path.join(root, experiment)
+        if experiment == _ARTIFACTS or not os.path.isdir(directory):
+            continue
+
+        for ID in os.listdir(directory):
+            digests.update(read_manifest(os.path.join(directory, ID, 'storage')).values())
+
+    return digests
@@ -0,0 +1,182 @@
+import hashlib
+import inspect
+import json
+import logging
+import os
+import threading
+
+from ..defaults import get_root
+
+_CACHE = 'cache'
+_SUFFIX = '.pkl'
+
+
+def code_hash(f):
+    """ Identifies the code of `f`: its source if available, bytecode otherwise """
+
+    f = inspect.unwrap(f)
+
+    try:
+        code = inspect.getsource(f).encode()
+    except (OSError, TypeError):
+        code = getattr(getattr(f, '__code__', None), 'co_code', repr(f).encode())
+
+    return hashlib.sha256(code).hexdigest()
+
+
+def _canonical_call(f, args, kwargs):
+    """ Arguments bound to their parameter names (defaults included), in signature order """
+
+    try:
+        bound = inspect.signature(f).bind(*args, **kwargs)
+        bound.apply_defaults()
+        return list(bound.arguments.items())
+
+    except (TypeError, ValueError):
+        return [('*args', args), ('**kwargs', sorted(kwargs.items()))]
+
+
+def cache_key(f, args, kwargs, commit=None):
+    """ Content address of a call: (code version, serialized arguments)
+
+    Arguments are hashed through their `dill` serialization together with their
+    type names, so values that only print alike (long arrays, lambdas, `'1'`
+    and `1`) get different keys.
+
+    Parameters
+    ----------
+    f : Callable
+        the wrapped function
+    args, kwargs
+        arguments of the call
+    commit : Optional[str]
+        commit of a clean repository. Used instead of hashing the source of `f`.
+
+    Returns
+    -------
+    Optional[str]
+        `None` when an argument cannot be serialized: such calls are not memoized
+    """
+
+    import dill
+
+    version = commit or code_hash(f)
+    name    = f'{getattr(f, "__module__", "")}.{getattr(f, "__qualname__", repr(f))}'
+
+    h = hashlib.sha256(json.dumps([name, version]).encode())
+
+    for k, v in _canonical_call(f, args, kwargs):
+        try:
+            payload = dill.dumps(v, protocol=4, recurse=True)
+        except Exception:
+            return None
+
+        h.update(f'{k}:{type(v).__module__}.{type(v).__qualname__}:{len(payload)}:'.encode())
+        h.update(payload)
+
+    return h.hexdigest()
+
+
+class ResultCache:
+    """ Blob store of task return values, keyed by `cache_key`.
+
+    Recency is tracked with file mtimes (bumped on every hit), and the least
+    recently used entries are evicted once the store outgrows `max_bytes`.
+
+    The store lives under the local `~/.experiments`: results of runs on SSH
+    workers are written on the worker, so queued runs are only skipped as
+    memoized when their workers share the manager's home directory.
+    """
+
+    def __init__(self, root=None, max_bytes=2 ** 30):
+        self.root      = root or os.path.join(get_root(), _CACHE)
+        self.max_bytes = max_bytes
+
+        self.hits      = 0
+        self.misses    = 0
+        self.evictions = 0
+
+        self._lock   = threading.Lock()
+        self._logger = logging.getLogger(self.__class__.__name__)
+
+    def _path(self, key):
+        return os.path.join(self.root, key[:2], key + _SUFFIX)
+
+    def _entries(self):
+        for dirpath, _, files in os.walk(self.root):
+            for name in files:
+                if name.endswith(_SUFFIX):
+                    path = os.path.join(dirpath, name)
+                    st   = os.stat(path)
+
+                    yield path, st.st_size, st.st_mtime
+
+    def get(self, key):
+        """ Returns a (hit, value) pair """
+        import dill
+
+        path = self._path(key)
+
+        try:
+            with open(path, 'rb') as f:
+                value = dill.load(f)
+
+            os.utime(path)
+
+        except (OSError, EOFError):
+            with self._lock:
+                self.misses += 1
+
+            return False, None
+
+        with self._lock:
+            self.hits += 1
+
+        self._logger.debug(f'Cache hit: {key}')
+
+        return True, value
+
+    def __contains__(self, key):
+        return os.path.exists(self._path(key))
+
+    def put(self, key, value):
+        import dill
+
+        path = self._path(key)
+        tmp  = f'{path}.{os.getpid()}.tmp'
+
+        os.makedirs(os.path.dirname(path), mode=0o775, exist_ok=True)
+
+        with open(tmp, 'wb') as f:
+            dill.dump(value, f)
+
+        os.replace(tmp, path)
+        self._evict()
+
+    def _evict(self):
+        entries = sorted(self._entries(), key=lambda e: e[2])
+        total   = sum(size for _, size, _ in entries)
+
+        for path, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+
+            total -= size
+
+            with self._lock:
+                self.evictions += 1
+
+    def clear(self):
+        for path, _, _ in list(self._entries()):
+            os.remove(path)
+
+    def stats(self):
+        entries = list(self._entries())
+
+        return dict(hits=self.hits, misses=self.misses, evictions=self.evictions,
+                    entries=len(entries), bytes=sum(size for _, size, _ in entries))
@@ -0,0 +1,128 @@
+import copy
+import logging
+import os
+import queue
+import re
+import threading
+
+_NAME    = 'ckpt-{:08d}.pkl'
+_PATTERN = re.compile(r'^ckpt-(\d{8})\.pkl$')
+
+
+class CheckpointStore:
+    """ Keeps the last `keep` checkpoints of a run in `directory`.
+
+    `keep` must be at least 1: the checkpoint just saved is the one a restart
+    resumes from.
+
+    Files are written to a temporary name and renamed, so a worker that dies
+    mid-write never leaves a truncated checkpoint behind.
+    """
+
+    def __init__(self, directory, keep=3):
+        if keep < 1:
+            raise ValueError(f'keep must be at least 1, got {keep}')
+
+        self.directory = directory
+        self.keep      = keep
+
+        self._logger = logging.getLogger(f'{self.__class__.__name__}@{directory}')
+
+    def _list(self):
+        if not os.path.isdir(self.directory):
+            return []
+
+        found = []
+        for name in os.listdir(self.directory):
+            m = _PATTERN.match(name)
+            if m is not None:
+                found.append((int(m.group(1)), os.path.join(self.directory, name)))
+
+        return sorted(found)
+
+    def save(self, state, step=None):
+        import dill
+
+        os.makedirs(self.directory, mode=0o775, exist_ok=True)
+
+        existing = self._list()
+        if step is None:
+            step = (existing[-1][0] + 1) if existing else 0
+
+        path = os.path.join(self.directory, _NAME.format(step))
+        tmp  = path + '.tmp'
+
+        with open(tmp, 'wb') as f:
+            dill.dump(state, f)
+
+        os.replace(tmp, path)
+        self._logger.debug(f'Saved {path}')
+
+        for _, old in self._list()[:-self.keep]:
+            os.remove(old)
+
+        return step, path
+
+    def latest(self):
+        found = self._list()
+        return found[-1] if found else (None, None)
+
+    def load(self, default=None):
+        import dill
+
+        step, path = self.latest()
+        if path is None:
+            return default
+
+        with open(path, 'rb') as f:
+            return dill.load(f)
+
+
+class BackgroundSaver:
+    """ Serializes checkpoints on a helper thread, off the training loop.
+
+    `state` is deep-copied by the caller's thread, so it can be mutated
+    right after `submit` returns.
+    """
+
+    def __init__(self, store, on_saved=None):
+        self.store     = store
+        self._on_saved = on_saved
+
+        self._queue  = queue.Queue()
+        self._thread = threading.Thread(target=self._work, daemon=True)
+        self._thread.start()
+
+        self._logger = logging.getLogger(self.__class__.__name__)
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+
+            try:
+                if item is None:
+                    break
+
+                step, path = self.store.save(*item)
+
+                if self._on_saved is not None:
+                    self._on_saved(step, path)
+
+            except Exception as e:
+                self._logger.error(f'Could not save checkpoint: {e}')
+
+            finally:
+                self._queue.task_done()
+
+    def submit(self, state, step=None, copy_state=True):
+        if copy_state:
+            state = copy.deepcopy(state)
+
+        self._queue.put((state, step))
+
+    def flush(self):
+        self._queue.join()
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
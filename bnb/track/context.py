@@ -1,7 +1,8 @@
-import logging
 import os
+import threading
+from contextvars import ContextVar
 
-logger = logging.getLogger('bnb-context')
+from .checkpoint import CheckpointStore
 
 
 class DefaultCtx:
@@ -27,22 +28,102 @@ class DefaultCtx:
     def log_scalar(self, tag, value, step):
         print(f'SCALAR: tag={tag}  value={value:.4f}  step={step}')
 
+    def log_histogram(self, tag, values, step, bins=64, range=None):
+        import numpy as np
+
+        values = np.asarray(values, dtype=float)
+        print(f'HISTOGRAM: tag={tag}  n={values.size}  mean={values.mean():.4f}  std={values.std():.4f}  step={step}')
+
+    def log_array(self, tag, value, step):
+        print(f'ARRAY: tag={tag}  value={value}  step={step}')
+
+    def set_log_policy(self, tag, policy):
+        pass
+
+    def flush_logs(self):
+        pass
+
+    async def alog_scalar(self, tag, value, step):
+        self.log_scalar(tag, value, step)
+
+    async def areport(self, key, value, cmp=None):
+        self.report(key, value, cmp)
+
+    async def aflush(self):
+        pass
+
+    def checkpoint(self, state, step=None):
+        step, path = CheckpointStore(os.path.join(self.storage, 'checkpoints')).save(state, step)
+        print(f'CHECKPOINT: step={step}  path={path}')
+
+    def restore(self, default=None):
+        return CheckpointStore(os.path.join(self.storage, 'checkpoints')).load(default=default)
+
     def run(self, f, args, kwargs):
         return f(*args, **kwargs)
 
 
-class _Context:
-    ctx = DefaultCtx()
+_DEFAULT = DefaultCtx()
 
+# "never set" (fall back to the process' only active context), unlike an explicit `None`
+_UNSET = object()
 
-def set_current_context(ctx):
+# Thread- and asyncio-task-local, so several runs can share a worker process
+_CURRENT = ContextVar('bnb_context', default=_UNSET)
+
+# Contexts currently active anywhere in the process, id -> [ctx, times set and
+# not yet reset]. Threads started by the task itself begin with an empty
+# `contextvars` context; they fall back to the run's context as long as it is
+# the only one in the process.
+_ACTIVE      = {}
+_ACTIVE_LOCK = threading.Lock()
+
+
+def _acquire(ctx):
     if ctx is None:
-        ctx = DefaultCtx()
+        return
+
+    with _ACTIVE_LOCK:
+        _ACTIVE.setdefault(id(ctx), [ctx, 0])[1] += 1
+
+
+def _release(ctx):
+    if (ctx is None) or (ctx is _UNSET):
+        return
+
+    with _ACTIVE_LOCK:
+        item = _ACTIVE.get(id(ctx))
+        if item is None:
+            return
+
+        item[1] -= 1
+        if item[1] <= 0:
+            del _ACTIVE[id(ctx)]
+
+
+def set_current_context(ctx):
+    """ Makes `ctx` current for this thread / asyncio task, `None` makes it the default one.
+
+    Returns a token for `reset_current_context`, which every call should be paired with.
+    """
+
+    _acquire(ctx)
+
+    return _CURRENT.set(ctx)
 
-    logger.debug(f'Setting context: {ctx}')
-    _Context.ctx = ctx
+
+def reset_current_context(token):
+    _release(_CURRENT.get())
+    _CURRENT.reset(token)
 
 
 def get_current_context():
-    logger.debug(f'Returning context: {_Context.ctx}')
-    return _Context.ctx
\ No newline at end of file
+    ctx = _CURRENT.get()
+
+    if ctx is _UNSET:
+        with _ACTIVE_LOCK:
+            active = list(_ACTIVE.values())
+
+        return active[0][0] if len(active) == 1 else _DEFAULT
+
+    return _DEFAULT if ctx is None else ctx
@@ -5,24 +5,123 @@ import os
 import threading
 import time
 import uuid
+from collections import defaultdict
 from functools import partial
 from queue import Queue
 
-import dill
-import rpyc
-from tinydb import where
-
+from bnb.track.aio import BackgroundFlusher
+from bnb.track.arrays import ArrayWriter, histogram
+from bnb.track import artifacts
+from bnb.track.artifacts import ArtifactStore
+from bnb.track.cache import ResultCache
+from bnb.track.checkpoint import BackgroundSaver, CheckpointStore
+from bnb.track.schedulers import Decision, Scheduler
+from bnb.track import profiler, telemetry
+from bnb.track.policies import Summary, make_policy
+from bnb.track.pyramid import PyramidWriter
+from bnb.track.tracing import make_span, span
 from bnb.track.utils import States, _nested_update, _capture_config
-from ..defaults import (backup_entry_path, goc_db, goc_queue, goc_storage_path,
+from ..defaults import (DB_LOCK, backup_entry_path, db_lock, goc_db, goc_queue, goc_storage_path,
                         prepare)
 from ..track import context
+from ..utils.metrics import REGISTRY, serve_metrics
 
 TO_SKIP = {'OK'}
 
+_DISPATCHED = REGISTRY.counter('bnb_runs_dispatched_total', 'Runs taken off the queue and dispatched')
+_SKIPPED    = REGISTRY.counter('bnb_runs_skipped_total', 'Runs skipped as already done or memoized')
+_FINISHED   = REGISTRY.counter('bnb_runs_finished_total', 'Runs whose worker reported completion')
+_UPDATES    = REGISTRY.counter('bnb_updates_total', 'Progress updates received from workers')
+_DB_WRITES  = REGISTRY.histogram('bnb_db_write_seconds', 'Latency of run store writes, lock wait included')
+_QUEUED     = REGISTRY.gauge('bnb_queue_depth', 'Runs waiting in the persistent queue')
+_INFLIGHT   = REGISTRY.gauge('bnb_runs_inflight', 'Runs dispatched and not yet finished')
+
+
+def initial_entry(ID, rich_id, config, limits=None):
+    name   = rich_id['name']
+    limits = limits or {}
+
+    entry = {
+        'ID'         : ID,
+        'rich_id'    : rich_id,
+        'status'     : States.PRE_DISPATCH,
+        'results'    : {},
+        'config'     : config,
+        'logs'       : {},
+        'storage'    : {
+            'root'      : goc_storage_path(ID, name),
+            'files'     : {},
+            'artifacts' : {}
+        },  
+        'timing' : {
+            'start' : 0,
+            'stop'  : 0,
+        },
+        'limits' : limits,
+        'telemetry' : {},
+        'log_summary' : {},
+        'trace'  : [],
+        'misc': {
+            'command' : '',
+            'host'    : {},
+            'error'   : ''
+        }
+    }
+
+    return entry
+
+
+def write_update(ID, *path, value, mode='replace'):
+    """ Applies a single progress update to the run's document in the store """
+    from tinydb import where
+
+    now = time.time()
+
+    def fn(doc):
+        _nested_update(doc, *path, value=value, mode=mode)
+        doc['_last_update'] = now
+
+    with db_lock(ID):
+        goc_db(ID).update(fn, where('ID') == ID)
+
+
+def insert_entry(entry):
+    """ Adds a new run's document to the store """
+
+    with db_lock(entry['ID']):
+        table = goc_db(entry['ID'])
+
+        # the next doc ID is cached per table: another process may have inserted since
+        table._next_id = None
+        table.insert(entry)
+
+
+class QueueUpdate:
+    """ Stands in for the manager's `update` in a child process, forwarding updates through `q` """
+
+    def __init__(self, q, heartbeat_every=0.25):
+        self._q = q
+
+        self._heartbeat_every = heartbeat_every
+        self._last_heartbeat  = 0.0
+
+    def __call__(self, ID, *path, value, mode='replace'):
+        self._q.put(('update', ID, path, value, mode))
+
+    def heartbeat(self, ID):
+        """ Tells the parent the task is making progress, at most every `heartbeat_every` seconds """
+
+        now = time.monotonic()
+        if now - self._last_heartbeat >= self._heartbeat_every:
+            self._last_heartbeat = now
+            self._q.put(('heartbeat', ID))
+
 
 class ExecutionManager:
     def __init__(self, dispatcher=None, name='default',
-                 to_skip=TO_SKIP, dry_run=False):
+                 to_skip=TO_SKIP, dry_run=False,
+                 timeout=None, idle_timeout=None,
+                 scheduler=None, max_restarts=0, metrics_port=None):
 
         if dispatcher is None:
             from bnb.dispatch import WorkerManager
@@ -30,7 +129,7 @@ class ExecutionManager:
 
         self._logger = logging.getLogger(self.__class__.__name__)
 
-        self._db_lock     = multiprocessing.Lock()
+        self._db_lock     = DB_LOCK
         self._ds_lock     = multiprocessing.Lock()
         self._should_stop = multiprocessing.Event()
 
@@ -39,9 +138,27 @@ class ExecutionManager:
         self._qname      = name
         self._skip       = to_skip
         self._dry        = dry_run
+        self._limits     = dict(timeout=timeout, idle_timeout=idle_timeout)
+        self._scheduler  = scheduler  # type: Scheduler
+        self._restarts   = max_restarts
+        self._inflight   = {}
+        self._traces     = defaultdict(list)
 
         self._tasks = Queue(64)
 
+        # bound once, read at every scrape. `qsize()` only counts this handle's own
+        # puts and gets, while runs are queued by other processes: count the rows
+        queue, inflight = goc_queue(name, multithreading=True), self._inflight
+
+        self._labels = dict(queue=name, manager=f'{id(self):x}')
+
+        # the callbacks must not refer to the manager, or the registry keeps it alive
+        _QUEUED.set_function(queue._count, **self._labels)
+        _INFLIGHT.set_function(lambda: len(inflight), **self._labels)
+
+        if metrics_port is not None:
+            serve_metrics(metrics_port)
+
         self._runner = self._start_thread(self._run)
 
         self._logger.debug(f"Created: {self}")
@@ -49,30 +166,10 @@ class ExecutionManager:
     def _get_initial_entry(self, ID, rich_id, config):
         self._logger.debug(f'returning entry for (ID={ID}, rich_id={rich_id}')
 
-        name  = rich_id['name']
-        entry = {
-            'ID'         : ID,
-            'rich_id'    : rich_id,
-            'status'     : States.PRE_DISPATCH,
-            'results'    : {},
-            'config'     : config,
-            'logs'       : {},
-            'storage'    : {
-                'root'  : goc_storage_path(ID, name),
-                'files' : {}
-            },  
-            'timing' : {
-                'start' : 0,
-                'stop'  : 0,
-            },
-            'misc': {
-                'command' : '',
-                'host'    : {},
-                'error'   : ''
-            }
-        }
+        limits = dict(self._limits)
+        limits.update({k: v for k, v in rich_id.get('limits', {}).items() if v is not None})
 
-        return entry
+        return initial_entry(ID, rich_id, config, limits)
 
     def _start_thread(self, target):
         t = threading.Thread(target=target, daemon=True)
@@ -80,9 +177,21 @@ class ExecutionManager:
 
         return t
 
-    def _on_finished(self, ID):
+    def _on_finished(self, ID, retval=None):
         ep = backup_entry_path(ID)
 
+        entry, task = self._inflight.pop(ID, (None, None))
+
+        self._flush_trace(ID)
+        _FINISHED.inc(queue=self._qname)
+
+        if self._should_restart(entry, retval):
+            self._start_thread(partial(self._redispatch, entry, task))
+            return
+
+        if self._scheduler is not None:
+            self._scheduler.on_finished(ID)
+
         with self._ds_lock:
             self._dispatched -= 1
 
@@ -114,6 +223,51 @@ class ExecutionManager:
         # else:
         #     self._logger.debug(f"No backup entry found at {ep}")
 
+    def _should_restart(self, entry, retval):
+        from bnb.dispatch.workers import ServiceDead
+
+        if (entry is None) or (not isinstance(retval, ServiceDead)):
+            return False
+
+        return entry.get('restarts', 0) < self._restarts
+
+    def _redispatch(self, entry, task):
+        ID = entry['ID']
+
+        entry['restarts'] = entry.get('restarts', 0) + 1
+        entry['status']   = States.PRE_DISPATCH
+
+        self._logger.warning(f'Re-dispatching dead run {ID} (restart no. {entry["restarts"]})')
+
+        self.update(ID, 'restarts', value=entry['restarts'])
+        self.update(ID, 'status', value=States.PRE_DISPATCH)
+
+        self._dispatch(entry, task)
+
+    def _dispatch(self, entry, task):
+        ID = entry['ID']
+
+        self._inflight[ID] = (entry, task)
+        callback = partial(self._on_finished, ID)
+
+        self._dispatcher.dispatch(db_entry=entry, task=task,
+                                  upstream_update=self.update,
+                                  on_finished=callback,
+                                  record_span=partial(self._trace, ID))
+
+    def _trace(self, ID, s):
+        self._traces[ID].append(s)
+
+    def _flush_trace(self, ID):
+        spans = self._traces.pop(ID, [])
+
+        if len(spans) > 0:
+            self.update(ID, 'trace', value=spans, mode='extend')
+
+    def _is_memoized(self, rich_id):
+        key = rich_id.get('cache_key')
+        return (key is not None) and (key in ResultCache())
+
     def _should_skip(self, name, config):
 
         def test_func(doc):
@@ -125,6 +279,8 @@ class ExecutionManager:
         return cond
 
     def _run(self):
+        import dill
+
         skipped = 0
         _queue  = goc_queue(self._qname)
 
@@ -132,23 +288,35 @@ class ExecutionManager:
             self._logger.debug(f'Waiting for tasks to arrive to global (former local) queue')
 
             queued = _queue.get()
+            t0     = time.time()
+
             rich_id, *task = dill.loads(queued)
 
             ID       = uuid.uuid4().hex
             name     = rich_id['name']
             config   = _capture_config(*task)
-            skip     = self._should_skip(name, config)
+            record   = partial(self._trace, ID)
+
+            enqueued_at = rich_id.pop('enqueued_at', None)
+            if enqueued_at is not None:
+                record(make_span('queue', enqueued_at, t0))
+
+            with span('skip_check', record):
+                skip = self._should_skip(name, config) or self._is_memoized(rich_id)
 
             if skip:
                 skipped += 1
+                _SKIPPED.inc(queue=self._qname)
+                self._traces.pop(ID, None)
                 self._logger.warning(f'Skipping. So far skipped {skipped}')
                 continue
 
             if self._dry:
+                self._traces.pop(ID, None)
                 self._logger.debug('Skipping due to dry-run being True')
                 continue
 
-            with self._db_lock:
+            with span('prepare', record), self._db_lock:
                 try:
                     prepare(ID, name)
                 except:
@@ -158,15 +326,16 @@ class ExecutionManager:
             with self._ds_lock:
                 self._dispatched += 1
 
+            _DISPATCHED.inc(queue=self._qname)
+
             self._logger.info(f'fetched from local queue (task={id(task)}, ID={ID})')
 
-            entry    = self._get_initial_entry(ID, rich_id, config)
-            callback = partial(self._on_finished, ID)
+            entry = self._get_initial_entry(ID, rich_id, config)
+
+            with span('insert', record):
+                self._insert(entry)
 
-            self._insert(entry)
-            self._dispatcher.dispatch(db_entry=entry, task=task,
-                                      upstream_update=self.update, 
-                                      on_finished=callback)
+            self._dispatch(entry, task)
 
             self._logger.debug(f'Dispatch returned (task={id(task)}, ID={ID})')
 
@@ -174,8 +343,12 @@ class ExecutionManager:
         ID = entry['ID']
         self._logger.debug(f'Insert: (ID={ID})')
 
+        t0 = time.time()
+
         with self._db_lock:
-            goc_db(ID).insert(entry)
+            insert_entry(entry)
+
+        _DB_WRITES.observe(time.time() - t0, op='insert')
 
     @staticmethod
     def critical_upadte():
@@ -185,6 +358,7 @@ class ExecutionManager:
         return args, kwargs
 
     def update(self, ID, *path, value, mode='replace'):
+        import dill
 
         if isinstance(value, bytes):
             value = dill.loads(value)
@@ -194,22 +368,63 @@ class ExecutionManager:
 
         self._logger.debug(f'Update: (ID={ID}, path={path}, value={value}')
 
-        def fn(doc):
-            _nested_update(doc, *path, value=value, mode=mode)
+        _UPDATES.inc(queue=self._qname, kind=path[0])
+        t0 = time.time()
+
+        with self._db_lock:
+            write_update(ID, *path, value=value, mode=mode)
+
+        _DB_WRITES.observe(time.time() - t0, op='update')
+
+        if (self._scheduler is not None) and (path == ('logs', self._scheduler.metric)):
+            self._schedule(ID, *value)
+
+    def _schedule(self, ID, step, value):
+        decision = self._scheduler.on_result(ID, step, value)
+
+        if decision == Decision.STOP:
+            self._logger.info(f'Scheduler stops ID {ID} at step {step} ({self._scheduler.metric}={value})')
+
+            # `update` runs on the connection's serving thread, don't call back into the worker from here
+            t = threading.Thread(target=self.cancel, args=(ID, States.EARLY_STOP), daemon=True)
+            t.start()
+
+    def cancel(self, ID, state=States.CANCELLED):
+        """ Stops the run `ID`, whether it is already running or still waiting for a worker.
+
+        Returns `True` if the run was found and stopped.
+        """
+        from tinydb import where
+
+        self._logger.info(f'Cancel requested for ID {ID}')
+
+        if self._dispatcher.cancel(ID, state):
+            return True
 
         with self._db_lock:
-            goc_db(ID).update(fn, where('ID') == ID)
+            doc = goc_db(ID).get(where('ID') == ID)
+
+        if (doc is None) or (doc['status'] != States.PRE_DISPATCH):
+            return False
+
+        self._dispatcher.cancel_pending(ID)
+        self.update(ID, 'status', value=state)
+
+        return True
 
     def stop(self):
         self._should_stop.set()
 
+        _QUEUED.remove(**self._labels)
+        _INFLIGHT.remove(**self._labels)
+
     def wait(self):
         while self._dispatched > 0:
             time.sleep(30)
 
 
 class ExecutionContext:
-    def __init__(self, db_entry, upstream_update, use_backup=True):
+    def __init__(self, db_entry, upstream_update, use_backup=True, keep_checkpoints=3):
         self._logger = logging.getLogger(self.__class__.__name__ + '@' + db_entry['ID'][:5])
         self._logger.debug("Enterered ctor...")
 
@@ -222,9 +437,25 @@ class ExecutionContext:
         prepare(self._ID, self._experiment_name)
 
         self._storage         = goc_storage_path(self._ID, self._experiment_name)
-        self._upstream_update = rpyc.async(upstream_update)
+        self._upstream_update = upstream_update
         self._db_entry_backup = backup_entry_path(self._ID)
         self._report_cache    = {}
+        self._options         = db_entry['rich_id'].get('options', {})
+        self._lock            = threading.RLock()
+
+        self._flusher      = None  # type: BackgroundFlusher
+        self._flusher_lock = threading.Lock()
+        self._finished     = False
+
+        self._log_specs = dict(self._options.get('log_policies') or {})
+        self._policies  = {}
+        self._summaries = {}
+        self._pyramids  = None  # type: PyramidWriter
+        self._arrays    = None  # type: ArrayWriter
+
+        self._checkpoints = CheckpointStore(os.path.join(self._storage, 'checkpoints'),
+                                            keep=keep_checkpoints)
+        self._saver       = None  # type: BackgroundSaver
 
         self._logger.debug(f'Created {self}')
 
@@ -238,6 +469,8 @@ class ExecutionContext:
             self._logger.debug('Manager was None')
             return
 
+        import dill
+
         try:
             self._upstream_update(self._ID, *path, value=dill.dumps(value), mode=mode)
             self._logger.debug('Sent data to manager')
@@ -256,8 +489,9 @@ class ExecutionContext:
     def _update(self, *path, value, mode='replace'):
         self._logger.debug(f'Trying to update all (path={path} value={value})')
 
-        self._update_local(*path, value=value, mode=mode)
-        self._update_upstream(*path, value=value, mode=mode)
+        with self._lock:
+            self._update_local(*path, value=value, mode=mode)
+            self._update_upstream(*path, value=value, mode=mode)
 
     @property
     def storage(self):
@@ -281,13 +515,23 @@ class ExecutionContext:
         self._update(*path, value=value)
 
     def open(self, file, mode='r', tags=(), description='', **kwargs):
+        if set(mode) & set('wax+'):
+            # stores used to hardlink files to their objects, which other runs share
+            artifacts.unshare(file)
+
         f = open(file=file, mode=mode, **kwargs)
         self.touch(file=file, tags=tags, description=description)
 
         return f
 
+    def _register(self, file):
+        if self._options.get('artifacts', False):
+            artifacts.register(self._storage, file)
+
     def touch(self, file, tags=(), description=''):
+        artifacts.unshare(file)
         f = open(file=file, mode='a+')
+        self._register(file)
 
         path  = ['storage', 'files', file]
         value = dict(type='file', tags=tags, description=description)
@@ -298,29 +542,195 @@ class ExecutionContext:
 
     def makedirs(self, name, mode=511, exist_ok=False, tags=(), description=''):
         os.makedirs(name, mode=mode, exist_ok=exist_ok)
+        self._register(name)
 
         path = ('storage', 'files', name)
         value = dict(type='directory', tags=tags, description=description)
 
         self._update(*path, value=value)
 
+    def set_log_policy(self, tag, policy):
+        """ Decimates / aggregates `tag` (`'*'` for every tag without its own policy).
+
+        `policy` is a `LogPolicy` or a spec such as `['every_n', 10]`, see `bnb.track.policies`.
+        """
+
+        with self._lock:
+            self._log_specs[tag] = policy
+            self._policies.pop(tag, None)
+
+            if tag == '*':
+                self._policies.clear()
+
+    def _policy(self, tag):
+        if tag not in self._policies:
+            self._policies[tag] = make_policy(self._log_specs.get(tag, self._log_specs.get('*')))
+
+        return self._policies[tag]
+
     def log_scalar(self, tag, value, step):
-        self._update('logs', tag, value=(step, value), mode='append')
+        # counts as activity for `idle_timeout`, whatever the log policy keeps
+        heartbeat = getattr(self._upstream_update, 'heartbeat', None)
+        if heartbeat is not None:
+            heartbeat(self._ID)
+
+        with self._lock:
+            if tag not in self._summaries:
+                self._summaries[tag] = Summary()
+
+            self._summaries[tag].add(step, value)
+
+            # pyramids see every point, whatever the policy keeps in the entry
+            pyramids = self._pyramid_writer()
+            if pyramids is not None:
+                pyramids.add(tag, step, value)
+
+            points = self._policy(tag).offer(step, value)
+
+            for suffix, s, v in points:
+                self._update('logs', tag + suffix, value=(s, v), mode='append')
+
+    def _relative(self, path):
+        """ `path` relative to the run storage, which is synced to the same place on every machine """
+
+        return os.path.relpath(path, self._storage)
+
+    def _pyramid_writer(self):
+        if (self._pyramids is None) and self._options.get('pyramids', False):
+            self._pyramids = PyramidWriter(os.path.join(self._storage, 'pyramids'))
+            self._update('misc', 'pyramids', value=self._relative(self._pyramids.directory))
+
+        return self._pyramids
+
+    def _array_writer(self):
+        if self._arrays is None:
+            self._arrays = ArrayWriter(os.path.join(self._storage, 'arrays'))
+            self._update('misc', 'arrays', value=self._relative(self._arrays.directory))
+
+        return self._arrays
+
+    def log_histogram(self, tag, values, step, bins=64, range=None):
+        """ Logs the histogram of `values` (e.g. a layer's weights); read back with `Results.arrays` """
+
+        arrays, stats = histogram(values, bins=bins, range=range)
+
+        with self._lock:
+            self._array_writer().add(tag, step, 'histogram', arrays, stats=stats)
+
+    def log_array(self, tag, value, step):
+        """ Logs a whole array (e.g. per-class metrics) without putting it into the run's entry """
+
+        with self._lock:
+            self._array_writer().add(tag, step, 'array', dict(value=value))
+
+    def _submit(self, fn, *args):
+        # `self._lock` is held by the flusher while it writes: coroutines must not wait on it
+        with self._flusher_lock:
+            if (self._flusher is None) and (not self._finished):
+                self._flusher = BackgroundFlusher()
+
+            if self._flusher is not None:
+                self._flusher.submit(fn, *args)
+                return
+
+        # the run is over and its flusher closed: nothing else holds the lock for long
+        fn(*args)
+
+    async def alog_scalar(self, tag, value, step):
+        """ Like `log_scalar`, but returns at once; the update is applied by a background thread """
+        self._submit(self.log_scalar, tag, value, step)
+
+    async def areport(self, key, value, cmp=None):
+        self._submit(self.report, key, value, cmp)
+
+    async def aflush(self):
+        """ Waits, without blocking the event loop, until earlier async calls have been applied """
+        if self._flusher is not None:
+            await self._flusher.aflush()
+
+    def flush_logs(self):
+        """ Records the points held back by the log policies, the exact per-tag summaries, the pyramids and array logs """
+
+        with self._lock:
+            if self._pyramids is not None:
+                self._pyramids.flush()
+
+            if self._arrays is not None:
+                self._arrays.flush()
+
+            for tag, policy in self._policies.items():
+                for suffix, s, v in policy.flush():
+                    self._update('logs', tag + suffix, value=(s, v), mode='append')
+
+            summaries = {tag: summary.to_dict() for tag, summary in self._summaries.items()}
+
+            if summaries:
+                self._update('log_summary', value=summaries)
+
+    def _ingest_artifacts(self):
+        """ Moves the files registered through `open` / `touch` / `makedirs` into the shared artifact store """
+
+        files = list(self._db_entry['storage']['files'])
+        if not files or not self._options.get('artifacts', False):
+            return
+
+        try:
+            manifest = ArtifactStore().ingest(self._storage, files)
+        except OSError as e:
+            self._logger.warning(f'Could not ingest artifacts: {e}')
+            return
+
+        self._update('storage', 'artifacts', value=manifest)
+
+    def _on_checkpoint_saved(self, step, path):
+        self._update('storage', 'checkpoint', value={'step': step, 'path': path, 'time': time.time()})
+
+    def checkpoint(self, state, step=None):
+        """ Saves `state` in the background, keeping the last few checkpoints of this run.
+
+        A run re-dispatched with the same ID can pick it up with `restore()`.
+        """
+
+        if self._saver is None:
+            self._saver = BackgroundSaver(self._checkpoints, on_saved=self._on_checkpoint_saved)
+
+        self._saver.submit(state, step=step)
+
+    def restore(self, default=None):
+        if self._saver is not None:
+            self._saver.flush()
+
+        step, path = self._checkpoints.latest()
+        if path is not None:
+            self._logger.info(f'Restoring checkpoint from step {step}')
+
+        return self._checkpoints.load(default=default)
 
     def run(self, f, args, kwargs):
         self._logger.info(f"Trying to run f for args={args} kwargs={kwargs}")
 
-        context.set_current_context(self)
+        token = context.set_current_context(self)
 
+        self._update('misc', 'host', value=telemetry.host_info())
+
+        # a re-dispatched run rewrites files a previous attempt may have linked to the store
+        for rel in artifacts.read_manifest(self._storage):
+            artifacts.unshare(os.path.join(self._storage, rel))
         self._update('status', value=States.RUNNING)
 
+        sampler  = self._start_sampler()
+        prof     = self._start_profiler()
+
         status = States.UNK
-        t0 = time.time()
+        ret    = None
+        t0     = time.time()
 
         try:
-            f(*args, **kwargs)
+            ret    = f(*args, **kwargs)
             status = States.OK
 
+            self._memoize(ret)
+
         except KeyboardInterrupt:
             status = States.SIGINT
 
@@ -329,8 +739,80 @@ class ExecutionContext:
             self._update('misc', 'error', value=str(e)) 
 
         finally:
-            context.set_current_context(None)
+            if self._saver is not None:
+                self._saver.close()
+                self._saver = None
+
+            with self._flusher_lock:
+                flusher, self._flusher, self._finished = self._flusher, None, True
+
+            if flusher is not None:
+                flusher.close()
+
+            self.flush_logs()
+
+            if self._arrays is not None:
+                self._arrays.close()
+                self._arrays = None
+
+            self._ingest_artifacts()
+
+            context.reset_current_context(token)
             t1 = time.time()
 
+            if sampler is not None:
+                self._stop_sampler(sampler)
+
+            if prof is not None:
+                self._stop_profiler(prof)
+
             self._update('timing', value={'start': t0, 'stop': t1})
+            self._update('trace', value=make_span('run', t0, t1, status=status), mode='append')
             self._update('status', value=status)
+
+        return ret
+
+    def _start_sampler(self):
+        interval = self._options.get('telemetry', 5.0)
+        if not interval:
+            return None
+
+        return telemetry.ResourceSampler(interval=interval).start()
+
+    def _stop_sampler(self, sampler):
+        summary = sampler.stop()
+
+        try:
+            summary['series'] = self._relative(sampler.save(os.path.join(self._storage, 'telemetry.bin')))
+        except OSError as e:
+            self._logger.warning(f'Could not save telemetry: {e}')
+
+        self._update('telemetry', value=summary)
+
+    def _start_profiler(self):
+        interval = self._options.get('profile')
+        if not interval:
+            return None
+
+        return profiler.SamplingProfiler(interval=interval).start()
+
+    def _stop_profiler(self, p):
+        p.stop()
+
+        try:
+            path = p.save(os.path.join(self._storage, 'profile.json'))
+        except OSError as e:
+            self._logger.warning(f'Could not save profile: {e}')
+            return
+
+        self._update('misc', 'profile', value=self._relative(path))
+
+    def _memoize(self, ret):
+        key = self._db_entry['rich_id'].get('cache_key')
+        if key is None:
+            return
+
+        try:
+            ResultCache().put(key, ret)
+        except Exception as e:
+            self._logger.warning(f'Could not memoize result: {e}')
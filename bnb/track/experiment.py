@@ -1,13 +1,18 @@
+import atexit
 import logging
 import os
+import time
 from collections import namedtuple
+from concurrent.futures import Future
 from contextlib import contextmanager
 from enum import Enum
 
-import dill
 import wrapt
 
 from bnb.defaults import goc_queue
+from .cache import ResultCache, cache_key
+from .local import LocalExecutor
+from .policies import make_policy
 from ..utils.general_utils import caller_git_info
 from ..utils.version import bump_version, get_version
 
@@ -22,10 +27,25 @@ class Experiment:
     def __init__(self, *identifiers,
                  auto_enabled=False,
                  dirty_ok=False,
-                 bucket=None):
+                 bucket=None,
+                 timeout=None,
+                 idle_timeout=None,
+                 memoize=False,
+                 cache_size=2 ** 30,
+                 telemetry=5.0,
+                 profile=None,
+                 log_policies=None,
+                 pyramids=False,
+                 artifacts=False):
 
         self.identifiers = list(identifiers)
         self._bucket     = bucket
+        self._limits     = dict(timeout=timeout, idle_timeout=idle_timeout)
+        self._cache      = ResultCache(max_bytes=cache_size) if memoize else None
+        self._options    = dict(telemetry=telemetry, profile=profile, pyramids=pyramids,
+                                artifacts=artifacts,
+                                log_policies={tag: make_policy(p).spec()
+                                              for tag, p in (log_policies or {}).items()})
 
         (self._root, 
          self._commit, 
@@ -40,10 +60,14 @@ class Experiment:
 
         self._name = self.identifiers[0]
         self._dispatch_mode = None if (not auto_enabled) else DispatchMode.EXECUTE
+        self._executor      = None  # type: LocalExecutor
 
         self._logger = logging.getLogger(f'Experiment@{self._name}')
         self._logger.debug(f'Created {self}')
 
+        if memoize and self._dirty:
+            self._logger.warning('The commit is dirty: calls are not memoized')
+
     def __repr__(self):
         return f'Experiment(name={self._name})'
 
@@ -56,7 +80,9 @@ class Experiment:
             version = get_version(self._name, self._commit),
             commit  = self._commit,
             root    = str(self._root),
-            bucket  = self._bucket
+            bucket  = self._bucket,
+            limits  = self._limits,
+            options = self._options
         )
 
     @wrapt.decorator
@@ -81,6 +107,23 @@ class Experiment:
         self._logger.debug('Exiting queued mode')
         self._dispatch_mode = None
 
+    @contextmanager
+    def executed(self, n_procs=None):
+        """ Runs watched calls on a local process pool; each call returns a `Future` """
+
+        previous, self._executor = self._executor, LocalExecutor(n_procs)
+        self._dispatch_mode = DispatchMode.EXECUTE
+        self._logger.debug('Entering executed mode')
+
+        try:
+            yield self._executor
+        finally:
+            self._logger.debug('Exiting executed mode')
+
+            self._executor.shutdown(wait=True)
+            self._executor = previous
+            self._dispatch_mode = None
+
     @property
     def _dispatch_map(self):
         return {
@@ -96,13 +139,53 @@ class Experiment:
 
         dispatcher = self._dispatch_map[self._dispatch_mode]
 
-        return dispatcher(f, args, kwargs)
+        if self._cache is None:
+            return dispatcher(f, args, kwargs)
+
+        # serializing the arguments is not cheap: the key is computed once and passed down
+        key = self._cache_key(f, args, kwargs)
+        if key is None:
+            self._logger.debug('Not memoizing this call (dirty tree or arguments that cannot be serialized)')
+            return dispatcher(f, args, kwargs)
+
+        hit, value = self._cache.get(key)
+
+        if hit:
+            self._logger.debug(f'Returning memoized result for (args={args}, kwargs={kwargs})')
+
+            if self._dispatch_mode == DispatchMode.EXECUTE:
+                future = Future()
+                future.set_result(value)
+
+                return future
+
+            return value
+
+        return dispatcher(f, args, kwargs, key=key)
+
+    def _cache_key(self, f, args, kwargs):
+        if self._dirty:
+            # the key could only cover the source of `f`, not uncommitted changes to what it calls
+            return None
+
+        return cache_key(f, args, kwargs, commit=self._commit)
+
+    def cache_stats(self):
+        return None if (self._cache is None) else self._cache.stats()
+
+    def _enqueue(self, f, args, kwargs, key=None):
+        import dill
 
-    def _enqueue(self, f, args, kwargs):
         q = goc_queue(self._q_name)
 
+        info = self.describe()
+        if key is not None:
+            info['cache_key'] = key
+
+        info['enqueued_at'] = time.time()
+
         Payload = namedtuple('Payload', ('info', 'f', 'args', 'kwargs'))
-        payload = Payload(self.describe(), f, args, kwargs)
+        payload = Payload(info, f, args, kwargs)
 
         q.put(dill.dumps(payload))
 
@@ -110,11 +193,25 @@ class Experiment:
             f'Enqueued (Ident={self.identifiers}, args={args}, kwargs={kwargs}) to {q.path} '
         )
 
-    def _execute(self, f, args, kwargs):
-        raise NotImplementedError
+    def _execute(self, f, args, kwargs, key=None):
+        if self._executor is None:
+            # auto_enabled: there is no block to close it, runs are waited for on exit
+            self._executor = LocalExecutor()
+            atexit.register(self._executor.shutdown)
+
+        info = self.describe()
+        if key is not None:
+            info['cache_key'] = key
+
+        return self._executor.submit(info, f, args, kwargs)
+
+    def _call(self, f, args, kwargs, key=None):
+        ret = f(*args, **kwargs)
+
+        if key is not None:
+            self._cache.put(key, ret)
 
-    def _call(self, f, args, kwargs):
-        return f(*args, **kwargs)
+        return ret
 
     def tag(self, tag):
         if tag not in self.identifiers:
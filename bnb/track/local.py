@@ -0,0 +1,126 @@
+import logging
+import multiprocessing
+import threading
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from .execution import ExecutionContext, QueueUpdate, initial_entry, insert_entry, write_update
+from .utils import _capture_config
+from ..defaults import DB_LOCK, prepare
+
+_UPDATES = None
+
+
+def _init_child(updates):
+    global _UPDATES
+    _UPDATES = updates
+
+
+def _run_child(entry, task):
+    import dill
+
+    f, args, kwargs = dill.loads(task)
+
+    ctx = ExecutionContext(db_entry=entry, upstream_update=QueueUpdate(_UPDATES))
+    ret = ctx.run(f, args, kwargs)
+
+    try:
+        ret = dill.dumps(ret)
+    except Exception:
+        ret = dill.dumps(repr(ret))
+
+    _UPDATES.put(('done', entry['ID'], ret))
+
+
+class LocalExecutor:
+    """ Runs tasks on a local process pool, without the queue, rpyc or worker servers.
+
+    Children send progress updates through a pipe to a writer thread,
+    which applies them to the run store directly.
+    """
+
+    # fork, as in `TaskProcess` (which explains why it is safe): the writer
+    # thread may be writing to the store, but never holds `DB_LOCK` across a fork
+    _mp = multiprocessing.get_context('fork')
+
+    def __init__(self, n_procs=None):
+        self._updates = self._mp.Queue()
+        self._pool    = ProcessPoolExecutor(max_workers=n_procs, mp_context=self._mp,
+                                            initializer=_init_child, initargs=(self._updates, ))
+
+        self._futures = {}
+
+        self._writer = threading.Thread(target=self._write, daemon=True)
+        self._writer.start()
+
+        self._logger = logging.getLogger(self.__class__.__name__)
+
+    def _write(self):
+        import dill
+
+        while True:
+            msg = self._updates.get()
+
+            if msg is None:
+                break
+
+            if msg[0] == 'done':
+                _, ID, ret = msg
+                future     = self._futures.pop(ID, None)
+
+                if future is not None:
+                    future.set_result(dill.loads(ret))
+
+                continue
+
+            if msg[0] == 'heartbeat':
+                continue
+
+            _, ID, path, value, mode = msg
+
+            with DB_LOCK:
+                write_update(ID, *path, value=dill.loads(value), mode=mode)
+
+    def _on_pool_done(self, ID, pool_future):
+        e = pool_future.exception()
+
+        future = self._futures.pop(ID, None) if (e is not None) else None
+
+        if future is not None:
+            future.set_exception(e)
+
+    def submit(self, info, f, args, kwargs):
+        import dill
+
+        ID    = uuid.uuid4().hex
+        entry = initial_entry(ID, info, _capture_config(f, args, kwargs),
+                              limits=info.get('limits'))
+
+        with DB_LOCK:
+            prepare(ID, info['name'])
+            insert_entry(entry)
+
+        future = Future()
+        self._futures[ID] = future
+
+        pool_future = self._pool.submit(_run_child, entry, dill.dumps((f, args, kwargs)))
+        pool_future.add_done_callback(lambda pf: self._on_pool_done(ID, pf))
+
+        self._logger.debug(f'Submitted (ID={ID}, args={args}, kwargs={kwargs})')
+
+        return future
+
+    def _close(self):
+        # the children flush their side of the pipe when they exit, so
+        # the writer stops only after their last updates (and 'done's)
+        self._pool.shutdown(wait=True)
+        self._updates.put(None)
+
+    def shutdown(self, wait=True):
+        """ Runs already submitted finish (and their futures resolve) either way """
+
+        if wait:
+            self._close()
+            self._writer.join()
+        else:
+            threading.Thread(target=self._close, daemon=True).start()
@@ -0,0 +1,202 @@
+""" Client-side policies deciding which `log_scalar` calls are sent and stored.
+
+A policy sees every (step, value) of a tag and returns the points to record,
+as (suffix, step, value) with the suffix appended to the tag. Exact running
+statistics are kept separately by `Summary`, whatever the policy drops.
+
+Policies can be given as instances or as JSON-friendly specs, e.g.
+`['every_n', 10]`, `['every', 5.0]`, `['ema', 0.9, 100]` or `['window', 100]`.
+"""
+
+import math
+import time
+
+
+class Summary:
+    """ Exact count / sum / min / max / mean / first / last of every logged value """
+
+    __slots__ = ('count', 'sum', 'min', 'max', 'first', 'last', 'last_step')
+
+    def __init__(self):
+        self.count     = 0
+        self.sum       = 0.0
+        self.min       = math.inf
+        self.max       = -math.inf
+        self.first     = None
+        self.last      = None
+        self.last_step = None
+
+    def add(self, step, value):
+        if self.count == 0:
+            self.first = value
+
+        self.count    += 1
+        self.sum      += value
+        self.min       = min(self.min, value)
+        self.max       = max(self.max, value)
+        self.last      = value
+        self.last_step = step
+
+    def to_dict(self):
+        if self.count == 0:
+            return {}
+
+        return dict(count=self.count, sum=self.sum, min=self.min, max=self.max,
+                    mean=self.sum / self.count, first=self.first, last=self.last,
+                    last_step=self.last_step)
+
+
+class LogPolicy:
+
+    def offer(self, step, value, now=None):
+        raise NotImplementedError
+
+    def flush(self):
+        """ Points still held back, called when the run finishes """
+        return []
+
+    def spec(self):
+        raise NotImplementedError
+
+
+class KeepAll(LogPolicy):
+
+    def offer(self, step, value, now=None):
+        return [('', step, value)]
+
+    def spec(self):
+        return ['all']
+
+
+class EveryN(LogPolicy):
+    """ Keeps every `n`-th call, starting with the first one """
+
+    def __init__(self, n):
+        self.n     = n
+        self._seen = 0
+
+    def offer(self, step, value, now=None):
+        keep = (self._seen % self.n) == 0
+        self._seen += 1
+
+        return [('', step, value)] if keep else []
+
+    def spec(self):
+        return ['every_n', self.n]
+
+
+class Every(LogPolicy):
+    """ Keeps at most one call per `seconds`; the last dropped one is kept at flush """
+
+    def __init__(self, seconds):
+        self.seconds  = seconds
+        self._last_t  = None
+        self._pending = None
+
+    def offer(self, step, value, now=None):
+        now = time.time() if now is None else now
+
+        if (self._last_t is None) or (now - self._last_t >= self.seconds):
+            self._last_t  = now
+            self._pending = None
+            return [('', step, value)]
+
+        self._pending = (step, value)
+        return []
+
+    def flush(self):
+        pending, self._pending = self._pending, None
+        return [] if pending is None else [('', *pending)]
+
+    def spec(self):
+        return ['every', self.seconds]
+
+
+class EMA(LogPolicy):
+    """ Exponential moving average with smoothing `alpha`, recorded every `n` calls """
+
+    def __init__(self, alpha=0.9, n=1):
+        self.alpha = alpha
+        self.n     = n
+
+        self._ema  = None
+        self._seen = 0
+        self._step = None
+
+    def offer(self, step, value, now=None):
+        self._ema  = value if self._ema is None else self.alpha * self._ema + (1 - self.alpha) * value
+        self._step = step
+        self._seen += 1
+
+        return [('', step, self._ema)] if (self._seen % self.n) == 0 else []
+
+    def flush(self):
+        if (self._seen % self.n) == 0 or (self._ema is None):
+            return []
+
+        return [('', self._step, self._ema)]
+
+    def spec(self):
+        return ['ema', self.alpha, self.n]
+
+
+class Window(LogPolicy):
+    """ Aggregates `size` calls into one point per statistic, at the window's last step.
+
+    The mean is recorded under the tag itself, the others as `<tag>/<stat>`.
+    """
+
+    def __init__(self, size, stats=('mean', 'min', 'max')):
+        self.size  = size
+        self.stats = tuple(stats)
+
+        self._values = []
+        self._step   = None
+
+    def _emit(self):
+        values = self._values
+        stats  = dict(mean=sum(values) / len(values), min=min(values), max=max(values))
+
+        self._values = []
+
+        return [('' if s == 'mean' else f'/{s}', self._step, stats[s]) for s in self.stats]
+
+    def offer(self, step, value, now=None):
+        self._values.append(value)
+        self._step = step
+
+        return self._emit() if len(self._values) >= self.size else []
+
+    def flush(self):
+        return self._emit() if self._values else []
+
+    def spec(self):
+        return ['window', self.size, list(self.stats)]
+
+
+_KINDS = {
+    'all':     KeepAll,
+    'every_n': EveryN,
+    'every':   Every,
+    'ema':     EMA,
+    'window':  Window,
+}
+
+
+def make_policy(spec):
+    """ Builds a fresh policy from a spec (or from another policy's spec) """
+
+    if spec is None:
+        return KeepAll()
+
+    if isinstance(spec, LogPolicy):
+        spec = spec.spec()
+
+    if isinstance(spec, str):
+        spec = [spec]
+
+    kind, *args = spec
+    if kind not in _KINDS:
+        raise ValueError(f'Unknown log policy {kind!r}, expected one of {sorted(_KINDS)}')
+
+    return _KINDS[kind](*args)
@@ -0,0 +1,118 @@
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+from collections import Counter, defaultdict
+
+
+@functools.lru_cache(maxsize=None)
+def _relative(filename):
+    """ `filename` relative to the `sys.path` entry it was imported from, so that
+    labels of the same function agree across checkouts and hosts """
+
+    if not os.path.isabs(filename):
+        return filename
+
+    roots = [os.path.abspath(p or os.getcwd()) for p in sys.path]
+    roots = [r for r in roots if filename.startswith(r.rstrip(os.sep) + os.sep)]
+
+    return os.path.relpath(filename, max(roots, key=len)) if roots else filename
+
+
+def _label(code):
+    return f'{code.co_name} ({_relative(code.co_filename)}:{code.co_firstlineno})'
+
+
+class SamplingProfiler:
+    """ Statistical profiler for a single thread.
+
+    Every `interval` seconds a helper thread grabs the target thread's
+    current frame and counts the collapsed stack ("root;...;leaf"), so the
+    cost is independent of how many calls the profiled code makes.
+    """
+
+    def __init__(self, thread_id=None, interval=0.01, max_depth=128):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval  = interval
+        self.max_depth = max_depth
+
+        self.stacks  = Counter()
+        self.samples = 0
+
+        self._stop   = threading.Event()
+        self._thread = None
+
+        self._logger = logging.getLogger(self.__class__.__name__)
+
+    def _sample(self):
+        frame = sys._current_frames().get(self.thread_id)
+        if frame is None:
+            return
+
+        stack = []
+        while (frame is not None) and (len(stack) < self.max_depth):
+            stack.append(_label(frame.f_code))
+            frame = frame.f_back
+
+        self.stacks[';'.join(reversed(stack))] += 1
+        self.samples += 1
+
+    def _work(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._work, daemon=True)
+        self._thread.start()
+
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+        if self._thread is not None:
+            self._thread.join()
+
+        return self
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump(dict(interval=self.interval, samples=self.samples,
+                           stacks=dict(self.stacks)), f)
+
+        return path
+
+
+def load_profile(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def hot_functions(profiles, top=20):
+    """ Aggregates collapsed-stack profiles into per-function sample counts.
+
+    Returns a list of dicts sorted by `self` samples (function on top of the
+    stack); `total` counts samples in which the function was anywhere on it.
+    """
+
+    own   = defaultdict(int)
+    total = defaultdict(int)
+    n     = 0
+
+    for profile in profiles:
+        n += profile['samples']
+
+        for stack, count in profile['stacks'].items():
+            frames = stack.split(';')
+
+            own[frames[-1]] += count
+            for fn in set(frames):
+                total[fn] += count
+
+    ranked = sorted(total, key=lambda fn: (own[fn], total[fn]), reverse=True)[:top]
+
+    return [dict(function=fn, self=own[fn], total=total[fn],
+                 self_pct=100 * own[fn] / max(n, 1), total_pct=100 * total[fn] / max(n, 1))
+            for fn in ranked]
@@ -0,0 +1,295 @@
+""" Multi-resolution min/max/mean pyramids of scalar logs.
+
+Level 0 holds every (step, value) of a tag. Each record of level k > 0
+summarizes `factor` consecutive records of level k - 1 as
+(first step, last step, min, max, sum, count), so any step range can be
+drawn from a bounded number of records by picking the right level.
+
+Levels are append-only float64 files in the run's storage,
+`<tag>.<level>.bin`. The not yet complete record of every level is kept in
+`<tag>.tail.json`, rewritten on flush. A run resumed under the same ID
+rebuilds those from the files and keeps appending.
+
+Pyramids are opt-in (`Experiment(..., pyramids=True)`): level 0 keeps every
+point, so they take as much room as the unthinned logs (16 bytes a point),
+plus about 1 / (factor - 1) of that for the upper levels.
+"""
+
+import json
+import os
+from array import array
+from urllib.parse import quote, unquote
+
+_WIDTH = {0: 2}
+_AGG   = 6
+
+FIELDS = ('first', 'last', 'min', 'max', 'sum', 'count')
+
+
+def _width(level):
+    return _WIDTH.get(level, _AGG)
+
+
+def _file(directory, tag, level):
+    return os.path.join(directory, f'{quote(tag, safe="")}.{level}.bin')
+
+
+def _tail_file(directory, tag):
+    return os.path.join(directory, f'{quote(tag, safe="")}.tail.json')
+
+
+def _summary(level, record):
+    """ A record as (first, last, min, max, sum, count) """
+    return record if level > 0 else (record[0], record[0], record[1], record[1], record[1], 1)
+
+
+def _merge(p, level, record):
+    """ Adds a record of `level` to the incomplete aggregate `p` of the level above (None for a new one) """
+
+    first, last, lo, hi, total, count = _summary(level, record)
+
+    if p is None:
+        p = [first, last, lo, hi, total, count, 0]
+    else:
+        p[1] = last
+        p[2] = min(p[2], lo)
+        p[3] = max(p[3], hi)
+        p[4] += total
+        p[5] += count
+
+    p[6] += 1
+
+    return p
+
+
+class _Tag:
+
+    def __init__(self, factor, max_levels):
+        self.factor     = factor
+        self.max_levels = max_levels
+
+        self.buffers  = [array('d')]   # records waiting to be written, per level
+        self.partial  = []             # incomplete aggregate, per level > 0
+
+    def _push(self, level, record):
+        while len(self.buffers) <= level:
+            self.buffers.append(array('d'))
+
+        self.buffers[level].extend(record)
+
+        if level + 1 > self.max_levels:
+            return
+
+        if len(self.partial) < level + 1:
+            self.partial.append(None)
+
+        p = self.partial[level] = _merge(self.partial[level], level, record)
+
+        if p[6] == self.factor:
+            self.partial[level] = None
+            self._push(level + 1, p[:6])
+
+    def add(self, step, value):
+        self._push(0, (step, value))
+
+    def resume(self, pending):
+        """ Rebuilds the incomplete aggregates from the records of each level not yet summarized above """
+
+        self.partial = []
+
+        for level, records in enumerate(pending[:self.max_levels]):
+            p = None
+            for record in records:
+                p = _merge(p, level, record)
+
+            self.partial.append(p)
+
+
+class PyramidWriter:
+    """ Maintains the pyramids of every tag logged by a run """
+
+    def __init__(self, directory, factor=16, max_levels=8, flush_every=4096):
+        self.directory   = directory
+        self.factor      = factor
+        self.max_levels  = max_levels
+        self.flush_every = flush_every
+
+        self._tags    = {}
+        self._pending = 0
+
+        os.makedirs(directory, mode=0o775, exist_ok=True)
+
+    def _counts(self, tag):
+        """ Records in each level of `tag` on disk, cut to whole records (a crash can leave a partial one) """
+
+        counts = []
+
+        for level in range(self.max_levels + 1):
+            path = _file(self.directory, tag, level)
+            if not os.path.exists(path):
+                break
+
+            size = 8 * _width(level)
+            n    = os.path.getsize(path) // size
+
+            if os.path.getsize(path) != n * size:
+                os.truncate(path, n * size)
+
+            counts.append(n)
+
+        return counts
+
+    def _records(self, tag, level, start, stop):
+        width = _width(level)
+        data  = array('d')
+
+        with open(_file(self.directory, tag, level), 'rb') as f:
+            f.seek(8 * width * start)
+            data.fromfile(f, width * (stop - start))
+
+        return [tuple(data[i:i + width]) for i in range(0, len(data), width)]
+
+    def _consistent(self, tag, counts):
+        """ Whether every level summarizes all but fewer than `factor` records of the one below """
+
+        if any(os.path.exists(_file(self.directory, tag, level))
+               for level in range(len(counts) + 1, self.max_levels + 1)):
+            return False
+
+        above = counts[1:] + [0]
+
+        return all(0 <= n - m * self.factor < self.factor
+                   for n, m in zip(counts[:self.max_levels], above))
+
+    def _open(self, tag):
+        """ The state of `tag`, picking up the files of an earlier attempt of the run """
+
+        t      = _Tag(self.factor, self.max_levels)
+        counts = self._counts(tag)
+
+        if self._consistent(tag, counts):
+            above = counts[1:] + [0]
+            t.resume([self._records(tag, level, m * self.factor, n)
+                      for level, (n, m) in enumerate(zip(counts[:self.max_levels], above))])
+            return t
+
+        # a crash between writing two levels: rebuild the upper ones from level 0
+        for level in range(1, self.max_levels + 1):
+            if os.path.exists(_file(self.directory, tag, level)):
+                os.remove(_file(self.directory, tag, level))
+
+        for step, value in self._records(tag, 0, 0, counts[0]) if counts else []:
+            t.add(step, value)
+
+        t.buffers[0] = array('d')
+
+        return t
+
+    def add(self, tag, step, value):
+        if tag not in self._tags:
+            self._tags[tag] = self._open(tag)
+
+        self._tags[tag].add(float(step), float(value))
+
+        self._pending += 1
+        if self._pending >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        for tag, t in self._tags.items():
+            for level, buffer in enumerate(t.buffers):
+                if len(buffer) == 0:
+                    continue
+
+                with open(_file(self.directory, tag, level), 'ab') as f:
+                    buffer.tofile(f)
+
+                t.buffers[level] = array('d')
+
+            tail = {level: p[:6] for level, p in enumerate(t.partial) if p is not None}
+            tmp  = _tail_file(self.directory, tag) + '.tmp'
+
+            with open(tmp, 'w') as f:
+                json.dump(dict(factor=self.factor, tail=tail), f)
+
+            os.replace(tmp, _tail_file(self.directory, tag))
+
+        self._pending = 0
+
+
+def tags(directory):
+    if not os.path.isdir(directory):
+        return []
+
+    return sorted({unquote(name.rsplit('.', 2)[0]) for name in os.listdir(directory)
+                   if name.endswith('.0.bin')})
+
+
+def levels(directory, tag):
+    n = 0
+    while os.path.exists(_file(directory, tag, n)):
+        n += 1
+
+    return n
+
+
+def load_level(directory, tag, level):
+    """ Records of `level` as a dict of arrays, level 0 as `first`/`last` = step, `min`/`max`/`sum` = value """
+
+    import numpy as np
+
+    path = _file(directory, tag, level)
+    data = np.memmap(path, dtype='<f8', mode='r') if os.path.getsize(path) else np.empty(0)
+    data = data.reshape(-1, _width(level))
+
+    if level == 0:
+        step, value = data[:, 0], data[:, 1]
+        records = np.stack([step, step, value, value, value, np.ones(len(step))], axis=1)
+    else:
+        records = np.asarray(data)
+
+    try:
+        with open(_tail_file(directory, tag)) as f:
+            tail = json.load(f)['tail'].get(str(level - 1)) if level > 0 else None
+    except (OSError, ValueError):
+        tail = None
+
+    if tail is not None:
+        records = np.vstack([records, [tail]])
+
+    return {k: records[:, i] for i, k in enumerate(FIELDS)}
+
+
+def query(directory, tag, start=None, stop=None, max_points=1000):
+    """ Summary of `tag` over the steps [start, stop] in at most about `max_points` records.
+
+    Returns the chosen level and arrays `first`, `last`, `min`, `max`, `mean`.
+    """
+
+    import numpy as np
+
+    chosen = None
+
+    # from the coarsest level down, stop before the first one with too many records
+    for level in reversed(range(levels(directory, tag))):
+        rec  = load_level(directory, tag, level)
+        keep = np.ones(len(rec['first']), dtype=bool)
+
+        if start is not None:
+            keep &= rec['last'] >= start
+        if stop is not None:
+            keep &= rec['first'] <= stop
+
+        if (chosen is not None) and (keep.sum() > max_points):
+            break
+
+        chosen = (level, {k: v[keep] for k, v in rec.items()})
+
+    if chosen is None:
+        return None
+
+    level, rec = chosen
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rec['mean'] = rec['sum'] / rec['count']
+
+    return dict(level=level, **{k: rec[k] for k in ('first', 'last', 'min', 'max', 'mean')})
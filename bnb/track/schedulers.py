@@ -0,0 +1,168 @@
+import bisect
+import math
+import statistics
+import threading
+from collections import defaultdict
+
+
+class Decision:
+    CONTINUE = 'CONTINUE'
+    STOP     = 'STOP'
+
+
+class Scheduler:
+    """ Decides, from intermediate values of `metric` reported with `log_scalar`,
+    whether a run should keep going.
+
+    Parameters
+    ----------
+    metric : str
+        tag passed to `log_scalar`
+    mode : str
+        'max' if higher values are better, 'min' otherwise
+    """
+
+    def __init__(self, metric, mode='max'):
+        assert mode in {'min', 'max'}
+
+        self.metric = metric
+        self.mode   = mode
+
+        self._lock = threading.Lock()
+
+    def _score(self, value):
+        return value if self.mode == 'max' else -value
+
+    def on_result(self, ID, step, value):
+        with self._lock:
+            return self._on_result(ID, step, self._score(value))
+
+    def _on_result(self, ID, step, score):
+        raise NotImplementedError
+
+    def on_finished(self, ID):
+        pass
+
+
+class ASHA(Scheduler):
+    """ Asynchronous successive halving (Li et al., 2018), stopping variant.
+
+    Rungs are placed at `min_step * reduction_factor ** k`. When a run reaches a
+    rung it is stopped unless its value is in the top `1 / reduction_factor`
+    of the values recorded at that rung so far.
+    """
+
+    def __init__(self, metric, mode='max',
+                 min_step=1, max_step=None, reduction_factor=3):
+        super().__init__(metric, mode)
+
+        assert reduction_factor > 1
+
+        self.reduction_factor = reduction_factor
+        self.rungs            = []
+
+        max_step = max_step or min_step * reduction_factor ** 16
+        step     = min_step
+
+        while step < max_step:
+            self.rungs.append(step)
+            step *= reduction_factor
+
+        self._recorded = [[] for _ in self.rungs]
+        self._next     = defaultdict(int)
+        self._finished = set()
+
+    def _cutoff(self, recorded):
+        if len(recorded) < self.reduction_factor:
+            return None
+
+        ranked = sorted(recorded, reverse=True)
+        k      = max(1, int(math.floor(len(ranked) / self.reduction_factor)))
+
+        return ranked[k - 1]
+
+    def _on_result(self, ID, step, score):
+        decision = Decision.CONTINUE
+
+        # an update that arrives after the run finished must not enter the rungs again
+        if ID in self._finished:
+            return decision
+
+        while (self._next[ID] < len(self.rungs)) and (step >= self.rungs[self._next[ID]]):
+            rung     = self._next[ID]
+            recorded = self._recorded[rung]
+
+            recorded.append(score)
+            self._next[ID] += 1
+
+            cutoff = self._cutoff(recorded)
+            if (cutoff is not None) and (score < cutoff):
+                decision = Decision.STOP
+                break
+
+        return decision
+
+    def on_finished(self, ID):
+        with self._lock:
+            self._next.pop(ID, None)
+            self._finished.add(ID)
+
+
+class MedianStopping(Scheduler):
+    """ Median stopping rule (Golovin et al., 2017).
+
+    After `grace_steps`, a run is stopped if its best value so far is worse
+    than the median of the other runs' running averages at the same step.
+
+    Each run keeps its steps and the cumulative sums of its values, so a
+    running average is a binary search rather than a pass over the history.
+    """
+
+    def __init__(self, metric, mode='max', grace_steps=0, min_runs=3):
+        super().__init__(metric, mode)
+
+        self.grace_steps = grace_steps
+        self.min_runs    = min_runs
+
+        # ID -> (steps, scores, cumulative sums of scores), ordered by step
+        self._history = defaultdict(lambda: ([], [], []))
+        self._best    = {}
+
+    def _add(self, ID, step, score):
+        steps, scores, sums = self._history[ID]
+
+        # steps usually arrive in order; a late one is inserted and the sums after it redone
+        i = bisect.bisect_right(steps, step)
+        steps.insert(i, step)
+        scores.insert(i, score)
+        sums.insert(i, 0)
+
+        for j in range(i, len(sums)):
+            sums[j] = (sums[j - 1] if j else 0) + scores[j]
+
+        self._best[ID] = max(score, self._best.get(ID, score))
+
+    def _running_average(self, ID, step):
+        steps, _, sums = self._history[ID]
+
+        n = bisect.bisect_right(steps, step)
+        return (sums[n - 1] / n) if n else None
+
+    def _on_result(self, ID, step, score):
+        self._add(ID, step, score)
+
+        if step < self.grace_steps:
+            return Decision.CONTINUE
+
+        others = [self._running_average(other, step) for other in self._history if other != ID]
+        others = [a for a in others if a is not None]
+
+        if len(others) < self.min_runs:
+            return Decision.CONTINUE
+
+        best = self._best[ID]
+
+        if best < statistics.median(others):
+            return Decision.STOP
+
+        return Decision.CONTINUE
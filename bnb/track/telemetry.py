@@ -0,0 +1,169 @@
+import json
+import logging
+import os
+import platform
+import socket
+import threading
+import time
+from array import array
+
+FIELDS = ('time', 'cpu', 'rss', 'threads', 'read_bytes', 'write_bytes')
+
+_TICKS = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+_PAGE  = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def host_info():
+    info = dict(hostname=socket.gethostname(),
+                platform=platform.platform(),
+                python=platform.python_version(),
+                cpu_count=os.cpu_count(),
+                pid=os.getpid())
+
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemTotal:'):
+                    info['mem_total'] = int(line.split()[1]) * 1024
+                    break
+
+    except OSError:
+        pass
+
+    return info
+
+
+def _read_stat(pid):
+    with open(f'/proc/{pid}/stat') as f:
+        # the command name may contain spaces, fields are counted after its closing paren
+        fields = f.read().rsplit(')', 1)[1].split()
+
+    utime, stime = int(fields[11]), int(fields[12])
+    threads      = int(fields[17])
+    rss          = int(fields[21]) * _PAGE
+
+    return (utime + stime) / _TICKS, rss, threads
+
+
+def _read_io(pid):
+    io = {}
+
+    try:
+        with open(f'/proc/{pid}/io') as f:
+            for line in f:
+                k, v = line.split(':')
+                io[k] = int(v)
+
+    except OSError:
+        pass
+
+    return io.get('read_bytes', 0), io.get('write_bytes', 0)
+
+
+class ResourceSampler:
+    """ Samples CPU%, RSS, thread count and disk I/O of a process from /proc.
+
+    Samples are kept in one `array('d')` per field, so a long run costs
+    48 bytes per sample.
+    """
+
+    def __init__(self, pid=None, interval=5.0):
+        self.pid      = pid or os.getpid()
+        self.interval = interval
+        self.series   = {k: array('d') for k in FIELDS}
+
+        self._stop   = threading.Event()
+        self._thread = None
+        self._last   = None
+
+        self._logger = logging.getLogger(self.__class__.__name__)
+
+    def _sample(self):
+        now               = time.time()
+        cpu, rss, threads = _read_stat(self.pid)
+        read, write       = _read_io(self.pid)
+
+        if self._last is None:
+            percent = 0.0
+        else:
+            t, c    = self._last
+            percent = 100 * (cpu - c) / max(now - t, 1e-6)
+
+        self._last = (now, cpu)
+
+        for k, v in zip(FIELDS, (now, percent, rss, threads, read, write)):
+            self.series[k].append(v)
+
+    def _work(self):
+        while True:
+            try:
+                self._sample()
+            except (OSError, IndexError, ValueError) as e:
+                self._logger.debug(f'Sampling failed: {e}')
+                break
+
+            if self._stop.wait(self.interval):
+                break
+
+    def start(self):
+        self._thread = threading.Thread(target=self._work, daemon=True)
+        self._thread.start()
+
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+        if self._thread is not None:
+            self._thread.join()
+
+        try:
+            self._sample()
+        except (OSError, IndexError, ValueError):
+            pass
+
+        return self.summary()
+
+    def summary(self):
+        s = self.series
+        n = len(s['time'])
+
+        if n == 0:
+            return {}
+
+        cpu = s['cpu'][1:] or s['cpu']
+
+        return dict(samples=n,
+                    peak_rss=max(s['rss']),
+                    mean_cpu=sum(cpu) / len(cpu),
+                    peak_cpu=max(cpu),
+                    max_threads=int(max(s['threads'])),
+                    read_bytes=s['read_bytes'][-1] - s['read_bytes'][0],
+                    write_bytes=s['write_bytes'][-1] - s['write_bytes'][0])
+
+    def save(self, path):
+        """ Header line with field names and sample count, then one float64 column per field """
+
+        n = len(self.series['time'])
+
+        with open(path, 'wb') as f:
+            f.write((json.dumps(dict(fields=FIELDS, samples=n)) + '\n').encode())
+
+            for k in FIELDS:
+                self.series[k].tofile(f)
+
+        return path
+
+
+def load_series(path):
+    with open(path, 'rb') as f:
+        header = json.loads(f.readline().decode())
+        n      = header['samples']
+        series = {}
+
+        for k in header['fields']:
+            a = array('d')
+            a.fromfile(f, n)
+            series[k] = a
+
+    return series
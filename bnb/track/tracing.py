@@ -0,0 +1,70 @@
+import json
+import os
+import socket
+import time
+from contextlib import contextmanager
+
+_HOST = socket.gethostname()
+
+
+def make_span(name, start, stop=None, **args):
+    """ A lifecycle span of a run: `name` took place between `start` and `stop` (seconds since epoch) """
+
+    stop = time.time() if stop is None else stop
+
+    return dict(name=name, ts=start, dur=max(stop - start, 0.0),
+                host=_HOST, pid=os.getpid(), args=args)
+
+
+@contextmanager
+def span(name, record, **args):
+    """ Times the enclosed block and passes the span to `record` """
+
+    t0 = time.time()
+
+    try:
+        yield
+    finally:
+        record(make_span(name, t0, **args))
+
+
+def chrome_trace(entries):
+    """ Builds a Chrome / Perfetto trace (JSON object format) out of the spans of `entries`.
+
+    Every (host, process) that recorded spans becomes a trace process and
+    every run a thread, so a whole sweep can be inspected on one timeline.
+    """
+
+    events = []
+    pids   = {}
+
+    for tid, entry in enumerate(entries, start=1):
+        ID   = entry['ID']
+        used = set()
+
+        for s in entry.get('trace', []):
+            key = (s['host'], s['pid'])
+
+            if key not in pids:
+                pids[key] = len(pids) + 1
+                events.append(dict(ph='M', name='process_name', pid=pids[key],
+                                   args=dict(name=f'{s["host"]}:{s["pid"]}')))
+
+            used.add(pids[key])
+            events.append(dict(ph='X', name=s['name'], cat='bnb',
+                               ts=s['ts'] * 1e6, dur=s['dur'] * 1e6,
+                               pid=pids[key], tid=tid,
+                               args=dict(s.get('args', {}), ID=ID)))
+
+        for pid in used:
+            events.append(dict(ph='M', name='thread_name', pid=pid, tid=tid,
+                               args=dict(name=ID[:8])))
+
+    return dict(traceEvents=events, displayTimeUnit='ms')
+
+
+def save_chrome_trace(entries, path):
+    with open(path, 'w') as f:
+        json.dump(chrome_trace(entries), f)
+
+    return path
@@ -11,12 +11,15 @@ class States:
     DEAD          = 'DEAD'
     SIGINT        = 'SIGINT'
     RUNNING       = 'RUNNING'
+    TIMEOUT       = 'TIMEOUT'
+    CANCELLED     = 'CANCELLED'
+    EARLY_STOP    = 'EARLY_STOP'
     PRE_DISPATCH  = 'PRE_DISPATCH'
 
 
 def _nested_update(collection, *path, value, mode='replace'):
 
-    assert mode in {'replace', 'append'}
+    assert mode in {'replace', 'append', 'extend'}
 
     root      = collection
     path, key = path[:-1], path[-1]
@@ -32,6 +35,11 @@ def _nested_update(collection, *path, value, mode='replace'):
             root[key] = []
         root[key].append(value)
 
+    elif mode == 'extend':
+        if key not in root:
+            root[key] = []
+        root[key].extend(value)
+
 
 def _capture_config(f, args, kwargs):
     argspec = inspect.getfullargspec(f)
@@ -5,8 +5,6 @@ from contextlib import contextmanager
 from pathlib import Path
 from typing import *
 
-import git
-
 
 @contextmanager
 def chdir(path):
@@ -42,6 +40,8 @@ def caller_git_info(filename=None):
     if os.path.basename(filename).startswith('<ipython'):
         filename = os.path.dirname(filename)
 
+    import git
+
     try:
         git_repo = git.Repo(filename, search_parent_directories=True)
         git_root = git_repo.git.rev_parse("--show-toplevel")
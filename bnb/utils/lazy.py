@@ -0,0 +1,34 @@
+import importlib
+
+
+def lazy_getattr(package, attrs, modules=()):
+    """ Builds a module-level `__getattr__` (PEP 562) for `package`
+
+    Parameters
+    ----------
+    package : str
+        `__name__` of the package the hook is installed in
+    attrs : Dict[str, Tuple[str, str]]
+        maps attribute name to (relative module, attribute in that module)
+    modules : Iterable[str]
+        names of submodules that should be importable as attributes
+    """
+
+    modules = set(modules)
+
+    def __getattr__(name):
+        if name in attrs:
+            module, attr = attrs[name]
+            value = getattr(importlib.import_module(module, package), attr)
+
+        elif name in modules:
+            value = importlib.import_module(f'.{name}', package)
+
+        else:
+            raise AttributeError(f'module {package!r} has no attribute {name!r}')
+
+        importlib.import_module(package).__dict__[name] = value
+
+        return value
+
+    return __getattr__
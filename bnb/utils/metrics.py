@@ -0,0 +1,235 @@
+""" In-process metrics, exposed in the Prometheus text format.
+
+See: https://prometheus.io/docs/instrumenting/exposition_formats/
+"""
+
+import bisect
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_BUCKETS = (.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1., 2.5, 5., 10.)
+
+
+def _key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _fmt_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ''
+
+    body = ','.join('{}="{}"'.format(k, str(v).replace('\\', r'\\').replace('"', r'\"'))
+                    for k, v in pairs)
+
+    return '{' + body + '}'
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help=''):
+        self.name = name
+        self.help = help
+
+        self._lock   = threading.Lock()
+        self._values = {}
+
+    def remove(self, **labels):
+        with self._lock:
+            self._values.pop(_key(labels), None)
+
+    def _samples(self):
+        with self._lock:
+            return list(self._values.items())
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}']
+
+        for key, value in self._samples():
+            lines.append(f'{self.name}{_fmt_labels(key)} {float(value)!r}')
+
+        return lines
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        k = _key(labels)
+
+        with self._lock:
+            self._values[k] = self._values.get(k, 0) + amount
+
+    def get(self, **labels):
+        return self._values.get(_key(labels), 0)
+
+
+class Gauge(_Metric):
+    """ Either set explicitly or computed by a callback at scrape time """
+
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[_key(labels)] = value
+
+    def set_function(self, fn, **labels):
+        with self._lock:
+            self._values[_key(labels)] = fn
+
+    def get(self, **labels):
+        value = self._values.get(_key(labels), 0)
+        return value() if callable(value) else value
+
+    def _samples(self):
+        samples = []
+
+        for key, value in super()._samples():
+            if callable(value):
+                try:
+                    value = value()
+                except Exception as e:
+                    logging.getLogger(self.__class__.__name__).debug(f'{self.name}: {e}')
+                    continue
+
+            samples.append((key, value))
+
+        return samples
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help='', buckets=_BUCKETS):
+        super().__init__(name, help)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        k = _key(labels)
+
+        with self._lock:
+            if k not in self._values:
+                self._values[k] = [[0] * (len(self.buckets) + 1), 0.0]
+
+            counts, _ = self._values[k]
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._values[k][1] += value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}']
+
+        with self._lock:
+            samples = [(k, list(counts), total) for k, (counts, total) in self._values.items()]
+
+        for key, counts, total in samples:
+            cumulative = 0
+
+            for le, c in zip(self.buckets + (float('inf'), ), counts):
+                cumulative += c
+                le = '+Inf' if le == float('inf') else repr(le)
+                lines.append(f'{self.name}_bucket{_fmt_labels(key, [("le", le)])} {cumulative}')
+
+            lines.append(f'{self.name}_sum{_fmt_labels(key)} {total!r}')
+            lines.append(f'{self.name}_count{_fmt_labels(key)} {cumulative}')
+
+        return lines
+
+
+class Registry:
+
+    def __init__(self):
+        self._lock    = threading.Lock()
+        self._metrics = {}
+
+    def _goc(self, cls, name, *args, **kwargs):
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = cls(name, *args, **kwargs)
+
+            metric = self._metrics[name]
+
+        assert isinstance(metric, cls), f'{name} is already registered as a {metric.kind}'
+
+        return metric
+
+    def counter(self, name, help=''):
+        return self._goc(Counter, name, help)
+
+    def gauge(self, name, help=''):
+        return self._goc(Gauge, name, help)
+
+    def histogram(self, name, help='', buckets=_BUCKETS):
+        return self._goc(Histogram, name, help, buckets)
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+
+        lines = []
+        for m in metrics:
+            lines.extend(m.render())
+
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+
+        body = self.server.registry.render().encode()
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logging.getLogger('MetricsServer').debug(format % args)
+
+
+class MetricsServer:
+    """ Serves `registry` at http://host:port/metrics from a daemon thread """
+
+    def __init__(self, port=9464, host='127.0.0.1', registry=REGISTRY):
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.registry       = registry
+
+        self._thread = None
+
+    @property
+    def port(self):
+        return self._server.server_address[1]
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+_SERVERS = {}
+_SERVERS_LOCK = threading.Lock()
+
+
+def serve_metrics(port=9464, host='127.0.0.1'):
+    """ Starts (once per address) the endpoint for the process-wide registry """
+
+    with _SERVERS_LOCK:
+        if (host, port) not in _SERVERS:
+            _SERVERS[(host, port)] = MetricsServer(port, host).start()
+
+        return _SERVERS[(host, port)]
@@ -1,7 +1,7 @@
 from collections import namedtuple
 from typing import Union
 
-from bnb.defaults import Tables, goc_db
+from bnb.defaults import Tables, db_lock, goc_db
 
 DEFAULT_VERSION = '0.0.0.1'
 
@@ -84,4 +84,5 @@ def bump_version(name, commit, part=None) -> Version:
 
 
 def get_version(name, commit=None) -> str:
-    return str(bump_version(name=   name, commit=commit, part=None))
+    with db_lock(name=name):
+        return str(bump_version(name=   name, commit=commit, part=None))
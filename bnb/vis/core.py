@@ -1,12 +1,23 @@
 import datetime
+import json
 import os
-from typing import List, Iterable, Tuple
+from typing import Dict, List, Iterable, Tuple
 
+import numpy as np
 import pandas as pd
-from collections import defaultdict, Callable, namedtuple
+from collections import defaultdict, namedtuple
+from collections.abc import Callable
 
+from bnb.track.arrays import ArrayLog, tags as array_tags
+from bnb.track.profiler import hot_functions, load_profile
+from bnb.track.telemetry import load_series
+from bnb.track.tracing import chrome_trace, save_chrome_trace
 from bnb.track.utils import States
-from ..defaults import get_root, goc_db, goc_queue
+from . import plan, snapshot
+from .dash import Dashboard, export_tensorboard
+from .curves import Curves, aggregate, bucket, flatten, interpolate
+from ..defaults import get_root, goc_db, goc_queue, goc_storage_path
+from ..defaults.retention import load_archived_logs
 
 import ast
 
@@ -30,10 +41,74 @@ def avail() -> List[str]:
     return ret
 
 
-def get(name: str) -> 'Results':
-    db = goc_db(name=name)
+def get(name: str, status=None, tags=None, version=None, commit=None,
+        since=None, until=None, columns=None, snapshot=True) -> 'Results':
+    """ Opens the runs of experiment `name`, filtered by the run store.
 
-    return Results(db=db, name=name)
+    Parameters
+    ----------
+    status : str or Iterable[str], optional
+        keep runs in one of these states, e.g. `States.OK`
+    tags : Iterable[str], optional
+        keep runs carrying all of these tags
+    version : str or Iterable[str], optional
+        keep runs of these experiment versions, e.g. `'0.0.1.3'`
+    commit : str, optional
+        keep runs whose commit hash starts with `commit`
+    since, until : float or datetime, optional
+        keep runs started in [since, until)
+    columns : Iterable[str or Tuple[str, str]], optional
+        groups (`'results'`) or single columns (`('config', 'lr')`) to load,
+        `details` are always loaded
+    snapshot : bool
+        without filters, load through the columnar snapshot next to the
+        run store (see `bnb.vis.snapshot`, needs `pyarrow`)
+    """
+
+    db    = goc_db(name=name)
+    query = _build_query(status=status, tags=tags, version=version, commit=commit,
+                         since=since, until=until)
+
+    return Results(db=db, name=name, query=query, columns=columns, snapshot=snapshot)
+
+
+def _timestamp(t):
+    return t.timestamp() if isinstance(t, datetime.datetime) else t
+
+
+def _build_query(status=None, tags=None, version=None, commit=None, since=None, until=None):
+    from tinydb import where
+
+    conds = []
+
+    if status is not None:
+        conds.append(where('status').one_of([status] if isinstance(status, str) else list(status)))
+
+    if tags:
+        tags = set(tags)
+        conds.append(where('rich_id')['tags'].test(lambda assigned: tags <= set(assigned)))
+
+    if version is not None:
+        versions = [version] if isinstance(version, str) else list(version)
+        conds.append(where('rich_id')['version'].one_of(versions))
+
+    if commit is not None:
+        conds.append(where('rich_id')['commit'].test(lambda c: str(c).startswith(commit)))
+
+    if since is not None:
+        conds.append(where('timing')['start'] >= _timestamp(since))
+
+    if until is not None:
+        conds.append(where('timing')['start'] < _timestamp(until))
+
+    if not conds:
+        return None
+
+    query = conds[0]
+    for c in conds[1:]:
+        query &= c
+
+    return query
 
 
 TimeInfo = namedtuple('Time', ('hours', 'mins', 'secs'))
@@ -49,14 +124,44 @@ def _from_timestamp(t: int) -> str:
 
 
 class Results:
-    def __init__(self, db, df=None, name=None) -> None:
+    """ A selection of runs.
+
+    Filters, sorting and projections are recorded in a lazy plan (see
+    `bnb.vis.plan`) over a frame shared by every derived `Results`. The
+    frame is copied once, the first time `df` is read.
+    """
+
+    _GROUPS = ('rich_id', 'results', 'config', 'misc', 'logs', 'log_summary', 'telemetry')
+
+    def __init__(self, db, df=None, name=None, query=None, columns=None, snapshot=False) -> None:
         self.db = db
         self.name = name
 
+        self._query     = query
+        self._projected = self._projection(columns)
+        self._snapshot  = snapshot
+
         if df is None:
-            self.df = self._extract_df()  # type: pd.DataFrame
+            df = self._extract_df()
         else:
-            self.df = df.copy()  # type: pd.DataFrame
+            df = df.copy()
+
+        self._base = df  # type: pd.DataFrame
+        self._plan = ()
+        self._df   = df  # type: pd.DataFrame
+
+    @property
+    def df(self) -> pd.DataFrame:
+        if self._df is None:
+            self._df = plan.execute(self._base, self._plan)
+
+        return self._df
+
+    @df.setter
+    def df(self, df):
+        self._base = df
+        self._plan = ()
+        self._df   = df
 
     def __repr__(self):
         return self.df.__repr__()
@@ -64,22 +169,76 @@ class Results:
     def __str__(self):
         return f'{self.__class__.__name__}({self.name}) [{self.df.shape[0]} entries]'
 
+    def __len__(self):
+        return self.df.shape[0]
+
     def __getitem__(self, index):
-        df = self.df.iloc[index]
-        return self._from_self(df)
+        return self._then(plan.Take(index))
 
     def _perhaps_extract(self, v):
+        if not isinstance(v, str):
+            return v
+
         try: 
             v = ast.literal_eval(v)
         except:
-            pass
-        
+            return v
+
+        if not isinstance(v, (str, int, float, bool, type(None))):
+            # tuples, sets, int keys...: the types a JSON round trip (the run store,
+            # the snapshot) gives back, so that every path yields the same cells
+            v = json.loads(json.dumps(v, default=str))
+
         return v
 
+    def _projection(self, columns):
+        """ Maps each group to load onto the keys to keep (`None` for all of them) """
+
+        if columns is None:
+            return {g: None for g in self._GROUPS}
+
+        projection = {}
+        for c in columns:
+            if isinstance(c, str):
+                projection[c] = None
+
+            elif projection.get(c[0], ()) is not None:
+                projection[c[0]] = projection.get(c[0], ()) + (c[1], )
+
+        return projection
+
+    def _entries(self):
+        if self._query is None:
+            return self.db.all()
+
+        # the table outlives this call (goc_db caches it) and its query cache is not
+        # invalidated by writes from other processes
+        self.db.clear_cache()
+
+        return self.db.search(self._query)
+
     def _extract_df(self) -> pd.DataFrame:
 
-        entries = self.db.all()
-        rows    = []
+        if self._snapshot and (self._query is None) and (self.name is not None):
+            df = snapshot.load(self.name, self.db, build_frame=self._frame,
+                               groups=list(self._projected))
+
+            if df is not None:
+                return self._project(df)
+
+        return self._frame(self._entries(), self._projected)
+
+    def _project(self, df) -> pd.DataFrame:
+        keep = [c for c in df.columns
+                if (c[0] == 'details') or (c[0] in self._projected
+                                           and (self._projected[c[0]] is None or c[1] in self._projected[c[0]]))]
+
+        return df[keep] if len(keep) < len(df.columns) else df
+
+    def _frame(self, entries, projection=None) -> pd.DataFrame:
+
+        projection = projection or {g: None for g in self._GROUPS}
+        rows       = []
 
         for e in entries:
             row = {}
@@ -89,17 +248,23 @@ class Results:
             row[('details', 'start')]  = _from_timestamp(e['timing']['start'])
             row[('details', 'total')]  = (e['timing']['stop'] - e['timing']['start']) / 60
 
-            for group_name in ['rich_id', 'results', 'config', 'misc', 'logs']:
-                for k, v in e[group_name].items():
-                    
-                    row[(group_name, k)] = self._perhaps_extract(v)
+            for group_name, keep in projection.items():
+                group = e.get(group_name, {})
+
+                if group_name == 'logs' and not group and e.get('storage', {}).get('logs_archive'):
+                    group = self._archived_logs(e['storage']['logs_archive'])
+
+                for k in (group if keep is None else keep):
+                    if k in group:
+                        row[(group_name, k)] = self._perhaps_extract(group[k])
 
             rows.append(row)
 
+        # details are listed explicitly so that an empty selection still has columns
         keys = sorted(list({
             k for row in rows
             for k in row.keys()
-            }
+            } | {('details', k) for k in ('ID', 'status', 'start', 'total')}
         ))
 
         index = pd.MultiIndex.from_tuples(keys)
@@ -107,6 +272,13 @@ class Results:
 
         return df
 
+    @staticmethod
+    def _archived_logs(path):
+        try:
+            return load_archived_logs(path)
+        except (OSError, ValueError):
+            return {}
+
     def config(self):
         ret = self.df.config.to_dict('records')
         if len(ret) == 1:
@@ -119,18 +291,39 @@ class Results:
 
         return self
 
+    def _then(self, step) -> 'Results':
+        """ A `Results` sharing this one's frame, with `step` appended to the plan """
+
+        r = Results.__new__(Results)
+
+        r.db    = self.db
+        r.name  = self.name
+
+        r._query     = self._query
+        r._projected = self._projected
+        r._snapshot  = self._snapshot
+        r._base = self._base
+        r._plan = self._plan + (step, )
+        r._df   = None
+
+        return r
+
     def _check_tags(self, tags: Iterable, f: Callable) -> 'Results':
-        
-        def _ok(row):
-            assigned = row.rich_id.tags
-            return f(assigned, tags)
 
-        df = self.df[self.df.apply(_ok, axis=1)]
+        def _ok(base, rows):
+            assigned = plan.column(base, rows, ('rich_id', 'tags'))
+            return [f(a, tags) for a in assigned]
 
-        return self._from_self(df)
+        return self._then(plan.Filter(_ok))
 
     def _from_self(self, df) -> 'Results':
-        return Results(db=self.db, df=df, name=self.name)
+        r = Results(db=self.db, df=df, name=self.name)
+
+        r._query     = self._query
+        r._projected = self._projected
+        r._snapshot  = self._snapshot
+
+        return r
 
     def has_all(self, *tags) -> 'Results':
         def _f(assigned, tags):
@@ -145,53 +338,70 @@ class Results:
         return self._check_tags(tags, _f)
 
     def top_k(self, metrics: Iterable[str] = None, k=5, ascending=False) -> 'Results':
-        results = self.df['results']
 
         if metrics is None:
-            metrics = list(results.columns)
+            metrics = [c for g, c in self._columns() if g == 'results']
 
         sort_by = [('results', c) for c in metrics]
-        df      = self.df.sort_values(by=sort_by, ascending=ascending).iloc[:k, :]
 
-        return self._from_self(df)
+        return self._then(plan.Sort(sort_by, ascending))._then(plan.Take(slice(None, k)))
 
     def only_ok(self, allowed=(States.OK, )) -> 'Results':
 
         if len(allowed) == 0:
             return self
 
-        cond = (self.df.details.status == allowed[0])
-        for status in allowed[1:]:
-            cond |= (self.df.details.status == status)
+        allowed = list(allowed)
 
-        df = self.df[cond]
+        def _ok(base, rows):
+            return np.isin(plan.column(base, rows, ('details', 'status')), allowed)
 
-        return self._from_self(df)
+        return self._then(plan.Filter(_ok))
 
     def no_details(self) -> 'Results':
-        df = self.df[['results', 'config']]
 
-        return self._from_self(df)
+        def _select(base, rows, columns):
+            return [c for group in ('results', 'config') for c in columns if c[0] == group]
+
+        return self._then(plan.Select(_select))
 
     def compare(self) -> 'Results':
 
-        # noinspection PyUnresolvedReferences
-        different = self.df['config'].nunique() > 1
+        def _select(base, rows, columns):
+            config = [c for c in columns if c[0] == 'config']
 
-        to_drop = different[different == False].index.values
-        to_drop = [('config', c) for c in to_drop]
+            # noinspection PyUnresolvedReferences
+            different = {c for c in config
+                         if pd.Series(plan.column(base, rows, c)).nunique() > 1}
 
-        df = self.df.drop(to_drop, axis=1)
+            return [c for c in columns if (c[0] != 'config') or (c in different)]
 
-        return self._from_self(df)
+        return self._then(plan.Select(_select))
+
+    def _columns(self):
+        """ Columns of `df` without materializing it, when the plan has no projections """
+
+        if all(isinstance(step, (plan.Filter, plan.Sort, plan.Take)) for step in self._plan):
+            return list(self._base.columns)
+
+        return list(self.df.columns)
 
     def extract_from_log(self, *columns, key, discard_steps=True) -> 'Results':
+        """ Reduces logged series to a single `results` column each.
+
+        `key` is a step index, a callable applied to the series, or one of
+        `count`, `sum`, `min`, `max`, `mean`, `first`, `last`. The latter are
+        exact even when `log_scalar` calls were decimated by a log policy.
+        """
 
         df = self.df.copy()
 
         if len(columns) == 0:
             columns = list(df['logs'].columns)
 
+        if isinstance(key, str):
+            return self._extract_summary(df, columns, key)
+
         if isinstance(key, Callable):
             suffix = f'_{key.__name__}'
             extract = key
@@ -215,8 +425,176 @@ class Results:
 
         return self._from_self(df)
 
-    def dash(self):
-        pass
+    def _extract_summary(self, df, columns, key) -> 'Results':
+        reduce = dict(count=len, sum=sum, min=min, max=max,
+                      mean=lambda v: sum(v) / len(v), first=lambda v: v[0], last=lambda v: v[-1])
+
+        if key not in reduce:
+            raise ValueError(f'Unknown summary {key!r}, expected one of {sorted(reduce)}')
+
+        def fn(row, c):
+            summary = row.get(('log_summary', c))
+            if isinstance(summary, dict) and (key in summary):
+                return summary[key]
+
+            # Runs recorded without summaries, fall back to the stored points
+            item = row.get(('logs', c))
+            if not isinstance(item, Iterable) or len(item) == 0:
+                return None
+
+            return reduce[key]([value for step, value in item])
+
+        for c in columns:
+            df[('results', f'{c}_{key}')] = df.apply(lambda row: fn(row, c), axis=1)
+
+        return self._from_self(df)
+
+    def curves(self, tag, steps=None, n_steps=200, how='interpolate', width=None) -> Curves:
+        """ The `tag` curves of all selected runs aligned on common steps, as a (runs x steps) array.
+
+        Parameters
+        ----------
+        steps : array-like, optional
+            steps to interpolate at; by default `n_steps` evenly spaced over the logged range
+        how : str
+            `'interpolate'` (linear, NaN outside a run's range) or `'bucket'`
+            (mean of the points in each bucket of `width` steps)
+        """
+
+        df = self.df
+        run, step, value = flatten(df[('logs', tag)] if ('logs', tag) in df.columns else [])
+
+        IDs    = df[('details', 'ID')].to_numpy()
+        n_runs = len(df)
+
+        if len(step) == 0:
+            return Curves(np.empty(0), np.full((n_runs, 0), np.nan), IDs)
+
+        if how == 'interpolate':
+            grid = np.linspace(step.min(), step.max(), n_steps) if steps is None else np.asarray(steps)
+            return Curves(grid, interpolate(run, step, value, n_runs, grid), IDs)
+
+        if how == 'bucket':
+            width = width or max((step.max() - step.min() + 1) / n_steps, 1)
+            grid, values = bucket(run, step, value, n_runs, width, start=step.min())
+            return Curves(grid, values, IDs)
+
+        raise ValueError(f"Unknown alignment {how!r}, expected 'interpolate' or 'bucket'")
+
+    def aggregate_curves(self, tag, by=(), stats=('mean', 'std'), quantiles=(), ddof=1,
+                         **kwargs) -> pd.DataFrame:
+        """ Statistics of the aligned `tag` curves across runs sharing the `by` config values (e.g. seeds).
+
+        Rows are (group, stat), columns the aligned steps; `kwargs` go to `curves`.
+        `std` is the sample standard deviation (`ddof=1`), NaN for groups of one run.
+        """
+
+        aligned = self.curves(tag, **kwargs)
+
+        groups = self.df[[('config', c) for c in by]]
+        groups.columns = list(by)
+
+        agg = aggregate(aligned.values, groups, stats=stats, quantiles=quantiles, ddof=ddof)
+        agg.columns = aligned.steps
+
+        return agg
+
+    def telemetry(self, index=0) -> pd.DataFrame:
+        """ Resource usage time series of the `index`-th run (CPU%, RSS, threads, I/O) """
+
+        path = self._storage_path(self.df[('details', 'ID')].iloc[index],
+                                  self.df[('telemetry', 'series')].iloc[index])
+        df   = pd.DataFrame({k: list(v) for k, v in load_series(path).items()})
+
+        df['time'] = pd.to_datetime(df['time'], unit='s')
+
+        return df.set_index('time')
+
+    def arrays(self, tag) -> Dict[str, ArrayLog]:
+        """ `log_histogram` / `log_array` records of `tag`, as a lazy `ArrayLog` per run ID """
+
+        if ('misc', 'arrays') not in self.df.columns:
+            return {}
+
+        df   = self.df[self.df[('misc', 'arrays')].notnull()]
+        logs = {}
+
+        for ID, directory in zip(df[('details', 'ID')], df[('misc', 'arrays')]):
+            directory = self._storage_path(ID, directory)
+
+            if tag in array_tags(directory):
+                logs[ID] = ArrayLog(directory, tag)
+
+        return logs
+
+    def hot_functions(self, top=20, by_version=False) -> pd.DataFrame:
+        """ Top functions by sampled time, aggregated over the profiled runs in this selection.
+
+        Runs are profiled with `Experiment(..., profile=interval)`. With `by_version`,
+        functions are ranked separately for each version of the experiment.
+        """
+
+        if ('misc', 'profile') not in self.df.columns:
+            return pd.DataFrame()
+
+        df     = self.df[self.df[('misc', 'profile')].notnull()]
+        groups = df.groupby(('rich_id', 'version')) if by_version else [(None, df)]
+        frames = []
+
+        for version, group in groups:
+            profiles = [load_profile(self._storage_path(ID, p))
+                        for ID, p in zip(group[('details', 'ID')], group[('misc', 'profile')])]
+
+            frame = pd.DataFrame(hot_functions(profiles, top=top))
+            if by_version:
+                frame.insert(0, 'version', version)
+
+            frames.append(frame)
+
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    def chrome_trace(self, path=None):
+        """ Lifecycle spans of the selected runs as a Chrome / Perfetto trace.
+
+        Returns the trace dict, or writes it to `path` (open it in
+        chrome://tracing or ui.perfetto.dev) and returns the path.
+        """
+
+        IDs     = set(self.df[('details', 'ID')])
+        entries = [e for e in self._entries() if e['ID'] in IDs]
+
+        if path is None:
+            return chrome_trace(entries)
+
+        return save_chrome_trace(entries, path)
+
+    def _storage_path(self, ID, path):
+        """ Local path of a file run `ID` recorded relative to its storage (older runs recorded absolute paths) """
+
+        if os.path.isabs(path):
+            return path
+
+        return os.path.join(goc_storage_path(ID, self.name), path)
+
+    def _pyramids(self):
+        if ('misc', 'pyramids') not in self.df.columns:
+            return {}
+
+        df = self.df[self.df[('misc', 'pyramids')].notnull()]
+
+        return {ID: self._storage_path(ID, path) for ID, path in zip(df[('details', 'ID')], df[('misc', 'pyramids')])}
+
+    def dash(self, port=8050, host='127.0.0.1', max_points=1000) -> Dashboard:
+        """ Serves the logged scalars of the selected runs at http://host:port.
+
+        Plots are drawn from the pyramids of runs logged with `Experiment(..., pyramids=True)`,
+        never more than `max_points` records per run whatever the zoom. Call `.stop()` on the
+        result to shut it down.
+        """
+
+        return Dashboard(self._pyramids(), port=port, host=host, max_points=max_points).start()
+
+    def tb(self, logdir, max_points=1000) -> List[str]:
+        """ Exports the logged scalars of the selected runs to TensorBoard event files under `logdir` """
 
-    def tb(self):
-        pass
+        return export_tensorboard(self._pyramids(), logdir, max_points=max_points)
@@ -0,0 +1,148 @@
+""" Aligning logged curves of many runs onto a common step grid.
+
+All runs' points are flattened into three arrays (run, step, value) once;
+interpolation and bucketing then work on those arrays without a Python loop
+over runs or steps.
+"""
+
+import warnings
+from collections import namedtuple
+from functools import partial
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+Curves = namedtuple('Curves', ('steps', 'values', 'IDs'))
+
+
+def flatten(series):
+    """ (run, step, value) arrays out of per-run `[(step, value), ...]` lists, sorted by run and step """
+
+    runs, points = [], []
+
+    for i, item in enumerate(series):
+        if not isinstance(item, Iterable) or len(item) == 0:
+            continue
+
+        a = np.asarray(item, dtype=float).reshape(-1, 2)
+        runs.append(np.full(len(a), i))
+        points.append(a)
+
+    if not points:
+        return np.empty(0, dtype=int), np.empty(0), np.empty(0)
+
+    run    = np.concatenate(runs)
+    points = np.concatenate(points)
+
+    order = np.lexsort((points[:, 0], run))
+
+    return run[order], points[order, 0], points[order, 1]
+
+
+def interpolate(run, step, value, n_runs, grid):
+    """ Linear interpolation of every run at `grid`; NaN outside a run's logged range """
+
+    grid   = np.asarray(grid, dtype=float)
+    values = np.full((n_runs, len(grid)), np.nan)
+
+    if len(run) == 0:
+        return values
+
+    # offset every run's steps so one searchsorted covers all runs at once
+    base   = min(step.min(), grid.min())
+    span   = max(step.max(), grid.max()) - base + 1
+    key    = run * span + (step - base)
+
+    starts = np.searchsorted(run, np.arange(n_runs), side='left')
+    stops  = np.searchsorted(run, np.arange(n_runs), side='right')
+
+    r, g   = np.meshgrid(np.arange(n_runs), np.arange(len(grid)), indexing='ij')
+    query  = r * span + (grid[g] - base)
+
+    hi = np.searchsorted(key, query, side='left')
+    lo = hi - 1
+
+    start, stop = starts[r], stops[r]
+
+    exact  = (hi < stop) & (key[np.minimum(hi, len(key) - 1)] == query)
+    inside = (lo >= start) & (hi < stop)
+
+    hi_c, lo_c = np.minimum(hi, len(key) - 1), np.maximum(lo, 0)
+    s0, s1     = step[lo_c], step[hi_c]
+    v0, v1     = value[lo_c], value[hi_c]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        interp = v0 + (v1 - v0) * (grid[g] - s0) / (s1 - s0)
+
+    values[inside] = interp[inside]
+    values[exact]  = value[hi_c][exact]
+
+    return values
+
+
+def bucket(run, step, value, n_runs, width, start=0):
+    """ Mean value of every run in consecutive step buckets `[start + k * width, start + (k + 1) * width)` """
+
+    if len(run) == 0:
+        return np.empty(0), np.full((n_runs, 0), np.nan)
+
+    b = np.floor((step - start) / width).astype(int)
+
+    keep     = b >= 0
+    run, b   = run[keep], b[keep]
+    value    = value[keep]
+    n_bucket = (b.max() + 1) if len(b) else 0
+
+    flat  = run * n_bucket + b
+    sums  = np.bincount(flat, weights=value, minlength=n_runs * n_bucket)
+    count = np.bincount(flat, minlength=n_runs * n_bucket)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        values = (sums / count).reshape(n_runs, n_bucket)
+
+    return start + width * np.arange(n_bucket), values
+
+
+def aggregate(values, groups, stats=('mean', 'std'), quantiles=(), ddof=1):
+    """ Per-group statistics across runs (rows of `values`), ignoring NaNs
+
+    Parameters
+    ----------
+    groups : pd.DataFrame
+        one row per run, the columns to group by
+    ddof : int
+        delta degrees of freedom of `std`: 1 (the default) for the sample standard
+        deviation, NaN for groups of one run; 0 for the population one
+    """
+
+    funcs = dict(mean=np.nanmean, std=partial(np.nanstd, ddof=ddof), min=np.nanmin, max=np.nanmax,
+                 median=np.nanmedian, count=lambda a, axis: np.sum(~np.isnan(a), axis=axis))
+
+    if groups.shape[1] > 0:
+        codes, uniques = pd.MultiIndex.from_frame(groups).factorize()
+    else:
+        codes, uniques = np.zeros(len(values), dtype=int), [()]
+
+    index, rows = [], []
+
+    for code, key in enumerate(uniques):
+        member = values[codes == code]
+        key    = key if isinstance(key, tuple) else (key, )
+
+        # all-NaN columns are expected: steps none of the group's runs reached
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+
+            for s in stats:
+                index.append(key + (s, ))
+                rows.append(funcs[s](member, axis=0))
+
+            for q in quantiles:
+                index.append(key + (f'q{q:g}', ))
+                rows.append(np.nanquantile(member, q, axis=0))
+
+    names = list(groups.columns) + ['stat']
+
+    return pd.DataFrame(rows, index=pd.MultiIndex.from_tuples(index, names=names))
+
@@ -0,0 +1,238 @@
+""" A local dashboard of logged scalars, drawn from their pyramids.
+
+Every request asks for one tag over a step range and at most as many
+records as the plot is wide, so zooming into a run of millions of steps
+only reads the records of the matching pyramid level.
+
+    /              the page
+    /tags          JSON list of the tags logged by any run
+    /data?tag=...  JSON per-run `first`, `last`, `min`, `max`, `mean`
+                   (optional `start`, `stop`, `points`)
+"""
+
+import json
+import logging
+import math
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from bnb.track import pyramid
+
+_PAGE = """<!doctype html>
+<html><head><meta charset="utf-8"><title>bnb</title>
+<style>
+body { font: 13px sans-serif; margin: 12px; }
+canvas { border: 1px solid #ccc; cursor: crosshair; }
+#info { color: #666; margin-left: 8px; }
+</style></head>
+<body>
+<select id="tag"></select> <button id="reset">reset zoom</button><span id="info"></span><br>
+<canvas id="plot" width="1000" height="480"></canvas>
+<script>
+const canvas = document.getElementById('plot'), ctx = canvas.getContext('2d');
+const select = document.getElementById('tag'), info = document.getElementById('info');
+const colors = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b', '#e377c2', '#17becf'];
+let view = null, drag = null, data = null;
+
+async function load() {
+  const q = new URLSearchParams({tag: select.value, points: canvas.width});
+  if (view) { q.set('start', view[0]); q.set('stop', view[1]); }
+  data = await (await fetch('/data?' + q)).json();
+  draw();
+}
+
+function bounds() {
+  let x0 = Infinity, x1 = -Infinity, y0 = Infinity, y1 = -Infinity;
+  for (const r of data.runs) r.first.forEach((s, i) => {
+    x0 = Math.min(x0, s); x1 = Math.max(x1, r.last[i]);
+    if (r.min[i] !== null) { y0 = Math.min(y0, r.min[i]); y1 = Math.max(y1, r.max[i]); }
+  });
+  if (view) { x0 = view[0]; x1 = view[1]; }
+  return [x0, x1 > x0 ? x1 : x0 + 1, y0, y1 > y0 ? y1 : y0 + 1];
+}
+
+function draw() {
+  ctx.clearRect(0, 0, canvas.width, canvas.height);
+  if (!data || !data.runs.length) return;
+  const [x0, x1, y0, y1] = bounds();
+  const X = s => (s - x0) / (x1 - x0) * canvas.width;
+  const Y = v => canvas.height - (v - y0) / (y1 - y0) * canvas.height;
+  data.runs.forEach((r, k) => {
+    const c = colors[k % colors.length];
+    ctx.fillStyle = c; ctx.globalAlpha = 0.2;
+    r.first.forEach((s, i) => {
+      if (r.min[i] === null) return;
+      ctx.fillRect(X(s), Y(r.max[i]), Math.max(1, X(r.last[i]) - X(s)), Math.max(1, Y(r.min[i]) - Y(r.max[i])));
+    });
+    ctx.globalAlpha = 1; ctx.strokeStyle = c; ctx.beginPath();
+    r.first.forEach((s, i) => {
+      if (r.mean[i] === null) return;
+      const x = X((s + r.last[i]) / 2), y = Y(r.mean[i]);
+      i ? ctx.lineTo(x, y) : ctx.moveTo(x, y);
+    });
+    ctx.stroke();
+  });
+  info.textContent = data.runs.map(r => r.ID.slice(0, 6) + ': level ' + r.level + ', ' + r.first.length + ' pts').join(' | ')
+    + '   [' + x0.toPrecision(6) + ', ' + x1.toPrecision(6) + ']';
+}
+
+function step(e) { const [x0, x1] = bounds(); return x0 + e.offsetX / canvas.width * (x1 - x0); }
+canvas.onmousedown = e => { drag = step(e); };
+canvas.onmouseup = e => {
+  const s = step(e);
+  if (drag !== null && Math.abs(s - drag) > 0) { view = [Math.min(s, drag), Math.max(s, drag)]; load(); }
+  drag = null;
+};
+document.getElementById('reset').onclick = () => { view = null; load(); };
+select.onchange = () => { view = null; load(); };
+
+fetch('/tags').then(r => r.json()).then(tags => {
+  tags.forEach(t => { const o = document.createElement('option'); o.text = t; select.add(o); });
+  if (tags.length) load();
+});
+</script></body></html>
+"""
+
+
+def _floats(values):
+    return [None if math.isnan(v) else v for v in values.tolist()]
+
+
+def _number(params, key):
+    value = params.get(key, [None])[0]
+    return None if value in (None, '') else float(value)
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        url    = urlparse(self.path)
+        params = parse_qs(url.query)
+
+        if url.path == '/':
+            self._send(_PAGE.encode(), 'text/html; charset=utf-8')
+
+        elif url.path == '/tags':
+            self._json(self.server.dash.tags())
+
+        elif url.path == '/data':
+            if 'tag' not in params:
+                self.send_error(400, 'missing tag')
+                return
+
+            try:
+                start, stop = _number(params, 'start'), _number(params, 'stop')
+                points      = int(_number(params, 'points') or self.server.dash.max_points)
+            except ValueError:
+                self.send_error(400, 'bad start / stop / points')
+                return
+
+            self._json(self.server.dash.data(params['tag'][0], start, stop, points))
+
+        else:
+            self.send_error(404)
+
+    def _json(self, value):
+        self._send(json.dumps(value).encode(), 'application/json')
+
+    def _send(self, body, content_type):
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logging.getLogger('Dashboard').debug(format % args)
+
+
+class Dashboard:
+    """ Serves the pyramids of `runs` (ID -> pyramid directory) at http://host:port from a daemon thread """
+
+    def __init__(self, runs, port=8050, host='127.0.0.1', max_points=1000):
+        self.runs       = {ID: path for ID, path in runs.items() if path and os.path.isdir(path)}
+        self.max_points = max_points
+
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.dash           = self
+
+        self._thread = None
+
+    @property
+    def port(self):
+        return self._server.server_address[1]
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}/'
+
+    def tags(self):
+        return sorted({tag for path in self.runs.values() for tag in pyramid.tags(path)})
+
+    def data(self, tag, start=None, stop=None, points=None):
+        points = min(points or self.max_points, self.max_points)
+        runs   = []
+
+        for ID, path in self.runs.items():
+            q = pyramid.query(path, tag, start=start, stop=stop, max_points=points)
+            if q is None:
+                continue
+
+            runs.append(dict(ID=ID, level=q['level'],
+                             **{k: _floats(q[k]) for k in ('first', 'last', 'min', 'max', 'mean')}))
+
+        return dict(tag=tag, runs=runs)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def export_tensorboard(runs, logdir, max_points=1000):
+    """ Writes the pyramids of `runs` (ID -> pyramid directory) as TensorBoard event files, one directory per run.
+
+    Each tag is exported at the finest level with at most `max_points` records: the mean
+    as `tag` and, when the level aggregates several points, the extremes as `tag/min`, `tag/max`.
+    Requires `tensorboardX` or `torch`.
+    """
+
+    try:
+        from tensorboardX import SummaryWriter
+    except ImportError:
+        try:
+            from torch.utils.tensorboard import SummaryWriter
+        except ImportError:
+            raise ImportError('Exporting to TensorBoard requires tensorboardX or torch') from None
+
+    written = []
+
+    for ID, path in runs.items():
+        if not path or not os.path.isdir(path):
+            continue
+
+        writer = SummaryWriter(os.path.join(logdir, ID))
+
+        for tag in pyramid.tags(path):
+            q = pyramid.query(path, tag, max_points=max_points)
+
+            for i, step in enumerate(q['last'].astype(int).tolist()):
+                writer.add_scalar(tag, q['mean'][i], global_step=step)
+
+                if q['level'] > 0:
+                    writer.add_scalar(f'{tag}/min', q['min'][i], global_step=step)
+                    writer.add_scalar(f'{tag}/max', q['max'][i], global_step=step)
+
+        writer.close()
+        written.append(os.path.join(logdir, ID))
+
+    return written
@@ -0,0 +1,105 @@
+""" Lazy query plans for `Results`.
+
+A plan is a tuple of steps applied to an immutable base frame. Steps only
+narrow a vector of row positions and a list of columns, so a chain of
+filters never copies the frame. It is copied once, when the plan is executed.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+# fn(base, rows) -> boolean mask over `rows`
+Filter    = namedtuple('Filter', ('fn', ))
+# sort rows by `keys` (column tuples), pandas semantics (NaNs last, stable)
+Sort      = namedtuple('Sort', ('keys', 'ascending'))
+# positional indexing of the current rows: int, slice or list
+Take      = namedtuple('Take', ('index', ))
+# fn(base, rows, columns) -> the columns to keep
+Select    = namedtuple('Select', ('fn', ))
+
+
+def column(base, rows, key):
+    """ Values of a single column at `rows`, without copying the frame """
+    return base[key].to_numpy()[rows]
+
+
+def _and(*filters):
+    def fn(base, rows):
+        mask = np.ones(len(rows), dtype=bool)
+
+        for f in filters:
+            # later filters only look at the rows that survived so far
+            idx       = np.flatnonzero(mask)
+            mask[idx] = np.asarray(f.fn(base, rows[idx]), dtype=bool)
+
+        return mask
+
+    return Filter(fn)
+
+
+def optimize(plan):
+    """ Runs filters before sorts (which do not change the set of rows) and fuses adjacent filters """
+
+    plan = list(plan)
+
+    moved = True
+    while moved:
+        moved = False
+
+        for i in range(1, len(plan)):
+            if isinstance(plan[i], Filter) and isinstance(plan[i - 1], Sort):
+                plan[i - 1], plan[i] = plan[i], plan[i - 1]
+                moved = True
+
+    fused = []
+    for step in plan:
+        if fused and isinstance(step, Filter) and isinstance(fused[-1], Filter):
+            fused[-1] = _and(fused[-1], step)
+        else:
+            fused.append(step)
+
+    return tuple(fused)
+
+
+def _sort(base, rows, keys, ascending):
+    frame = pd.DataFrame({i: column(base, rows, k) for i, k in enumerate(keys)})
+    order = frame.sort_values(by=list(range(len(keys))), ascending=ascending,
+                              kind='mergesort').index.to_numpy()
+
+    return rows[order]
+
+
+def _take(rows, index):
+    if isinstance(index, (int, np.integer)):
+        return rows[[index]]
+
+    return rows[index]
+
+
+def execute(base, plan):
+    rows    = np.arange(len(base))
+    columns = list(base.columns)
+
+    for step in optimize(plan):
+
+        if isinstance(step, Filter):
+            rows = rows[np.asarray(step.fn(base, rows), dtype=bool)]
+
+        elif isinstance(step, Sort):
+            rows = _sort(base, rows, step.keys, step.ascending)
+
+        elif isinstance(step, Take):
+            rows = _take(rows, step.index)
+
+        elif isinstance(step, Select):
+            columns = step.fn(base, rows, columns)
+
+    return _materialize(base, rows, columns)
+
+
+def _materialize(base, rows, columns):
+    positions = base.columns.get_indexer(pd.Index(columns)) if columns else []
+
+    return base.iloc[rows, positions]
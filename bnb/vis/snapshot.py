@@ -0,0 +1,223 @@
+""" Columnar snapshot of an experiment's `Results` frame, next to its `db.json`.
+
+The snapshot is an Arrow IPC file, read through a memory map, so opening an
+unchanged experiment skips parsing the run store altogether and notebooks
+share the page cache instead of holding private copies. The snapshot records
+the size and mtime of the store it was built from; once the store changes,
+the next load refreshes it: rows of runs that had finished when it was
+written are taken from the snapshot, only new and unfinished runs are built
+from their entries (entries only grow while a run is active). Once one of
+those finished runs is removed or re-dispatched, the snapshot is rebuilt.
+
+Requires `pyarrow`; without it `load` returns `None` and callers fall back
+to building the frame from the store.
+"""
+
+import json
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from ..defaults import db_path, snapshot_path
+from ..track.utils import States
+
+_FORMAT = '2'
+_ACTIVE = {States.RUNNING, States.PRE_DISPATCH, States.UNK}
+
+_logger = logging.getLogger('Snapshot')
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+
+        return pyarrow
+
+    except ImportError:
+        return None
+
+
+def _db_stamp(name):
+    try:
+        st = os.stat(db_path(name))
+    except OSError:
+        return None
+
+    return f'{st.st_mtime_ns}:{st.st_size}'
+
+
+def _encode(pa, series):
+    """ Native Arrow column when the values allow it, JSON strings otherwise """
+
+    if series.dtype != object:
+        return pa.array(series.to_numpy(), from_pandas=True), False
+
+    values = series.tolist()
+    if all((v is None) or isinstance(v, str) for v in values):
+        return pa.array(values, type=pa.string()), False
+
+    encoded = [None if (v is None) or (isinstance(v, float) and np.isnan(v)) else json.dumps(v, default=str)
+               for v in values]
+
+    return pa.array(encoded, type=pa.string()), True
+
+
+def _decode(column, is_json):
+    if is_json:
+        # a single parse for the whole column is much cheaper than one per cell
+        cells = column.fill_null('NaN').to_pylist()
+        return json.loads('[' + ','.join(cells) + ']')
+
+    # zero-copy for primitive columns without nulls: the array points into the map
+    return column.to_numpy(zero_copy_only=False)
+
+
+def _key(entry):
+    """ Changes whenever the run's row may have: re-dispatched runs restart and stop again """
+
+    return [entry['ID'], entry['status'], entry.get('restarts', 0), entry['timing']['stop']]
+
+
+def write(name, df, stamp, entries):
+    """ Writes the frame built from `entries` (one row each, in order) """
+
+    pa = _pyarrow()
+    if pa is None:
+        return None
+
+    arrays, fields = [], []
+
+    for col in df.columns:
+        array, is_json = _encode(pa, df[col])
+        meta = {b'json': b'1'} if is_json else None
+
+        arrays.append(array)
+        fields.append(pa.field(json.dumps(list(col)), array.type, metadata=meta))
+
+    meta   = {b'format': _FORMAT.encode(), b'db': stamp.encode(),
+              b'rows': json.dumps([_key(e) for e in entries]).encode()}
+    schema = pa.schema(fields, metadata=meta)
+    table  = pa.Table.from_arrays(arrays, schema=schema)
+
+    path = snapshot_path(name)
+    tmp  = f'{path}.{os.getpid()}.tmp'
+
+    with pa.OSFile(tmp, 'wb') as sink:
+        with pa.ipc.new_file(sink, schema) as writer:
+            writer.write_table(table)
+
+    # readers that still map the previous file keep it until they are done
+    os.replace(tmp, path)
+
+    return path
+
+
+def _open(name):
+    """ The snapshot's table (backed by the memory map, nothing is decoded yet) """
+
+    pa   = _pyarrow()
+    path = snapshot_path(name)
+
+    if (pa is None) or (not os.path.exists(path)):
+        return None
+
+    try:
+        table = pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+    except (OSError, pa.ArrowInvalid) as e:
+        _logger.warning(f'Ignoring unreadable snapshot {path}: {e}')
+        return None
+
+    meta = table.schema.metadata or {}
+    if meta.get(b'format') != _FORMAT.encode():
+        return None
+
+    return table
+
+
+def _stamp(table):
+    return table.schema.metadata.get(b'db', b'').decode()
+
+
+def _read(table, groups=None):
+    data = {}
+    for field, column in zip(table.schema, table.columns):
+        key = tuple(json.loads(field.name))
+        if (groups is not None) and (key[0] != 'details') and (key[0] not in groups):
+            continue
+
+        data[key] = _decode(column, bool(field.metadata and field.metadata.get(b'json')))
+
+    df = pd.DataFrame(data)
+    df.columns = pd.MultiIndex.from_tuples(list(data)) if data else df.columns
+
+    return df
+
+
+def _refresh(table, entries, build_frame):
+    """ The frame of `entries`, reusing the snapshot's rows of runs that were finished """
+
+    rows  = {tuple(key): i for i, key in enumerate(json.loads(table.schema.metadata[b'rows']))}
+    keep  = {}
+    fresh = []
+
+    for e in entries:
+        key = tuple(_key(e))
+        if (key in rows) and (e['status'] not in _ACTIVE):
+            keep[e['ID']] = rows[key]
+        else:
+            fresh.append(e)
+
+    # a finished run that was removed or re-dispatched may leave columns no run has anymore
+    if (not keep) or (len(keep) < sum(key[1] not in _ACTIVE for key in rows)):
+        return build_frame(entries)
+
+    df = _read(table).iloc[list(keep.values())]
+    df.index = list(keep)
+
+    if fresh:
+        new = build_frame(fresh)
+        new.index = [e['ID'] for e in fresh]
+
+        df = pd.concat([df, new])
+
+    df = df.loc[[e['ID'] for e in entries]].reset_index(drop=True)
+
+    return df[sorted(df.columns)]
+
+
+def load(name, db, build_frame, groups=None):
+    """ The `Results` frame of experiment `name`, refreshing the snapshot if `db` changed.
+
+    Parameters
+    ----------
+    build_frame : Callable[[List[Dict]], pd.DataFrame]
+        builds the (full) frame for a list of run entries
+    groups : Iterable[str], optional
+        only decode these column groups (`details` is always included)
+    """
+
+    if _pyarrow() is None:
+        return None
+
+    stamp = _db_stamp(name)
+    if stamp is None:
+        return None
+
+    table = _open(name)
+    if (table is not None) and (_stamp(table) == stamp):
+        return _read(table, groups)
+
+    _logger.debug(f'Refreshing the snapshot of {name}')
+
+    entries = db.all()
+    df      = build_frame(entries) if table is None else _refresh(table, entries, build_frame)
+
+    try:
+        write(name, df, stamp, entries)
+    except OSError as e:
+        _logger.warning(f'Could not write snapshot of {name}: {e}')
+
+    return df
@@ -17,7 +17,7 @@ setup(
     author_email='marcin.elantkowski@gmail.com',
     license='MIT',
     keywords='',
-    packages=find_packages(exclude=['aws', 'examples', 'test']),
+    packages=find_packages(exclude=['aws', 'benchmarks', 'benchmarks.*', 'examples', 'test', 'tests', 'tests.*']),
     install_requires=[
         # dispatch
         'rpyc',
@@ -28,6 +28,9 @@ setup(
         # tracker,
         'tinydb',
         'gitpython',
+        # results,
+        'numpy',
+        'pandas',
         # aws,
         'awscli',
         'boto3',
@@ -35,6 +38,10 @@ setup(
         'wrapt',
         'attrs',
     ],
+    extras_require={
+        # columnar Results snapshots
+        'snapshot': ['pyarrow'],
+    },
     package_data={},
     entry_points={
         'console_scripts': ['logserv=bnb.utils.log_server:main'],
@@ -0,0 +1,9 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def home(tmp_path, monkeypatch):
+    """ Keeps `~/.experiments` of every test in a temporary directory """
+
+    monkeypatch.setenv('HOME', str(tmp_path))
+    return tmp_path
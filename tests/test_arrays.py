@@ -0,0 +1,37 @@
+import subprocess
+import sys
+
+import numpy as np
+
+from bnb.track.arrays import ArrayLog, ArrayWriter, histogram, tags
+
+
+def test_records_read_back_lazily(tmp_path):
+    directory = str(tmp_path)
+    writer    = ArrayWriter(directory)
+
+    counts, stats = histogram([1., 2., 2., np.nan, 3.], bins=2, range=(0, 4))
+    writer.add('w/hist', 0, 'histogram', counts, stats=stats)
+
+    for step in (1, 2):
+        writer.add('acc', step, 'array', dict(value=np.arange(3, dtype=np.float32) * step))
+
+    writer.close()
+
+    assert tags(directory) == ['acc', 'w/hist']
+
+    hist = ArrayLog(directory, 'w/hist')
+    assert hist.stats == [dict(count=4, min=1., max=3., sum=8., sum_sq=18.)]
+    assert hist[0]['counts'].tolist() == [1, 3]
+
+    acc = ArrayLog(directory, 'acc')
+    assert acc.at(2).dtype == np.float32
+
+    steps, values = acc.stack()
+    assert steps.tolist() == [1, 2]
+    assert values.tolist() == [[0, 1, 2], [0, 2, 4]]
+
+
+def test_importing_does_not_need_numpy():
+    code = 'import sys, bnb.track.arrays; assert "numpy" not in sys.modules'
+    subprocess.run([sys.executable, '-c', code], check=True)
@@ -0,0 +1,75 @@
+import os
+
+from bnb.track.artifacts import ArtifactStore, file_digest, read_manifest
+
+
+def _write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(content)
+
+
+def _read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def test_ingested_files_are_stored_once_and_never_shared(tmp_path):
+    store = ArtifactStore(root=str(tmp_path / 'store'))
+    a, b  = str(tmp_path / 'a'), str(tmp_path / 'b')
+
+    _write(os.path.join(a, 'model.pt'), b'weights')
+    _write(os.path.join(b, 'out', 'model.pt'), b'weights')
+
+    manifest_a = store.ingest(a, [os.path.join(a, 'model.pt')])
+    manifest_b = store.ingest(b, [os.path.join(b, 'out')])
+
+    digest = file_digest(os.path.join(a, 'model.pt'))
+
+    assert manifest_a == {'model.pt': digest} == read_manifest(a)
+    assert manifest_b == {os.path.join('out', 'model.pt'): digest}
+    assert os.listdir(os.path.dirname(store.path(digest))) == [digest]
+
+    # rewritten in place, bypassing `ExecutionContext.open` (as `torch.save` does)
+    with open(os.path.join(a, 'model.pt'), 'r+b') as f:
+        f.write(b'WEIGHTS')
+
+    assert _read(store.path(digest)) == b'weights'
+    assert _read(os.path.join(b, 'out', 'model.pt')) == b'weights'
+
+
+def test_materialize_restores_missing_files(tmp_path):
+    store = ArtifactStore(root=str(tmp_path / 'store'))
+    run   = str(tmp_path / 'run')
+
+    _write(os.path.join(run, 'x.bin'), b'x')
+    manifest = store.ingest(run, [run])
+
+    os.remove(os.path.join(run, 'x.bin'))
+    _write(os.path.join(run, 'y.bin'), b'kept')
+
+    missing = store.materialize(run, dict(manifest, **{'y.bin': 'f' * 64, 'z.bin': 'e' * 64}))
+
+    assert _read(os.path.join(run, 'x.bin')) == b'x'
+    assert _read(os.path.join(run, 'y.bin')) == b'kept'
+    assert missing == ['e' * 64]
+
+
+def test_collect_garbage_keeps_referenced_and_recent_objects(tmp_path):
+    store = ArtifactStore(root=str(tmp_path / 'store'))
+    run   = str(tmp_path / 'run')
+
+    _write(os.path.join(run, 'kept.bin'), b'kept')
+    _write(os.path.join(run, 'dropped.bin'), b'dropped!')
+
+    manifest = store.ingest(run, [run])
+    kept     = manifest['kept.bin']
+    dropped  = manifest['dropped.bin']
+
+    # just put: its run may not have written the manifest referring to it yet
+    assert store.collect_garbage({kept}) == 0
+    assert dropped in store
+
+    assert store.collect_garbage({kept}, grace=-1) == len(b'dropped!')
+    assert dropped not in store
+    assert kept in store
@@ -0,0 +1,25 @@
+import numpy as np
+
+from bnb.track.cache import cache_key
+
+
+def f(x, y=2):
+    return x
+
+
+def test_keys_follow_the_values_not_their_display():
+    a = np.zeros(10000)
+    b = a.copy()
+    b[5000] = 1
+
+    assert cache_key(f, (a, ), {}) != cache_key(f, (b, ), {})
+    assert cache_key(f, (lambda: 1, ), {}) != cache_key(f, (lambda: 2, ), {})
+    assert cache_key(f, ('1', ), {}) != cache_key(f, (1, ), {})
+
+
+def test_equivalent_calls_share_a_key():
+    assert cache_key(f, (1, ), {}) == cache_key(f, (), {'x': 1}) == cache_key(f, (1, 2), {})
+
+
+def test_unserializable_arguments_are_not_memoized():
+    assert cache_key(f, ((i for i in range(3)), ), {}) is None
@@ -0,0 +1,18 @@
+import pytest
+
+from bnb.track.checkpoint import CheckpointStore
+
+
+def test_keeps_the_last_checkpoints(tmp_path):
+    store = CheckpointStore(str(tmp_path), keep=1)
+
+    store.save('a')
+    step, path = store.save('b')
+
+    assert store._list() == [(step, path)]
+    assert store.load() == 'b'
+
+
+def test_keeping_none_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        CheckpointStore(str(tmp_path), keep=0)
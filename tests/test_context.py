@@ -0,0 +1,146 @@
+import asyncio
+import threading
+import time
+import uuid
+
+from bnb.track import context
+from bnb.track.context import get_current_context, reset_current_context, set_current_context
+from bnb.track.execution import ExecutionContext, initial_entry
+
+
+def _context():
+    entry = initial_entry(uuid.uuid4().hex, dict(name='ctx', options={}), config={})
+    return ExecutionContext(entry, upstream_update=None, use_backup=False)
+
+
+def test_async_logging_does_not_wait_for_the_context_lock():
+    ctx = _context()
+
+    async def log():
+        t0 = time.perf_counter()
+        await ctx.alog_scalar('loss', 1.0, 0)
+        await ctx.alog_scalar('loss', 0.5, 1)
+        return time.perf_counter() - t0
+
+    # e.g. the flusher thread writing the entry backup
+    held    = threading.Event()
+    release = threading.Event()
+
+    def hold():
+        with ctx._lock:
+            held.set()
+            release.wait()
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    held.wait()
+
+    try:
+        assert asyncio.run(log()) < 0.5
+    finally:
+        release.set()
+        holder.join()
+        ctx._flusher.close()
+
+
+class _Ctx:
+
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return self.name
+
+
+def _in_thread(f):
+    out = []
+    t   = threading.Thread(target=lambda: out.append(f()))
+    t.start()
+    t.join()
+
+    return out[0]
+
+
+def test_threads_keep_their_own_context():
+    barrier = threading.Barrier(2)
+    seen    = {}
+
+    def run(ctx):
+        token = set_current_context(ctx)
+        barrier.wait()
+        seen[ctx.name] = get_current_context()
+        barrier.wait()
+        reset_current_context(token)
+
+    a, b    = _Ctx('a'), _Ctx('b')
+    threads = [threading.Thread(target=run, args=(c, )) for c in (a, b)]
+
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert seen == {'a': a, 'b': b}
+    assert get_current_context() is context._DEFAULT
+
+
+def test_asyncio_tasks_keep_their_own_context():
+    async def run(ctx):
+        token = set_current_context(ctx)
+        await asyncio.sleep(0.01)
+        try:
+            return get_current_context()
+        finally:
+            reset_current_context(token)
+
+    async def main():
+        return await asyncio.gather(*(run(_Ctx(n)) for n in 'ab'))
+
+    assert [c.name for c in asyncio.run(main())] == ['a', 'b']
+
+
+def test_only_an_unset_context_falls_back_to_the_active_one():
+    a     = _Ctx('a')
+    token = set_current_context(a)
+
+    try:
+        assert _in_thread(get_current_context) is a
+
+        def explicit_none():
+            token = set_current_context(None)
+            try:
+                return get_current_context()
+            finally:
+                reset_current_context(token)
+
+        assert _in_thread(explicit_none) is context._DEFAULT
+
+    finally:
+        reset_current_context(token)
+
+
+def test_a_context_current_in_two_threads_stays_active_until_both_reset():
+    a     = _Ctx('a')
+    token = set_current_context(a)
+
+    try:
+        _in_thread(lambda: reset_current_context(set_current_context(a)))
+        assert _in_thread(get_current_context) is a
+
+    finally:
+        reset_current_context(token)
+
+    assert _in_thread(get_current_context) is context._DEFAULT
+
+
+def test_async_logging_after_the_run_is_applied_in_place():
+    ctx = _context()
+    ctx.run(lambda: None, (), {})
+
+    logged = []
+    ctx.log_scalar = lambda *args: logged.append(args)
+
+    asyncio.run(ctx.alog_scalar('loss', 1.0, 0))
+
+    assert logged == [('loss', 1.0, 0)]
+    assert ctx._flusher is None
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+
+from bnb.vis.curves import aggregate, bucket, flatten, interpolate
+
+
+def test_std_is_the_sample_standard_deviation():
+    values = np.array([[1., 2.], [3., np.nan], [5., 6.]])
+    groups = pd.DataFrame({'lr': [1, 1, 2]})
+
+    std = aggregate(values, groups).xs('std', level='stat')
+
+    assert std.loc[1, 0] == np.std([1., 3.], ddof=1)
+    assert np.isnan(std.loc[1, 1]) and np.isnan(std.loc[2, 0])
+    assert aggregate(values, groups, ddof=0).xs('std', level='stat').loc[1, 0] == 1.
+
+
+def _ragged():
+    rng = np.random.default_rng(1)
+
+    series = []
+    for first, last, n in [(0, 100, 30), (20, 60, 10), (50, 200, 40), (7, 7, 1)]:
+        steps = np.unique(rng.uniform(first, last, n).round(1)) if n > 1 else np.array([first])
+        series.append(list(zip(steps, rng.normal(size=len(steps)))))
+
+    # a run that logged nothing
+    series.append([])
+
+    return series
+
+
+def test_interpolate_matches_np_interp_per_run():
+    series = _ragged()
+    grid   = np.linspace(-10, 210, 97)
+    grid   = np.concatenate([grid, [7.]])
+
+    values = interpolate(*flatten(series), len(series), grid)
+
+    for i, points in enumerate(series):
+        if not points:
+            assert np.isnan(values[i]).all()
+            continue
+
+        s, v     = np.array(points).T
+        expected = np.interp(grid, s, v, left=np.nan, right=np.nan)
+
+        np.testing.assert_allclose(values[i], expected)
+        # NaN exactly outside the run's logged range
+        assert (np.isnan(values[i]) == ((grid < s[0]) | (grid > s[-1]))).all()
+
+
+def test_bucket_is_the_per_bucket_mean():
+    series = _ragged()
+    width  = 25
+
+    edges, values = bucket(*flatten(series), len(series), width, start=10)
+
+    assert (edges == 10 + width * np.arange(len(edges))).all()
+
+    for i, points in enumerate(series):
+        s, v = (np.array(points).T if points else (np.empty(0), np.empty(0)))
+
+        for k, edge in enumerate(edges):
+            inside = (s >= edge) & (s < edge + width)
+
+            if inside.any():
+                assert np.isclose(values[i, k], v[inside].mean())
+            else:
+                assert np.isnan(values[i, k])
+
+    # the buckets reach the last step; the run logged only before `start` has none
+    assert edges[-1] + width > max(s for points in series for s, _ in points)
+    assert np.isnan(values[3]).all()
@@ -0,0 +1,66 @@
+import json
+
+from bnb.remote.deploy import DeployedServer, code_version
+
+
+class _Path:
+
+    def __init__(self, files, path):
+        self.files, self.path = files, path
+
+    def exists(self):
+        return self.path in self.files
+
+    def read(self):
+        return self.files[self.path]
+
+
+class _Machine:
+    """ The parts of a plumbum machine `DeployedServer` reads state and kills servers with """
+
+    def __init__(self, files):
+        self.env    = {'HOME': '/home/u'}
+        self.files  = files
+        self.killed = []
+
+    def path(self, path):
+        return _Path(self.files, path)
+
+    def __getitem__(self, cmd):
+        assert cmd == 'kill'
+        return self
+
+    def run(self, args, retcode=None):
+        self.killed += args
+
+
+def _server(state):
+    files = {'/home/u/.experiments/server.json': json.dumps(state),
+             f'/proc/{state["pid"]}/cmdline': 'python\0-m\0bnb.remote.server\0--detach'}
+
+    server = DeployedServer.__new__(DeployedServer)
+    server.host, server.user, server.key = 'h', 'u', None
+    server.remote_machine = _Machine(files)
+    server.remote_pid = server.remote_port = None
+
+    return server
+
+
+def test_reattaches_to_a_server_on_the_same_code():
+    server = _server(dict(pid=10, port=2000, version=code_version()))
+    server._reattach()
+
+    assert (server.remote_pid, server.remote_port) == (10, 2000)
+
+
+def test_leaves_a_server_on_other_code_to_its_owner():
+    server  = _server(dict(pid=10, port=2000, version='old'))
+    machine = server.remote_machine
+    server._reattach()
+
+    assert server.remote_port is None
+    assert machine.killed == []
+
+    # a handle that launched nothing stops nothing
+    server.shutdown()
+    assert machine.killed == []
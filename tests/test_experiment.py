@@ -0,0 +1,53 @@
+import pytest
+
+from bnb.track import experiment as experiment_module
+from bnb.track.experiment import Experiment
+
+calls = []
+
+
+def _g(x):
+    calls.append(x)
+    return x + 1
+
+
+@pytest.fixture
+def git(monkeypatch):
+    def _set(dirty):
+        monkeypatch.setattr(experiment_module, 'caller_git_info', lambda: ('/tmp/exp', 'abc', dirty))
+
+    return _set
+
+
+def test_the_key_is_computed_once_per_call(git, monkeypatch):
+    git(dirty=False)
+
+    keys = []
+    monkeypatch.setattr(experiment_module, 'cache_key',
+                        lambda *args, **kwargs: keys.append(args) or 'k' * 64)
+
+    exp = Experiment('memo', memoize=True)
+    g   = exp.watch(_g)
+
+    calls.clear()
+    with exp.call():
+        assert g(1) == 2
+        assert g(1) == 2
+
+    assert calls == [1]
+    assert len(keys) == 2
+
+
+def test_dirty_trees_are_not_memoized(git):
+    git(dirty=True)
+
+    exp = Experiment('dirty', memoize=True, dirty_ok=True)
+    g   = exp.watch(_g)
+
+    calls.clear()
+    with exp.call():
+        g(1)
+        g(1)
+
+    # a helper of `_g` may have changed in between
+    assert calls == [1, 1]
@@ -0,0 +1,22 @@
+import time
+
+from bnb.defaults import goc_db
+from bnb.track.local import LocalExecutor
+
+
+def _slow(x):
+    time.sleep(0.5)
+    return x * 2
+
+
+def test_shutdown_without_waiting_resolves_submitted_runs():
+    executor = LocalExecutor(n_procs=2)
+    info     = dict(name='local', options=dict(telemetry=0))
+    futures  = [executor.submit(info, _slow, (i, ), {}) for i in range(3)]
+
+    executor.shutdown(wait=False)
+
+    assert [f.result(timeout=30) for f in futures] == [0, 2, 4]
+
+    executor._writer.join(timeout=30)
+    assert {e['status'] for e in goc_db(name='local').all()} == {'OK'}
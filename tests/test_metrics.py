@@ -0,0 +1,77 @@
+import gc
+import weakref
+
+from bnb.utils.metrics import Registry
+
+
+def test_counter_and_gauge_keep_one_value_per_label_set():
+    r = Registry()
+
+    c = r.counter('runs_total', 'Runs')
+    c.inc(queue='a')
+    c.inc(2, queue='a')
+    c.inc(queue='b')
+
+    g = r.gauge('depth', 'Depth')
+    g.set(3, queue='a')
+    g.set_function(lambda: 7, queue='b')
+    g.set_function(lambda: 1 / 0, queue='c')
+
+    assert (c.get(queue='a'), c.get(queue='b'), c.get(queue='x')) == (3, 1, 0)
+    assert (g.get(queue='a'), g.get(queue='b')) == (3, 7)
+
+    lines = r.render().splitlines()
+
+    assert lines[:5] == ['# HELP runs_total Runs', '# TYPE runs_total counter',
+                         'runs_total{queue="a"} 3.0', 'runs_total{queue="b"} 1.0', '# HELP depth Depth']
+    # a failing callback is left out of the scrape
+    assert [l for l in lines if l.startswith('depth')] == ['depth{queue="a"} 3.0', 'depth{queue="b"} 7.0']
+
+    g.remove(queue='b')
+    assert 'depth{queue="b"} 7.0' not in r.render()
+
+
+def test_histogram_buckets_are_cumulative():
+    h = Registry().histogram('wait_seconds', 'Wait', buckets=(0.1, 1.))
+
+    for v in (0.05, 0.1, 0.5, 3.):
+        h.observe(v, op='x')
+
+    assert h.render()[2:] == ['wait_seconds_bucket{op="x",le="0.1"} 2',
+                              'wait_seconds_bucket{op="x",le="1.0"} 3',
+                              'wait_seconds_bucket{op="x",le="+Inf"} 4',
+                              'wait_seconds_sum{op="x"} 3.65',
+                              'wait_seconds_count{op="x"} 4']
+
+
+def test_label_values_are_escaped():
+    g = Registry().gauge('g')
+    g.set(1, path='a"b\\c')
+
+    assert g.render()[-1] == 'g{path="a\\"b\\\\c"} 1.0'
+
+
+class _Worker:
+
+    def stop(self, shutdown=False):
+        pass
+
+
+def test_manager_gauges_are_per_instance_and_do_not_keep_it_alive():
+    from bnb.dispatch.manager import WorkerManager, _WORKERS
+
+    a, b = WorkerManager(n_local=0), WorkerManager(n_local=0)
+    a._workers.add(_Worker())
+
+    label = a._manager_label
+    assert _WORKERS.get(state='total', manager=label) == 1
+    assert _WORKERS.get(state='total', manager=b._manager_label) == 0
+
+    ref = weakref.ref(a)
+    del a
+    gc.collect()
+
+    assert ref() is None
+    assert _WORKERS.get(state='total', manager=label) == 0
+
+    b.stop()
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+
+from bnb.vis import plan
+
+ACC  = ('results', 'acc')
+LR   = ('config', 'lr')
+OPT  = ('config', 'opt')
+
+
+def _base():
+    rng = np.random.default_rng(0)
+
+    return pd.DataFrame({
+        ACC: np.where(rng.random(50) < 0.1, np.nan, rng.random(50)),
+        LR:  rng.choice([0.1, 0.01, 0.001], 50),
+        OPT: rng.choice(['adam', 'sgd'], 50),
+    })
+
+
+def _greater(key, x):
+    return plan.Filter(lambda base, rows: plan.column(base, rows, key) > x)
+
+
+def _equal(key, x):
+    return plan.Filter(lambda base, rows: plan.column(base, rows, key) == x)
+
+
+def test_filters_run_before_sorts_and_are_fused():
+    steps = (plan.Sort([ACC], False), _greater(ACC, 0.2), _equal(OPT, 'adam'), plan.Take(slice(None, 5)))
+
+    optimized = plan.optimize(steps)
+
+    assert [type(s) for s in optimized] == [plan.Filter, plan.Sort, plan.Take]
+
+
+def test_optimized_plans_match_eager_pandas():
+    base = _base()
+
+    steps = (plan.Sort([LR, ACC], [True, False]),
+             _greater(ACC, 0.2),
+             _equal(OPT, 'adam'),
+             plan.Take(slice(None, 5)),
+             plan.Sort([ACC], True),
+             _greater(LR, 0.005))
+
+    eager = base.sort_values([LR, ACC], ascending=[True, False], kind='mergesort')
+    eager = eager[eager[ACC] > 0.2]
+    eager = eager[eager[OPT] == 'adam']
+    eager = eager.iloc[:5]
+    eager = eager.sort_values([ACC], ascending=True, kind='mergesort')
+    eager = eager[eager[LR] > 0.005]
+
+    pd.testing.assert_frame_equal(plan.execute(base, steps), eager)
+
+
+def test_sorts_keep_nans_last_and_ties_stable():
+    base = _base()
+
+    result = plan.execute(base, (plan.Sort([OPT], True), plan.Sort([ACC], False)))
+    eager  = base.sort_values([OPT], kind='mergesort').sort_values([ACC], ascending=False, kind='mergesort')
+
+    pd.testing.assert_frame_equal(result, eager)
+    assert result[ACC].iloc[-1:].isna().all()
+
+
+def test_select_and_take_match_eager_pandas():
+    base  = _base()
+    steps = (plan.Take([3, 1, 4]), plan.Select(lambda base, rows, columns: [c for c in columns if c[0] == 'config']))
+
+    pd.testing.assert_frame_equal(plan.execute(base, steps), base.iloc[[3, 1, 4]][[LR, OPT]])
+    pd.testing.assert_frame_equal(plan.execute(base, (plan.Take(2), )), base.iloc[[2]])
@@ -0,0 +1,16 @@
+import sys
+
+from bnb.track.profiler import _relative
+
+
+def test_labels_do_not_depend_on_the_checkout(monkeypatch):
+    _relative.cache_clear()
+
+    monkeypatch.setattr(sys, 'path', ['/home/a/repo', '/srv/b/repo', '/srv/b/repo/src'])
+
+    assert _relative('/home/a/repo/pkg/train.py') == _relative('/srv/b/repo/pkg/train.py') == 'pkg/train.py'
+    assert _relative('/srv/b/repo/src/pkg/model.py') == 'pkg/model.py'
+    assert _relative('/opt/other.py') == '/opt/other.py'
+    assert _relative('<frozen os>') == '<frozen os>'
+
+    _relative.cache_clear()
@@ -0,0 +1,82 @@
+import os
+
+import numpy as np
+
+from bnb.track import pyramid
+from bnb.track.pyramid import PyramidWriter, load_level, query
+
+_FACTOR = 4
+
+
+def _write(directory, values, start=0):
+    w = PyramidWriter(directory, factor=_FACTOR, max_levels=3)
+    for step, v in enumerate(values, start):
+        w.add('loss', step, v)
+    w.flush()
+
+
+def _files(directory):
+    return {name: open(os.path.join(directory, name), 'rb').read() for name in sorted(os.listdir(directory))}
+
+
+def test_levels_summarize_the_points_they_cover(tmp_path):
+    values = np.random.default_rng(0).normal(size=1000)
+    _write(str(tmp_path), values)
+
+    assert pyramid.levels(str(tmp_path), 'loss') == 4
+
+    for level in range(4):
+        rec = load_level(str(tmp_path), 'loss', level)
+
+        # complete records, then the tail of the level below: the latest points may only be in finer levels
+        assert 1000 - _FACTOR ** level < rec['count'].sum() <= 1000
+
+        for first, last, lo, hi, total in zip(rec['first'], rec['last'], rec['min'], rec['max'], rec['sum']):
+            covered = values[int(first):int(last) + 1]
+
+            assert (lo, hi) == (covered.min(), covered.max())
+            assert np.isclose(total, covered.sum())
+
+
+def test_query_picks_the_finest_level_within_max_points(tmp_path):
+    _write(str(tmp_path), np.arange(1000.))
+
+    # 1000, 250, 62 + tail, 15 + tail records
+    assert query(str(tmp_path), 'loss', max_points=2000)['level'] == 0
+    assert query(str(tmp_path), 'loss', max_points=300)['level'] == 1
+    assert query(str(tmp_path), 'loss', max_points=10)['level'] == 3
+
+    # a narrow range is drawn from a finer level
+    q = query(str(tmp_path), 'loss', start=100, stop=199, max_points=30)
+    assert q['level'] == 1
+    assert (q['first'].min(), q['last'].max()) == (100, 199)
+    assert np.array_equal(q['mean'], (q['first'] + q['last']) / 2)
+
+
+def test_a_resumed_run_continues_its_pyramids(tmp_path):
+    values = np.random.default_rng(1).normal(size=300)
+
+    once, resumed = str(tmp_path / 'once'), str(tmp_path / 'resumed')
+
+    _write(once, values)
+    _write(resumed, values[:137])
+    _write(resumed, values[137:], start=137)
+
+    assert _files(resumed) == _files(once)
+
+
+def test_levels_out_of_step_are_rebuilt_from_level_0(tmp_path):
+    values = np.random.default_rng(2).normal(size=300)
+
+    once, crashed = str(tmp_path / 'once'), str(tmp_path / 'crashed')
+
+    _write(once, values)
+    _write(crashed, values[:137])
+
+    # as if the run died after writing level 0, before level 1, with half a record
+    with open(os.path.join(crashed, 'loss.0.bin'), 'ab') as f:
+        f.write(np.array([137., values[137]]).tobytes() + b'\0' * 5)
+
+    _write(crashed, values[138:], start=138)
+
+    assert _files(crashed) == _files(once)
@@ -0,0 +1,38 @@
+import json
+import os
+
+from tinydb import TinyDB
+
+from bnb.defaults import db_path, goc_db, goc_storage_path
+from bnb.vis.core import get
+
+
+def _entry(ID):
+    return dict(ID=ID, status='OK', rich_id={'name': 'res'}, timing={'start': 0, 'stop': 0})
+
+
+def test_filtered_get_sees_writes_from_other_handles():
+    goc_db(name='res').insert(_entry('a'))
+    assert len(get('res', status='OK')) == 1
+
+    # another process writing the same store
+    TinyDB(db_path('res')).table('runs').insert(_entry('b'))
+
+    assert len(get('res', status='OK')) == 2
+
+
+def test_recorded_paths_resolve_under_the_local_storage():
+    profile = dict(interval=0.01, samples=2, stacks={'main (a.py:1);f (a.py:3)': 2})
+
+    for ID in ('rel', 'abs'):
+        with open(os.path.join(goc_storage_path(ID, 'paths'), 'profile.json'), 'w') as f:
+            json.dump(profile, f)
+
+    # runs record paths relative to their storage, older ones absolute paths
+    goc_db(name='paths').insert(dict(_entry('rel'), misc={'profile': 'profile.json'}))
+    goc_db(name='paths').insert(dict(_entry('abs'), misc={'profile': os.path.join(goc_storage_path('abs', 'paths'),
+                                                                                'profile.json')}))
+
+    hot = get('paths').hot_functions()
+
+    assert hot.set_index('function').loc['f (a.py:3)', 'self'] == 4
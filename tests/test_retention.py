@@ -0,0 +1,58 @@
+import os
+import time
+
+from bnb.defaults.retention import DropFailed, plan
+from bnb.track.utils import States
+
+DAY = 24 * 60 * 60
+
+
+def _entry(ID, status, stop=0, **kwargs):
+    return dict(ID=ID, status=status, timing={'start': 0, 'stop': stop}, results={}, logs={}, **kwargs)
+
+
+def test_runs_without_timing_are_aged_by_their_last_update():
+    now = time.time()
+
+    entries = [_entry('dead-recent', States.DEAD, _last_update=now - DAY),
+               _entry('dead-old', States.DEAD, _last_update=now - 10 * DAY),
+               _entry('cancelled-unknown', States.CANCELLED),
+               _entry('failed-old', States.FAIL, stop=now - 10 * DAY)]
+
+    delete, _, _ = plan(entries, [DropFailed(days=7)], now=now)
+
+    assert delete == {'dead-old', 'failed-old'}
+
+
+class _Redispatching(DropFailed):
+    """ Re-dispatches `ID` while the plan is being made, as a manager with max_restarts would """
+
+    def __init__(self, ID):
+        super().__init__(days=7)
+        self.ID = ID
+
+    def delete(self, entries, now):
+        from bnb.track.execution import write_update
+
+        selected = super().delete(entries, now)
+        write_update(self.ID, 'status', value=States.PRE_DISPATCH)
+
+        return selected
+
+
+def test_runs_changed_after_planning_are_not_deleted():
+    from bnb.defaults import goc_db, goc_storage_path, prepare
+    from bnb.defaults.retention import compact
+    from bnb.track.execution import insert_entry
+
+    old = time.time() - 10 * DAY
+
+    for ID in ('a', 'b'):
+        prepare(ID, 'ret')
+        insert_entry(_entry(ID, States.DEAD, _last_update=old))
+
+    report = compact('ret', [_Redispatching('b')])
+
+    assert report.deleted == ['a']
+    assert [e['ID'] for e in goc_db(name='ret').all()] == ['b']
+    assert os.path.isdir(goc_storage_path('b', 'ret'))
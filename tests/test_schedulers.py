@@ -0,0 +1,86 @@
+import random
+import statistics
+
+from bnb.track.schedulers import ASHA, Decision, MedianStopping
+
+CONTINUE, STOP = Decision.CONTINUE, Decision.STOP
+
+
+def test_asha_rungs():
+    assert ASHA('acc', min_step=1, max_step=27, reduction_factor=3).rungs == [1, 3, 9]
+
+
+def test_asha_stops_runs_outside_the_top_fraction_of_a_rung():
+    asha = ASHA('acc', min_step=1, max_step=27, reduction_factor=3)
+
+    # fewer values than the reduction factor: no cutoff yet
+    assert [asha.on_result(ID, 1, v) for ID, v in [('a', 1.), ('b', 2.), ('c', 3.)]] == [CONTINUE] * 3
+
+    assert asha.on_result('d', 1, 0.5) == STOP
+    assert asha.on_result('e', 1, 4.0) == CONTINUE
+
+    # a single update can pass several rungs
+    assert asha.on_result('e', 9, 4.0) == CONTINUE
+    assert asha._next['e'] == 3
+
+
+def test_asha_minimizes():
+    asha = ASHA('loss', mode='min', min_step=1, max_step=3, reduction_factor=2)
+
+    assert asha.on_result('a', 1, 1.0) == CONTINUE
+    assert asha.on_result('b', 1, 2.0) == STOP
+
+
+def test_asha_ignores_updates_of_finished_runs():
+    asha = ASHA('acc', min_step=1, max_step=27, reduction_factor=3)
+
+    asha.on_result('a', 1, 1.)
+    asha.on_finished('a')
+
+    assert asha.on_result('a', 3, 1.) == CONTINUE
+    assert 'a' not in asha._next
+    assert asha._recorded[1] == []
+
+
+def _naive_median_stopping(history, ID, step, grace_steps, min_runs):
+    """ The rule as written in the paper, from the full histories """
+
+    if step < grace_steps:
+        return CONTINUE
+
+    others = []
+    for other, h in history.items():
+        seen = [s for t, s in h if t <= step]
+        if other != ID and seen:
+            others.append(sum(seen) / len(seen))
+
+    if len(others) < min_runs:
+        return CONTINUE
+
+    return STOP if max(s for _, s in history[ID]) < statistics.median(others) else CONTINUE
+
+
+def test_median_stopping_matches_the_rule_on_full_histories():
+    rng     = random.Random(0)
+    rule    = MedianStopping('acc', grace_steps=3, min_runs=2)
+    history = {}
+
+    for _ in range(400):
+        ID   = rng.choice('abcde')
+        # mostly in order, sometimes a late step
+        step = max(0, len(history.get(ID, ())) + rng.choice([0, 0, 0, -2]))
+        v    = rng.random()
+
+        history.setdefault(ID, []).append((step, v))
+
+        assert rule.on_result(ID, step, v) == _naive_median_stopping(history, ID, step, 3, 2)
+
+
+def test_median_stopping_needs_enough_other_runs():
+    rule = MedianStopping('acc', min_runs=2)
+
+    rule.on_result('a', 0, 1.)
+    assert rule.on_result('b', 0, 0.) == CONTINUE
+
+    rule.on_result('c', 0, 1.)
+    assert rule.on_result('b', 1, 0.) == STOP
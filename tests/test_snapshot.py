@@ -0,0 +1,58 @@
+import pandas as pd
+import pytest
+
+from bnb.defaults import goc_db
+from bnb.vis import snapshot
+from bnb.vis.core import get
+
+pytest.importorskip('pyarrow')
+
+
+def _entry(ID, status='OK', stop=1):
+    return dict(ID=ID, status=status, rich_id={'name': 'snap'}, timing={'start': 0, 'stop': stop},
+                config={'lr': '0.1', 'sizes': '(64, 32)', 'table': '{1: (2, 3)}', 'opt': 'adam'},
+                results={'acc': 0.5},
+                logs={'loss': [(0, 1.0), (1, 0.5)]})
+
+
+def _assert_same(name):
+    pd.testing.assert_frame_equal(get(name).df, get(name, snapshot=False).df)
+
+
+def test_snapshot_and_store_give_the_same_frame():
+    goc_db(name='snap').insert(_entry('a'))
+    goc_db(name='snap').insert(dict(_entry('b'), results={'acc': 0.7, 'top5': 0.9}))
+
+    _assert_same('snap')
+    # now read back from the snapshot
+    _assert_same('snap')
+
+    assert get('snap').df[('config', 'sizes')][0] == [64, 32]
+    assert get('snap').df[('config', 'table')][0] == {'1': [2, 3]}
+
+
+def test_new_runs_are_appended_to_the_snapshot(monkeypatch):
+    db = goc_db(name='grow')
+    db.insert(dict(_entry('a'), rich_id={'name': 'grow'}))
+    db.insert(dict(_entry('b', status='RUNNING'), rich_id={'name': 'grow'}))
+    get('grow')
+
+    built = []
+    refresh = snapshot._refresh
+    monkeypatch.setattr(snapshot, '_refresh',
+                        lambda table, entries, build_frame: refresh(table, entries,
+                                                                    lambda e: built.append(len(e)) or build_frame(e)))
+
+    db.update({'status': 'OK', 'results': {'acc': 0.9}}, doc_ids=[2])
+    db.insert(dict(_entry('c'), rich_id={'name': 'grow'}, results={'loss': 2}))
+
+    _assert_same('grow')
+    # the finished run is reused, the one that was running and the new one are built
+    assert built == [2]
+
+    # re-dispatched or removed: rebuilt
+    db.update({'restarts': 1, 'timing': {'start': 0, 'stop': 5}}, doc_ids=[1])
+    _assert_same('grow')
+
+    db.remove(doc_ids=[3])
+    _assert_same('grow')
@@ -0,0 +1,118 @@
+import os
+import queue
+import threading
+import time
+import uuid
+
+import dill
+
+from bnb.dispatch.task import ServiceDead, TaskProcess
+from bnb.track.execution import initial_entry
+from bnb.track.utils import States
+
+
+def _entry(**options):
+    options.setdefault('telemetry', 0)
+
+    return initial_entry(uuid.uuid4().hex, dict(name='test', options=options), config={})
+
+
+class Updates:
+
+    def __init__(self):
+        self.items = []
+
+    def __call__(self, ID, *path, value, mode):
+        self.items.append((path, dill.loads(value) if isinstance(value, bytes) else value))
+
+    def last(self, *path):
+        return [value for p, value in self.items if p == path][-1]
+
+
+def _die():
+    os._exit(9)
+
+
+def test_killed_child_is_reported_dead():
+    updates = Updates()
+    task    = TaskProcess(_entry(), _die, (), {}, upstream_update=updates, poll=0.1)
+
+    ret = task.run()
+
+    assert isinstance(ret, ServiceDead)
+    assert updates.last('status') == States.DEAD
+    assert 'code 9' in updates.last('misc', 'error')
+
+
+def test_wire_marker_round_trip():
+    assert isinstance(ServiceDead.from_wire(ServiceDead.MARKER), ServiceDead)
+    assert ServiceDead.from_wire('OK') == 'OK'
+
+
+def _log_often(n, every):
+    from bnb import get_current_context
+
+    ctx = get_current_context()
+
+    for i in range(n):
+        ctx.log_scalar('loss', 1.0 / (i + 1), i)
+        time.sleep(every)
+
+    return 'finished'
+
+
+def test_thinned_logs_still_count_as_activity():
+    updates = Updates()
+    entry   = _entry(log_policies={'loss': ['every_n', 100]})
+    task    = TaskProcess(entry, _log_often, (40, 0.05), {}, upstream_update=updates,
+                          idle_timeout=1, poll=0.1)
+
+    assert task.run() == 'finished'
+    assert updates.last('status') == States.OK
+
+
+def _log_and_return():
+    from bnb import get_current_context
+
+    get_current_context().log_scalar('loss', 0.5, 0)
+
+    return 'finished'
+
+
+def test_messages_sent_right_before_exit_are_drained():
+    updates = Updates()
+    task    = TaskProcess(_entry(), _log_and_return, (), {}, upstream_update=updates, poll=0.1)
+
+    # the monitor only polls after the child is gone, as when it exits between two polls
+    get = task._q.get
+
+    def _late(block=True, timeout=None):
+        if block:
+            while task._proc.is_alive():
+                time.sleep(0.01)
+            raise queue.Empty
+
+        return get(False)
+
+    task._q.get = _late
+
+    assert task.run() == 'finished'
+    assert updates.last('status') == States.OK
+    assert updates.last('logs', 'loss') == (0, 0.5)
+
+
+def test_concurrent_cancels_stop_once():
+    task = TaskProcess(_entry(), time.sleep, (60, ), {}, upstream_update=Updates(), poll=0.1)
+    task._proc.start()
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(task.cancel(States.TIMEOUT, 'limit')))
+               for _ in range(4)]
+
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sorted(results) == [False, False, False, True]
+    assert not task._proc.is_alive()
@@ -0,0 +1,72 @@
+import os
+import socket
+
+from bnb.track.tracing import chrome_trace, make_span, span
+from bnb.track.utils import _nested_update
+
+
+def test_nested_spans_are_recorded_inside_out_and_contain_each_other():
+    spans = []
+
+    with span('outer', spans.append, slot=1):
+        with span('inner', spans.append):
+            pass
+
+    inner, outer = spans
+
+    assert [inner['name'], outer['name']] == ['inner', 'outer']
+    assert outer['ts'] <= inner['ts']
+    assert inner['ts'] + inner['dur'] <= outer['ts'] + outer['dur']
+    assert outer['args'] == {'slot': 1} and inner['args'] == {}
+    assert (outer['host'], outer['pid']) == (socket.gethostname(), os.getpid())
+
+
+def test_span_is_recorded_when_the_block_raises():
+    spans = []
+
+    try:
+        with span('failing', spans.append):
+            raise ValueError()
+    except ValueError:
+        pass
+
+    assert [s['name'] for s in spans] == ['failing']
+
+
+def test_extend_concatenates_spans_sent_in_batches():
+    entry = {'trace': [], 'misc': {}}
+
+    _nested_update(entry, 'trace', value=[make_span('a', 0, 1)], mode='extend')
+    _nested_update(entry, 'trace', value=[make_span('b', 1, 2), make_span('c', 2, 3)], mode='extend')
+    _nested_update(entry, 'misc', 'spans', value=[make_span('d', 3, 4)], mode='extend')
+
+    assert [s['name'] for s in entry['trace']] == ['a', 'b', 'c']
+    assert [s['name'] for s in entry['misc']['spans']] == ['d']
+
+
+def test_chrome_trace_has_a_process_per_host_and_a_thread_per_run():
+    manager = dict(make_span('dispatch', 10, 10.5), host='manager', pid=1)
+    worker  = dict(make_span('task_process', 10.1, 10.4, slot=0), host='worker', pid=7)
+
+    entries = [dict(ID='a' * 32, trace=[manager, worker]),
+               dict(ID='b' * 32, trace=[dict(manager, ts=11)]),
+               dict(ID='c' * 32)]
+
+    trace = chrome_trace(entries)
+    assert trace['displayTimeUnit'] == 'ms'
+
+    events    = trace['traceEvents']
+    processes = {e['pid']: e['args']['name'] for e in events if e['name'] == 'process_name'}
+    threads   = {(e['pid'], e['tid']): e['args']['name'] for e in events if e['name'] == 'thread_name'}
+    complete  = [e for e in events if e['ph'] == 'X']
+
+    assert processes == {1: 'manager:1', 2: 'worker:7'}
+    assert threads == {(1, 1): 'a' * 8, (2, 1): 'a' * 8, (1, 2): 'b' * 8}
+
+    assert [(e['name'], e['pid'], e['tid']) for e in complete] == [('dispatch', 1, 1),
+                                                                   ('task_process', 2, 1),
+                                                                   ('dispatch', 1, 2)]
+    # microseconds
+    assert complete[1]['ts'] == 10.1 * 1e6 and abs(complete[1]['dur'] - 0.3 * 1e6) < 1e-3
+    assert complete[1]['args'] == {'slot': 0, 'ID': 'a' * 32}
+    assert all(e['cat'] == 'bnb' for e in complete)
@@ -0,0 +1,158 @@
+import threading
+import time
+from queue import Queue
+from types import SimpleNamespace
+
+import pytest
+
+from bnb.dispatch.manager import WorkerManager
+from bnb.dispatch.workers import HostConnection, ServiceDead, Worker
+
+
+class _Worker(Worker):
+
+    def __init__(self):
+        super().__init__(use_s3=False, watch=False)
+        self._logger = SimpleNamespace(error=lambda *a: None, debug=lambda *a: None)
+
+
+def _manager():
+    """ Just what `WorkerManager._put` uses, without starting any worker """
+
+    m = SimpleNamespace(_logger=SimpleNamespace(info=lambda *a: None), _avail=Queue(), _finalize=None)
+    m._post = SimpleNamespace(submit=lambda fn, retval, entry, on_finished, record_span: on_finished(retval))
+    m._put  = lambda *args: WorkerManager._put(m, *args)
+
+    return m
+
+
+def _in_flight(worker, manager, ID, finished):
+    worker._last_ID       = ID
+    worker._last_update   = lambda ID, *path, **k: finished.append(('update', ID, path, k))
+    worker._last_callback = lambda ret: manager._put(ret, worker, {'ID': ID}, lambda r: finished.append((ID, r)),
+                                                     None)
+
+
+def test_connection_loss_only_reports_runs_in_flight():
+    manager  = _manager()
+    finished = []
+
+    done, busy = _Worker(), _Worker()
+    _in_flight(done, manager, 'done', finished)
+    _in_flight(busy, manager, 'busy', finished)
+
+    # 'done' completes normally before the connection drops
+    done._last_callback('OK')
+
+    host = HostConnection.__new__(HostConnection)
+    host._workers     = {done, busy}
+    host._should_stop = threading.Event()
+    host._logger      = SimpleNamespace(error=lambda *a: None)
+    host.main         = SimpleNamespace(conn=SimpleNamespace(_closed=True))
+    host.stop_main    = lambda: None
+    host.start        = lambda: host._should_stop.set()
+
+    host._perhaps_restart()
+
+    assert [f for f in finished if f[0] == 'update'] == [('update', 'busy', ('status', ), {'value': 'DEAD'})]
+    assert [ID for ID, *_ in finished if ID != 'update'] == ['done', 'busy']
+    assert isinstance(finished[-1][1], ServiceDead)
+    assert manager._avail.qsize() == 2
+
+
+def test_disconnect_cancels_the_connections_tasks():
+    from bnb.dispatch.service import WorkerService
+    from bnb.dispatch.task import TaskProcess
+    from bnb.track.utils import States
+
+    from .test_task import Updates, _entry
+
+    updates = Updates()
+    task    = TaskProcess(_entry(), time.sleep, (60, ), {}, upstream_update=updates, poll=0.1)
+
+    service = WorkerService()
+    service._tasks[0] = task
+
+    result = []
+    runner = threading.Thread(target=lambda: result.append(task.run()))
+    runner.start()
+
+    while task._proc.pid is None:
+        time.sleep(0.01)
+
+    service.on_disconnect(None)
+    runner.join(10)
+
+    assert result == [States.DEAD]
+    assert updates.last('misc', 'error') == 'Manager disconnected'
+
+
+def test_timed_out_call_is_cleaned_up():
+    from bnb.remote.deploy import _call_with_timeout
+
+    closed = []
+
+    def _slow():
+        time.sleep(0.3)
+        return 'machine'
+
+    with pytest.raises(TimeoutError):
+        _call_with_timeout(_slow, 0.05, cleanup=closed.append)
+
+    time.sleep(0.5)
+    assert closed == ['machine']
+    assert _call_with_timeout(_slow, 5, cleanup=closed.append) == 'machine'
+    assert closed == ['machine']
+
+
+def test_stop_waits_for_runs_being_finalized(monkeypatch):
+    from bnb.dispatch import manager as manager_module
+
+    def _slow_s3_info(db_entry):
+        time.sleep(0.3)
+        return None, None
+
+    monkeypatch.setattr(manager_module, 'get_s3_info', _slow_s3_info)
+    monkeypatch.setattr(manager_module, 'safe_s3_sync', lambda *a, **k: None)
+    monkeypatch.setattr(manager_module, 'fetch_artifacts', lambda *a: None)
+
+    manager  = WorkerManager(n_local=0, n_post=2)
+    finished = []
+
+    for ID in ('a', 'b', 'c'):
+        manager._put('OK', _Worker(), {'ID': ID}, lambda r, ID=ID: finished.append(ID), lambda s: None)
+
+    manager.stop()
+
+    assert sorted(finished) == ['a', 'b', 'c']
+
+
+def test_trace_is_sent_without_waiting_for_the_manager():
+    import dill
+    import rpyc
+
+    from bnb.dispatch.service import WorkerService
+
+    received = []
+
+    class _Manager(rpyc.Service):
+
+        def exposed_update(self, ID, *path, value, mode):
+            time.sleep(0.5)
+            received.append((ID, path, dill.loads(value), mode))
+
+    conn = rpyc.connect_thread(remote_service=_Manager)
+
+    try:
+        t0 = time.time()
+        WorkerService()._send_trace(conn.root.update, 'ID', [{'name': 'unpickle'}])
+
+        assert time.time() - t0 < 0.3
+
+        while not received and time.time() - t0 < 10:
+            time.sleep(0.05)
+
+        assert received == [('ID', ('trace', ), [{'name': 'unpickle'}], 'extend')]
+
+    finally:
+        conn.close()